@@ -0,0 +1,77 @@
+from typing import TYPE_CHECKING, Dict, List
+from models import PropertyListing
+
+# // pandas jest importowany przy pierwszym użyciu (szybszy start dashboardu)
+if TYPE_CHECKING:
+    import pandas as pd
+
+# // Grupowania w panelu analiz: nazwa zakładki -> kolumna
+GROUPINGS = {
+    "Area": "area",
+    "District": "district",
+    "Bedrooms": "bedrooms",
+}
+QUANTILES = (0.25, 0.5, 0.75)
+SUMMARY_COLUMNS = ["listings", "median_rent", "p25_rent", "p75_rent", "median_price_per_sqm"]
+
+
+def listings_frame(listings: List[PropertyListing]) -> "pd.DataFrame":
+    """
+    // Buduje ramkę z polami potrzebnymi do analiz (jedno przejście po ogłoszeniach)
+    Args:
+        listings: Lista ogłoszeń
+    Returns:
+        pd.DataFrame: Kolumny area, district, bedrooms, price, price_per_sqm
+    """
+    import pandas as pd
+
+    return pd.DataFrame({
+        "area": pd.Series([listing.location.area for listing in listings], dtype="string"),
+        "district": pd.Series([listing.location.district for listing in listings], dtype="string"),
+        "bedrooms": pd.Series([listing.property_info.bedrooms for listing in listings], dtype="Int64"),
+        "price": pd.Series([listing.price for listing in listings], dtype="float64"),
+        "price_per_sqm": pd.Series([listing.price_per_sqm for listing in listings], dtype="float64"),
+    })
+
+
+def summarize(frame: "pd.DataFrame", column: str) -> "pd.DataFrame":
+    """
+    // Liczba ogłoszeń, kwartyle czynszu i mediana ceny za m² w grupach wartości kolumny
+    Args:
+        frame: Ramka z listings_frame
+        column: Kolumna grupowania (area, district, bedrooms)
+    Returns:
+        pd.DataFrame: Jeden wiersz na grupę, od najliczniejszej
+    """
+    import pandas as pd
+
+    grouped = frame.groupby(column, dropna=True, observed=True)
+    if grouped.ngroups == 0:
+        # // Brak wartości w kolumnie (np. same działki bez sypialni) - pusta tabela zamiast błędu
+        return pd.DataFrame(columns=SUMMARY_COLUMNS, index=pd.Index([], name=column))
+    rent = grouped["price"].quantile(list(QUANTILES)).unstack()
+    rent.columns = ["p25_rent", "median_rent", "p75_rent"]
+    summary = rent.assign(
+        listings=grouped.size(),
+        median_price_per_sqm=grouped["price_per_sqm"].median()
+    )
+    summary = summary[SUMMARY_COLUMNS]
+    return summary.sort_values(["listings", "median_rent"], ascending=[False, True])
+
+
+def area_analytics(listings: List[PropertyListing]) -> Dict[str, "pd.DataFrame"]:
+    """
+    // Liczy wszystkie zestawienia panelu analiz dla zbioru ogłoszeń
+    Args:
+        listings: Lista ogłoszeń
+    Returns:
+        Dict[str, pd.DataFrame]: Nazwa zakładki -> zestawienie (pusty słownik dla braku ogłoszeń)
+    """
+    if not listings:
+        return {}
+    frame = listings_frame(listings)
+    return {name: summarize(frame, column) for name, column in GROUPINGS.items()}
+
+
+def analytics_bytes(analytics: Dict[str, "pd.DataFrame"]) -> int:
+    return int(sum(summary.memory_usage(deep=True).sum() for summary in analytics.values()))
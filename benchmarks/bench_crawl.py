@@ -0,0 +1,110 @@
+"""
+// Benchmark pełnego pobierania (HTTP, limit zapytań, parsowanie) na lokalnym zastępniku DDProperty
+
+Uruchomienie z katalogu głównego repozytorium:
+    python -m benchmarks.bench_crawl
+    python -m benchmarks.bench_crawl --pages 40 --latency 0.1 --error-rate 0.05 --crawls 1 4 --json crawl.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.standin_server import StandInServer
+
+
+def run_case(server: StandInServer, crawls: int, parse_workers: int, session_pool) -> Dict:
+    """
+    // Uruchamia crawls równoległych wyszukiwań (wspólny limit zapytań) i mierzy przepustowość
+    """
+    from dd_property_scraper import DDPropertyScraper
+    from parse_pool import ParsePool
+
+    parse_pool = ParsePool(max_workers=parse_workers) if parse_workers > 1 else None
+    before = server.stats()
+    results: List[int] = []
+
+    def crawl(index: int):
+        with DDPropertyScraper(session_pool=session_pool) as scraper:
+            listings = scraper.scrape_all_pages(server.search_url(f"search=true&crawl={index}"),
+                                                parse_pool=parse_pool)
+        results.append(len(listings))
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        threads = [threading.Thread(target=crawl, args=(index,)) for index in range(crawls)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - start
+    if parse_pool is not None:
+        parse_pool.shutdown()
+
+    after = server.stats()
+    pages = after["pages_served"] - before["pages_served"]
+    errors = {status: count - before["responses"].get(status, 0)
+              for status, count in after["responses"].items() if status != 200}
+    return {
+        "name": f"crawl[{crawls} crawls, {parse_workers} parse workers]",
+        "seconds": elapsed,
+        "pages": pages,
+        "pages_per_sec": pages / elapsed if elapsed else 0.0,
+        "listings": sum(results),
+        "errors": {status: count for status, count in errors.items() if count},
+        "peak_in_flight": after["peak_in_flight"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end crawl benchmark against the local DDProperty stand-in")
+    parser.add_argument("--pages", type=int, default=20, help="result pages per search")
+    parser.add_argument("--listings", type=int, default=20, help="listings per page")
+    parser.add_argument("--latency", type=float, default=0.05, help="server latency per result page (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of result pages answered 429/5xx")
+    parser.add_argument("--rate", type=float, default=50.0, help="request rate limit (requests/s)")
+    parser.add_argument("--page-delay", type=float, default=0.0,
+                        help="pause between result pages and after the home page visit (s)")
+    parser.add_argument("--crawls", type=int, nargs="+", default=[1, 4], help="concurrent crawls per case")
+    parser.add_argument("--parse-workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    with StandInServer(total_pages=args.pages, listings_per_page=args.listings, latency=args.latency,
+                       error_rate=args.error_rate) as server:
+        # // Scraper i pula sesji czytają adres z konfiguracji przy imporcie
+        os.environ["DDPROPERTY_BASE_URL"] = server.url
+        import dd_property_scraper
+        from rate_limiter import get_limiter
+        from session_pool import SessionPool
+
+        dd_property_scraper.PAGE_DELAY_SECONDS = args.page_delay
+        dd_property_scraper.HOME_WARMUP_SECONDS = args.page_delay
+        limiter = get_limiter("ddproperty")
+        limiter.rate, limiter.burst = args.rate, max(1, int(args.rate))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            session_pool = SessionPool(cookie_file=os.path.join(tmp_dir, "cookies.json"))
+            results = [run_case(server, crawls, workers, session_pool)
+                       for crawls in args.crawls for workers in args.parse_workers]
+            session_pool.stop()
+
+    print(f"{'case':<40} {'pages/s':>9} {'pages':>6} {'listings':>9} {'peak conc.':>10}  errors")
+    for result in results:
+        print(f"{result['name']:<40} {result['pages_per_sec']:9.1f} {result['pages']:6d} "
+              f"{result['listings']:9d} {result['peak_in_flight']:10d}  {result['errors'] or '-'}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
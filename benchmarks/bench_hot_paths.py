@@ -0,0 +1,220 @@
+"""
+// Benchmark gorących ścieżek scrapera i dashboardu na zapisanych stronach wyników (bez sieci)
+
+Uruchomienie z katalogu głównego repozytorium:
+    python -m benchmarks.bench_hot_paths
+    python -m benchmarks.bench_hot_paths --min-time 0.5 --json bench.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import build_result_page, load_recorded_pages, AREAS
+from dd_property_scraper import DDPropertyScraper
+from location_service import LocationService
+from models import PropertyListing
+from parse_pool import ParsePool
+from price_history import PriceHistoryStore
+from reference_sets import ReferenceSetStore
+
+PAGE_SIZES = (1, 20, 100)
+LISTING_COUNTS = (100, 1000, 10000)
+# // Liczba stron w jednej porcji dla puli parserów
+PARSE_POOL_BATCH = 16
+# // Historia cen: ogłoszenia x przebiegi (przy ~70% zmian ceny daje ~250k obserwacji)
+PRICE_HISTORY_LISTINGS = 30000
+PRICE_HISTORY_RUNS = 12
+
+
+def bench(name: str, fn: Callable, min_time: float) -> Dict:
+    """
+    // Mierzy przepustowość (ops/s) i szczytowe zużycie pamięci pojedynczego wywołania
+    Args:
+        name: Nazwa przypadku
+        fn: Funkcja bez argumentów
+        min_time: Minimalny czas pomiaru w sekundach
+    Returns:
+        Dict: Wynik pomiaru
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        fn()  # // Rozgrzewka
+        iterations = 0
+        start = time.perf_counter()
+        while True:
+            fn()
+            iterations += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "name": name,
+        "iterations": iterations,
+        "ops_per_sec": iterations / elapsed,
+        "mean_ms": elapsed / iterations * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def make_listings(count: int, location_service: LocationService) -> List[PropertyListing]:
+    """
+    // Tworzy sparsowane ogłoszenia z syntetycznymi współrzędnymi i odległościami
+    """
+    scraper = DDPropertyScraper.parser()
+    coords_by_area = {area: coords for area, _, _, coords in AREAS}
+    listings = []
+    page = 1
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        while len(listings) < count:
+            page_listings, _ = scraper.parse_listings_html(build_result_page(min(100, count - len(listings)), page=page))
+            listings.extend(page_listings)
+            page += 1
+    for listing in listings:
+        listing.location.coordinates = coords_by_area[listing.location.area]
+        listing.location.distances = location_service.calculate_distances(listing.location.coordinates)
+    return listings
+
+
+def run(min_time: float) -> List[Dict]:
+    import streamlit as st
+    from streamlit_app import create_grid_map, create_map, sort_listings
+
+    # // Tylko parsowanie - bez sesji, puli i serwisu walut (żadnego ruchu sieciowego)
+    scraper = DDPropertyScraper.parser()
+    location_service = LocationService()
+    st.session_state['location_service'] = location_service
+    st.session_state['current_city'] = "Phuket"
+
+    pages = {f"synthetic_{size}": build_result_page(size, total_pages=25) for size in PAGE_SIZES}
+    pages.update(load_recorded_pages())
+
+    results = []
+    for page_name, html in pages.items():
+        results.append(bench(f"parse_listings_html[{page_name}]", lambda html=html: scraper.parse_listings_html(html), min_time))
+
+        _, soup = scraper.parse_listings_html(html)
+        results.append(bench(f"get_total_pages[{page_name}]", lambda soup=soup: scraper.get_total_pages(soup), min_time))
+
+        card = soup.find('div', {'class': 'listing-card'})
+        if card is not None:
+            listing_id = card.get('data-listing-id')
+            results.append(bench(
+                f"extract_image_url[{page_name}]",
+                lambda card=card, listing_id=listing_id: scraper.extract_image_url(card, listing_id),
+                min_time
+            ))
+
+    # // Przepustowość parsowania w procesach - ops/s * PARSE_POOL_BATCH = strony/s
+    batch = [build_result_page(100, total_pages=25, page=page) for page in range(1, PARSE_POOL_BATCH + 1)]
+    for workers in sorted({1, os.cpu_count() or 1}):
+        pool = ParsePool(max_workers=workers)
+        try:
+            results.append(bench(
+                f"parse_pool[{workers} workers, {PARSE_POOL_BATCH} pages]",
+                lambda pool=pool: pool.parse_many(batch),
+                min_time
+            ))
+        finally:
+            pool.shutdown()
+
+    results.append(bench(
+        "calculate_distances",
+        lambda: location_service.calculate_distances((7.8206, 98.2988)),
+        min_time
+    ))
+
+    # // Ten sam punkt jako znany centroid obszaru - odczyt z tablicy odległości zestawu
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        reference_sets = ReferenceSetStore(os.path.join(tmp_dir, "reference_sets.json"))
+        for area, district, _, coords in AREAS:
+            reference_sets.add_centroid(f"{area}, {district}", coords)
+        tabled_service = LocationService(reference_sets=reference_sets)
+        results.append(bench(
+            "calculate_distances[area table]",
+            lambda: tabled_service.calculate_distances((7.8206, 98.2988)),
+            min_time
+        ))
+
+    for count in LISTING_COUNTS:
+        listings = make_listings(count, location_service)
+        results.append(bench(f"create_map[{count}]", lambda listings=listings: create_map(listings), min_time))
+        results.append(bench(f"create_grid_map[{count}]", lambda listings=listings: create_grid_map(listings), min_time))
+        results.append(bench(
+            f"sort_listings[{count}]",
+            lambda listings=listings: sort_listings(listings, "price_low_high"),
+            min_time
+        ))
+
+    results.extend(bench_price_history(min_time))
+    return results
+
+
+def bench_price_history(min_time: float) -> List[Dict]:
+    """
+    // Zapytania o obniżki cen i historię ogłoszenia w bazie z setkami tysięcy obserwacji
+    """
+    import random
+
+    rng = random.Random(0)
+    listings = make_listings(100, LocationService())
+    listings = [listings[i % len(listings)] for i in range(PRICE_HISTORY_LISTINGS)]
+    prices = [listing.price or 20000 for listing in listings]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store = PriceHistoryStore(os.path.join(tmp_dir, "price_history.sqlite3"))
+        now = time.time()
+        for run in range(PRICE_HISTORY_RUNS):
+            batch = []
+            for i, listing in enumerate(listings):
+                if rng.random() < 0.7:
+                    prices[i] += rng.choice((-1000, -500, 500, 1000))
+                batch.append(PropertyListing(name=listing.name, price=prices[i], location=listing.location,
+                                             property_info=listing.property_info))
+                batch[-1].listing_info.id = str(i)
+            store.record(batch, seen_at=now - (PRICE_HISTORY_RUNS - run) * 2.5 * 24 * 3600)
+
+        week_ago = now - 7 * 24 * 3600
+        area = listings[0].location.area
+        observations = store.observation_count()
+        results = [
+            bench(f"price_drops[{observations} obs, 7 days, area+beds]",
+                  lambda: store.price_drops(week_ago, area=area, bedrooms=2), min_time),
+            bench(f"price_drops[{observations} obs, 7 days, top 100]",
+                  lambda: store.price_drops(week_ago, limit=100), min_time),
+            bench(f"price_history[{observations} obs, one listing]", lambda: store.history("123"), min_time),
+        ]
+        store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for scraper and dashboard hot paths")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Minimum seconds per case")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.min_time)
+
+    print(f"{'case':<45} {'ops/s':>12} {'mean ms':>10} {'peak KiB':>10}")
+    for result in results:
+        print(f"{result['name']:<45} {result['ops_per_sec']:>12.1f} {result['mean_ms']:>10.3f} {result['peak_kib']:>10.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
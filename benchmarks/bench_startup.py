@@ -0,0 +1,138 @@
+"""
+// Benchmark zimnego startu dashboardu: czas importu streamlit_app i pierwszego renderu (bez sieci)
+
+Uruchomienie z katalogu głównego repozytorium:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 9 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# // Moduły, które nie powinny być ładowane przy starcie (tylko przy pierwszym użyciu)
+HEAVY_MODULES = ("numpy", "pandas", "folium", "streamlit_folium", "curl_cffi", "PIL", "geopy", "requests")
+
+IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import streamlit_app
+elapsed = time.perf_counter() - start
+loaded = [name for name in {heavy!r} if name in sys.modules]
+print(elapsed, ",".join(loaded))
+"""
+
+FIRST_RENDER_SCRIPT = """
+import time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file({path!r}, default_timeout=60)
+app.run()
+elapsed = time.perf_counter() - start
+print(elapsed, len(app.exception))
+"""
+
+
+def run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    """
+    // Uruchamia kod w świeżym interpreterze (zimny start, bez modułów w pamięci)
+    """
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def measure_import(runs: int) -> Dict:
+    """
+    // Mediana czasu importu streamlit_app i lista ciężkich modułów załadowanych przy starcie
+    """
+    times = []
+    loaded = ""
+    for _ in range(runs):
+        output = run_python(IMPORT_SCRIPT.format(heavy=HEAVY_MODULES)).stdout.strip().splitlines()[-1]
+        elapsed, _, loaded = output.partition(" ")
+        times.append(float(elapsed))
+    return {
+        "name": "import streamlit_app",
+        "runs": runs,
+        "median_ms": statistics.median(times) * 1000,
+        "min_ms": min(times) * 1000,
+        "heavy_modules_loaded": [name for name in loaded.split(",") if name],
+    }
+
+
+def measure_first_render(runs: int) -> Dict:
+    """
+    // Mediana czasu pierwszego przebiegu skryptu aplikacji (przybliżenie czasu do pierwszego ekranu)
+    """
+    times = []
+    exceptions = 0
+    for _ in range(runs):
+        code = FIRST_RENDER_SCRIPT.format(path=os.path.join(ROOT, "streamlit_app.py"))
+        output = run_python(code).stdout.strip().splitlines()[-1]
+        elapsed, count = output.split()
+        times.append(float(elapsed))
+        exceptions += int(count)
+    return {
+        "name": "first render (AppTest)",
+        "runs": runs,
+        "median_ms": statistics.median(times) * 1000,
+        "min_ms": min(times) * 1000,
+        "exceptions": exceptions,
+    }
+
+
+def slowest_imports(limit: int) -> List[Dict]:
+    """
+    // Najdroższe importy (czas skumulowany) według python -X importtime
+    """
+    stderr = run_python("import streamlit_app", "-X", "importtime").stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append({
+            "module": module.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for the Streamlit dashboard")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    results = {
+        "import": measure_import(args.runs),
+        "first_render": measure_first_render(args.runs),
+        "slowest_imports": slowest_imports(args.top),
+    }
+
+    for key in ("import", "first_render"):
+        result = results[key]
+        print(f"{result['name']:<30} median {result['median_ms']:>8.1f} ms   min {result['min_ms']:>8.1f} ms")
+    heavy = results["import"]["heavy_modules_loaded"]
+    print(f"Heavy modules loaded at import: {', '.join(heavy) if heavy else 'none'}")
+    print(f"\n{'module':<50} {'cumulative ms':>14} {'self ms':>10}")
+    for row in results["slowest_imports"]:
+        print(f"{row['module']:<50} {row['cumulative_ms']:>14.1f} {row['self_ms']:>10.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import glob
+import json
+import os
+import random
+import zlib
+from typing import Dict, List, Tuple
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# // Obszary z przybliżonymi współrzędnymi (do syntetycznego geokodowania)
+AREAS = [
+    ("Rawai", "Muang Phuket", "Phuket", (7.7796, 98.3250)),
+    ("Chalong", "Muang Phuket", "Phuket", (7.8467, 98.3394)),
+    ("Kata", "Muang Phuket", "Phuket", (7.8206, 98.2988)),
+    ("Karon", "Muang Phuket", "Phuket", (7.8443, 98.2960)),
+    ("Patong", "Kathu", "Phuket", (7.8960, 98.2960)),
+    ("Kathu", "Kathu", "Phuket", (7.9100, 98.3330)),
+    ("Kamala", "Kathu", "Phuket", (7.9560, 98.2840)),
+    ("Cherngtalay", "Thalang", "Phuket", (8.0010, 98.3010)),
+    ("Mai Khao", "Thalang", "Phuket", (8.1560, 98.3010)),
+    ("Wichit", "Muang Phuket", "Phuket", (7.8700, 98.3750)),
+]
+CATEGORIES = ["Condominium", "Apartment", "Villa", "Townhouse", "Detached House"]
+
+
+def build_listing_record(listing_id: int, position: int, rng: random.Random) -> Tuple[Dict, Dict]:
+    """
+    // Tworzy zanonimizowany rekord ogłoszenia w formacie guruApp
+    Returns:
+        Tuple[Dict, Dict]: (element gaECListings, element listings)
+    """
+    area, district, region, _ = rng.choice(AREAS)
+    bedrooms = rng.randint(1, 4)
+    product_data = {
+        "id": listing_id,
+        "name": f"Test Residence {listing_id}, {area}, {region}",
+        "price": rng.randrange(8000, 120000, 500),
+        "district": district,
+        "region": region,
+        "area": area,
+        "districtCode": f"D{zlib.crc32(district.encode()) % 1000:03d}",
+        "regionCode": "TH83",
+        "areaCode": f"A{zlib.crc32(area.encode()) % 1000:03d}",
+        "bedrooms": bedrooms,
+        "bathrooms": max(1, bedrooms - rng.randint(0, 1)),
+        "floorArea": f"{rng.randint(25, 40) * bedrooms} sqm",
+        "category": rng.choice(CATEGORIES),
+        "position": position,
+        "dimension24": rng.choice(["featured", "standard"]),
+        "variant": "rent",
+    }
+    listing_data = {
+        "id": listing_id,
+        "urls": {"listing": {"desktop": f"/en/property/test-residence-{listing_id}"}},
+        "accountTypeCode": rng.choice(["AGENT", "OWNER"]),
+        "agent": {
+            "id": 100000 + listing_id % 997,
+            "name": f"Agent {listing_id % 997}",
+            "mobile": "+66000000000",
+            "mobilePretty": "+66 00 000 0000",
+            "lineId": f"agent{listing_id % 997}",
+            "badges": {"verification": {"startDate": "2024-01-01"}} if listing_id % 3 else {},
+            "media": {"agent": "https://cdn.example.invalid/agent.jpg"},
+        },
+    }
+    return {"productData": product_data}, listing_data
+
+
+def build_listing_card(listing_id: int, rng: random.Random) -> str:
+    """
+    // Tworzy div.listing-card z galerią obrazków jak na stronie wyników
+    """
+    images = "".join(
+        f'<img src="data:image/gif;base64,R0lGOD" data-original="https://cdn.example.invalid/{listing_id}/{n}.jpg" alt="">'
+        for n in range(rng.randint(1, 5))
+    )
+    return (
+        f'<div class="listing-card" data-listing-id="{listing_id}">'
+        f'<div class="gallery-container">{images}</div>'
+        f'<div class="listing-description"><h3>Test Residence {listing_id}</h3>'
+        f'<p>{"Lorem ipsum dolor sit amet. " * rng.randint(2, 6)}</p></div>'
+        f'</div>'
+    )
+
+
+def build_result_page(listing_count: int, total_pages: int = 1, page: int = 1, seed: int = 0) -> str:
+    """
+    // Buduje stronę wyników w formacie DDProperty (skrypt guruApp, paginacja, karty ogłoszeń)
+    Args:
+        listing_count: Liczba ogłoszeń na stronie
+        total_pages: Liczba stron w paginacji
+        page: Numer bieżącej strony
+        seed: Ziarno generatora (ta sama wartość daje tę samą stronę)
+    Returns:
+        str: HTML strony
+    """
+    rng = random.Random(seed * 100003 + page)
+    first_id = 9000000 + (page - 1) * listing_count
+    ga_listings, listings, cards = [], [], []
+    for position in range(listing_count):
+        listing_id = first_id + position
+        product, listing = build_listing_record(listing_id, position + 1, rng)
+        ga_listings.append(product)
+        listings.append(listing)
+        cards.append(build_listing_card(listing_id, rng))
+
+    guru_app = {
+        "listingResultsWidget": {
+            "gaECListings": ga_listings,
+            "listings": listings,
+            "paginationData": {"currentPage": page, "totalPages": total_pages},
+        }
+    }
+    pagination = "".join(
+        f'<a href="/en/property-for-rent/{n}" data-page="{n}">{n}</a>'
+        for n in range(max(1, page - 2), min(total_pages, page + 4) + 1)
+    )
+    if total_pages > page + 4:
+        pagination += f'<a href="/en/property-for-rent/{total_pages}" data-page="{total_pages}">{total_pages}</a>'
+
+    return (
+        "<!DOCTYPE html><html><head><title>Property for rent</title>"
+        '<script type="text/javascript">window.dataLayer = [];</script>'
+        '<script type="text/javascript">var guruApp = '
+        f"{json.dumps(guru_app)};</script>"
+        "</head><body>"
+        f'<div class="listing-widget">{"".join(cards)}</div>'
+        f'<div class="listing-pagination">{pagination}</div>'
+        "</body></html>"
+    )
+
+
+def load_recorded_pages() -> Dict[str, str]:
+    """
+    // Wczytuje zapisane (zanonimizowane) strony wyników z benchmarks/fixtures/*.html
+    """
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, "r", encoding="utf-8") as f:
+            pages[os.path.splitext(os.path.basename(path))[0]] = f.read()
+    return pages
+
+
+def area_coordinates() -> List[Tuple[str, Tuple[float, float]]]:
+    return [(area, coords) for area, _, _, coords in AREAS]
@@ -0,0 +1,208 @@
+"""
+// Lokalny zastępnik DDProperty do testów obciążeniowych scrapera bez sieci.
+// Serwuje syntetyczne strony wyników (benchmarks/fixtures.py) z opóźnieniem i błędami na żądanie.
+
+Uruchomienie z katalogu głównego repozytorium:
+    python -m benchmarks.standin_server --pages 50 --listings 20 --latency 0.2 --error-rate 0.05
+    DDPROPERTY_BASE_URL=http://127.0.0.1:8765 streamlit run streamlit_app.py
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Optional, Sequence
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fixtures import build_result_page
+
+# // /en/property-for-rent, /en/property-for-rent/3 (z dowolnymi parametrami zapytania)
+RESULTS_PATH = re.compile(r"^/en/property-for-rent(?:/(\d+))?/?$")
+ERROR_STATUSES = (429, 500, 502, 503)
+HOME_PAGE = "<!DOCTYPE html><html><head><title>DDproperty stand-in</title></head><body></body></html>"
+
+
+class StandInServer:
+    """
+    // Serwer HTTP w wątku w tle. Parametry (opóźnienie, odsetek błędów) można zmieniać w trakcie
+    // działania; fail_next() wymusza konkretne błędy dla najbliższych zapytań o strony wyników.
+    """
+
+    def __init__(self, total_pages: int = 25, listings_per_page: int = 20, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, error_statuses: Sequence[int] = ERROR_STATUSES,
+                 retry_after: int = 1, seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.total_pages = total_pages
+        self.listings_per_page = listings_per_page
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.retry_after = retry_after
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._forced: Deque[int] = deque()
+        # // Statystyki: odpowiedzi według statusu, obsłużone strony, szczytowa liczba równoległych zapytań
+        self.responses: Counter = Counter()
+        self.pages_served: Counter = Counter()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def search_url(self, query: str = "search=true") -> str:
+        return f"{self.url}/en/property-for-rent?{query}"
+
+    def fail_next(self, count: int = 1, status: int = 503):
+        """
+        // Kolejne count zapytań o strony wyników dostanie podany status
+        """
+        with self._lock:
+            self._forced.extend([status] * count)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "responses": dict(self.responses),
+                "pages_served": sum(self.pages_served.values()),
+                "peak_in_flight": self.peak_in_flight,
+            }
+
+    @lru_cache(maxsize=1024)
+    def page_html(self, page: int) -> bytes:
+        return build_result_page(self.listings_per_page, total_pages=self.total_pages, page=page,
+                                 seed=self.seed).encode("utf-8")
+
+    def _pick_status(self) -> int:
+        # // Status dla strony wyników: wymuszony, losowy błąd albo 200
+        with self._lock:
+            if self._forced:
+                return self._forced.popleft()
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return self._rng.choice(self.error_statuses)
+            return 200
+
+    def _delay(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency + (self._rng.uniform(-self.jitter, self.jitter) if self.jitter else 0.0))
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_body(self, status: int, body: bytes, headers: Optional[Dict[str, str]] = None):
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.responses[status] += 1
+
+            def do_GET(self):
+                with server._lock:
+                    server.in_flight += 1
+                    server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+                try:
+                    self.route()
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def route(self):
+                path = urlsplit(self.path).path
+                if path in ("", "/"):
+                    self.send_body(200, HOME_PAGE.encode("utf-8"), {"Set-Cookie": "PHPSESSID=standin; Path=/"})
+                    return
+
+                match = RESULTS_PATH.match(path)
+                if match is None:
+                    self.send_body(404, b"Not found")
+                    return
+
+                time.sleep(server._delay())
+                status = server._pick_status()
+                if status != 200:
+                    headers = {"Retry-After": str(server.retry_after)} if status == 429 else None
+                    self.send_body(status, f"Stand-in error {status}".encode("utf-8"), headers)
+                    return
+
+                page = int(match.group(1) or 1)
+                if page > server.total_pages:
+                    self.send_body(404, b"No such page")
+                    return
+                self.send_body(200, server.page_html(page))
+                with server._lock:
+                    server.pages_served[page] += 1
+
+        return Handler
+
+    def start(self) -> "StandInServer":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._httpd.serve_forever, name="standin-server", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local DDProperty stand-in serving synthetic result pages")
+    parser.add_argument("--pages", type=int, default=25, help="total result pages per search")
+    parser.add_argument("--listings", type=int, default=20, help="listings per result page")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every result page")
+    parser.add_argument("--jitter", type=float, default=0.0, help="+/- random seconds on top of latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of result pages answered with an error")
+    parser.add_argument("--error-statuses", type=int, nargs="+", default=list(ERROR_STATUSES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    server = StandInServer(
+        total_pages=args.pages, listings_per_page=args.listings, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, error_statuses=args.error_statuses, seed=args.seed,
+        host=args.host, port=args.port
+    )
+    print(f"Serving DDProperty stand-in at {server.url}")
+    print(f"Point the scraper at it with: DDPROPERTY_BASE_URL={server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+        print(f"Stats: {server.stats()}")
+
+
+if __name__ == "__main__":
+    main()
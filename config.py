@@ -0,0 +1,34 @@
+import os
+
+# // Katalog na lokalne pliki cache (kursy walut, sesje, snapshoty)
+CACHE_DIR = os.environ.get(
+    "DDPROPERTY_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+)
+
+
+def cache_path(*parts: str) -> str:
+    """
+    // Zwraca ścieżkę w katalogu cache, tworząc brakujące katalogi
+    Args:
+        parts: Kolejne segmenty ścieżki względem CACHE_DIR
+    Returns:
+        str: Pełna ścieżka do pliku
+    """
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+# // Ustawienia połączenia z DDProperty (wspólne dla scrapera i puli sesji).
+# // Adres można nadpisać, np. lokalnym zastępnikiem z benchmarks/standin_server.py
+DDPROPERTY_BASE_URL = os.environ.get("DDPROPERTY_BASE_URL", "https://www.ddproperty.com").rstrip("/")
+DDPROPERTY_IMPERSONATE = "chrome110"
+DDPROPERTY_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Referer': 'https://www.ddproperty.com/',
+    'Origin': 'https://www.ddproperty.com',
+    'Connection': 'keep-alive'
+}
@@ -0,0 +1,55 @@
+import threading
+from typing import Callable, List, Optional
+import pytest
+from models import PropertyListing
+
+
+class FakeScraper:
+    """
+    // Zastępuje DDPropertyScraper w testach wyszukiwań w tle, shardów i harmonogramu.
+    // pages_for(base_url) zwraca kolejne strony wyników (listy ogłoszeń) albo None - awarię,
+    // po której (jak prawdziwy scraper) rośnie fetch_errors, a wynik jest pusty.
+    """
+
+    def __init__(self, pages_for: Callable[[str], Optional[List[List[PropertyListing]]]],
+                 release_page: Optional[threading.Event] = None):
+        self.pages_for = pages_for
+        self.release_page = release_page
+        self.fetch_errors = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def scrape_all_pages(self, base_url, max_pages=None, deduplicator=None, on_page=None, stop_event=None,
+                         parse_pool=None, keep_listings=True) -> List[PropertyListing]:
+        pages = self.pages_for(base_url)
+        if pages is None:
+            self.fetch_errors += 1
+            return []
+        collected = []
+        for page, listings in enumerate(pages, 1):
+            if (max_pages and page > max_pages) or (stop_event is not None and stop_event.is_set()):
+                break
+            if keep_listings:
+                collected.extend(listings)
+            if on_page is not None:
+                on_page(page, len(pages), listings)
+            # // Zadanie czeka po stronie, aż test pozwoli mu iść dalej
+            if self.release_page is not None:
+                self.release_page.wait()
+        return collected
+
+
+@pytest.fixture
+def fake_scraper():
+    """
+    // Fabryka klas-zastępstw scrapera: fake_scraper(pages_for, release_page=None) zwraca
+    // wywoływalną fabrykę (jako scraper_factory albo w miejsce DDPropertyScraper)
+    """
+    def make(pages_for, release_page=None):
+        return lambda *args, **kwargs: FakeScraper(pages_for, release_page)
+
+    return make
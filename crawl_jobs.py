@@ -0,0 +1,228 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Optional
+from models import PropertyListing
+import metrics
+
+# // Liczba wyszukiwań wykonywanych jednocześnie (kolejne czekają w kolejce)
+MAX_CRAWL_WORKERS = 2
+# // Liczba zakończonych zadań trzymanych w pamięci (do odczytu wyników przez UI)
+MAX_FINISHED_JOBS = 50
+
+CRAWL_JOBS = metrics.REGISTRY.counter(
+    "crawl_jobs_total", "Background crawl jobs by final status (done, failed, cancelled)")
+
+FINISHED_STATUSES = ('done', 'failed', 'cancelled')
+
+
+@dataclass
+class CrawlJob:
+    """
+    // Wyszukiwanie wykonywane w tle. UI odczytuje postęp i częściowe wyniki,
+    // worker dopisuje ogłoszenia po każdej stronie.
+    """
+    id: str
+    base_url: str
+    max_pages: Optional[int] = None
+    enrich_details: bool = False
+    key: Optional[Hashable] = None
+    # // Parametry wyszukiwania dzielonego na shardy (None - zwykłe przechodzenie stron base_url)
+    sharded_params: Optional[dict] = None
+    city: str = "Phuket"
+    # // queued, running, enriching, done, failed, cancelled
+    status: str = 'queued'
+    page: int = 0
+    total_pages: Optional[int] = None
+    listings: List[PropertyListing] = field(default_factory=list)
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    stop_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def progress(self) -> float:
+        """
+        // Postęp 0..1 według pobranych stron (limit stron lub liczba stron wyników)
+        """
+        if self.finished:
+            return 1.0
+        pages = min(filter(None, (self.max_pages, self.total_pages)), default=None)
+        return min(self.page / pages, 1.0) if pages else 0.0
+
+    def snapshot(self) -> List[PropertyListing]:
+        """
+        // Kopia listy ogłoszeń zebranych do tej pory (bezpieczna przy równoległym dopisywaniu)
+        """
+        return list(self.listings)
+
+    def cancel(self):
+        self.stop_event.set()
+
+
+class CrawlWorker:
+    """
+    // Wykonuje wyszukiwania w wątkach w tle, niezależnie od przebiegów skryptu Streamlit.
+    // Identyczne wyszukiwania (ten sam klucz) zlecone w trakcie trwania są łączone w jedno zadanie.
+    """
+
+    def __init__(self, max_workers: int = MAX_CRAWL_WORKERS, max_finished: int = MAX_FINISHED_JOBS,
+                 price_history=None):
+        self.max_workers = max_workers
+        self.max_finished = max_finished
+        # // Historia cen (domyślnie współdzielona w procesie, z price_history.get_price_history)
+        self.price_history = price_history
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crawl")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, CrawlJob] = {}
+
+    def submit(self, base_url: str, location_service, max_pages: Optional[int] = None,
+               enrich_details: bool = False, key: Optional[Hashable] = None,
+               sharded_params: Optional[dict] = None, city: str = "Phuket") -> CrawlJob:
+        """
+        // Dodaje wyszukiwanie do kolejki
+        Args:
+            base_url: URL pierwszej strony wyników
+            location_service: LocationService sesji - zadanie liczy odległości na jego kopii z chwili zlecenia
+            max_pages: Maksymalna liczba stron (None dla wszystkich)
+            enrich_details: Czy pobrać strony szczegółów ogłoszeń
+            key: Klucz wyszukiwania - trwające zadanie o tym samym kluczu jest zwracane zamiast nowego
+            sharded_params: Parametry wyszukiwania, jeśli ma być podzielone na równoległe shardy
+            city: Miasto wyszukiwania (dla shardów)
+        Returns:
+            CrawlJob: Zadanie (nowe lub już trwające)
+        """
+        with self._lock:
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key == key and not job.finished:
+                        return job
+            job = CrawlJob(
+                id=uuid.uuid4().hex[:12],
+                base_url=base_url,
+                max_pages=max_pages,
+                enrich_details=enrich_details,
+                key=key,
+                sharded_params=sharded_params,
+                city=city
+            )
+            self._jobs[job.id] = job
+            self._prune()
+        # // Punkty referencyjne z chwili zlecenia - UI może je zmieniać w trakcie wyszukiwania
+        self._executor.submit(self._run, job, location_service.copy())
+        return job
+
+    def get(self, job_id: str) -> Optional[CrawlJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[CrawlJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _prune(self):
+        # // Usuwa najstarsze zakończone zadania ponad limit (wywoływane pod blokadą)
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+
+    def _run(self, job: CrawlJob, location_service):
+        """
+        // Wykonuje wyszukiwanie: strony wyników, odległości po każdej stronie, opcjonalnie szczegóły
+        """
+        from dd_property_scraper import DDPropertyScraper
+        from detail_enricher import DetailEnricher
+        from parse_pool import get_parse_pool, parse_workers_for
+        from search_sharding import ShardedSearch
+
+        if job.stop_event.is_set():
+            self._finish(job, 'cancelled')
+            return
+
+        job.status = 'running'
+        job.started_at = time.time()
+
+        def on_page(page: int, total_pages: Optional[int], new_listings: List[PropertyListing]):
+            # // Ze stronami szczegółów odległości są liczone po ich pobraniu - dokładne współrzędne
+            # // zastępują geokodowanie (Nominatim, 1 zapytanie/s)
+            if not job.enrich_details:
+                for listing in new_listings:
+                    location_service.get_location_details(listing)
+            job.listings.extend(new_listings)
+            job.total_pages = total_pages
+            job.page = page
+
+        try:
+            if job.sharded_params is not None:
+                # // Shardy mają własne scrapery (każdy z sesją z puli)
+                ShardedSearch(job.sharded_params, job.city).run(on_page=on_page, stop_event=job.stop_event)
+            else:
+                # // Scraper bierze rozgrzaną sesję z puli i oddaje ją po zakończeniu
+                with DDPropertyScraper() as scraper:
+                    # // Na maszynie z wieloma rdzeniami strony są parsowane w procesach parsera
+                    # // (po jednym na równoległe wyszukiwanie)
+                    parse_workers = parse_workers_for(self.max_workers)
+                    parse_pool = get_parse_pool(parse_workers) if parse_workers > 1 else None
+                    scraper.scrape_all_pages(job.base_url, max_pages=job.max_pages, on_page=on_page,
+                                             stop_event=job.stop_event, parse_pool=parse_pool)
+
+            # // Opcjonalnie pobierz strony szczegółów (dokładne współrzędne zamiast geokodowania)
+            if job.enrich_details and job.listings:
+                if not job.stop_event.is_set():
+                    job.status = 'enriching'
+                    with DDPropertyScraper() as scraper:
+                        enriched = DetailEnricher(scraper).enrich(job.listings)
+                    print(f"Enriched {enriched} of {len(job.listings)} listings with detail pages")
+                # // Geokodowane są tylko ogłoszenia bez dokładnych współrzędnych
+                for listing in job.listings:
+                    location_service.get_location_details(listing)
+
+            self._record_prices(job)
+            self._finish(job, 'cancelled' if job.stop_event.is_set() else 'done')
+        except Exception as e:
+            job.error = f"Error crawling {job.base_url}: {str(e)}"
+            print(job.error)
+            self._finish(job, 'failed')
+
+    def _record_prices(self, job: CrawlJob):
+        # // Ceny trafiają do historii cen (zapisywane są tylko zmiany); błąd zapisu nie przerywa wyszukiwania
+        if not job.listings:
+            return
+        try:
+            price_history = self.price_history
+            if price_history is None:
+                from price_history import get_price_history
+                price_history = get_price_history()
+            price_history.record(job.listings)
+        except Exception as e:
+            print(f"Error recording price history: {str(e)}")
+
+    def _finish(self, job: CrawlJob, status: str):
+        job.finished_at = time.time()
+        job.status = status
+        CRAWL_JOBS.inc(status=status)
+
+
+_crawl_worker: Optional[CrawlWorker] = None
+_crawl_worker_lock = threading.Lock()
+
+
+def get_crawl_worker() -> CrawlWorker:
+    """
+    // Zwraca współdzielony w procesie worker wyszukiwań
+    """
+    global _crawl_worker
+    with _crawl_worker_lock:
+        if _crawl_worker is None:
+            _crawl_worker = CrawlWorker()
+            # // Wyszukiwania z dashboardu korzystają z puli rozgrzanych sesji - tylko tu jest ona odświeżana w tle
+            from session_pool import get_session_pool
+            get_session_pool().start()
+        return _crawl_worker
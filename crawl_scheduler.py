@@ -0,0 +1,362 @@
+import argparse
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+from config import cache_path
+from models import PropertyListing
+import metrics
+
+# // Granice interwału odświeżania pojedynczego wyszukiwania
+MIN_INTERVAL_SECONDS = 15 * 60
+MAX_INTERVAL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_INTERVAL_SECONDS = 6 * 60 * 60
+# // Docelowa liczba nowych/zmienionych ogłoszeń na przebieg - interwał jest dobierany pod nią
+TARGET_CHANGES_PER_RUN = 5
+# // Waga ostatniego przebiegu w średniej kroczącej tempa zmian
+CHANGE_RATE_ALPHA = 0.3
+# // Globalny budżet stron wyników na godzinę dla wszystkich zaplanowanych wyszukiwań
+REQUEST_BUDGET_PER_HOUR = 120
+# // Maksymalny czas uśpienia demona między sprawdzeniami kolejki
+POLL_SECONDS = 60
+SCHEDULE_VERSION = 1
+
+SCHEDULED_RUNS = metrics.REGISTRY.counter(
+    "ddproperty_scheduled_runs_total", "Scheduled search runs by outcome (ok, failed)")
+SCHEDULED_CHANGES = metrics.REGISTRY.histogram(
+    "ddproperty_scheduled_run_changes", "New or changed listings found per scheduled run",
+    buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250))
+
+
+def listing_fingerprint(listing: PropertyListing) -> str:
+    # // Zmiana ceny lub statusu liczy się jako zmiana ogłoszenia
+    return f"{listing.price}|{listing.listing_info.status}"
+
+
+@dataclass
+class ScheduledSearch:
+    """
+    // Powtarzane wyszukiwanie z obserwowanym tempem zmian i własnym interwałem
+    """
+    name: str
+    params: dict
+    city: str = "Phuket"
+    max_pages: Optional[int] = None
+    # // Interwał wynikający z tempa zmian (przed rozciągnięciem przez budżet)
+    interval: float = DEFAULT_INTERVAL_SECONDS
+    next_run: float = 0.0
+    last_run: Optional[float] = None
+    runs: int = 0
+    # // Średnia krocząca: zmienione ogłoszenia na godzinę i strony na przebieg
+    change_rate: Optional[float] = None
+    pages_per_run: float = 1.0
+    last_changes: Optional[int] = None
+    last_error: Optional[str] = None
+    # // ID ogłoszenia -> odcisk (cena, status) z ostatniego przebiegu
+    fingerprints: Dict[str, str] = field(default_factory=dict, repr=False)
+
+
+class CrawlScheduler:
+    """
+    // Demon odświeżający zapisane wyszukiwania. Wyszukiwania z dużą liczbą zmian są
+    // pobierane częściej, spokojne rzadziej, a łączna liczba stron na godzinę mieści się
+    // w budżecie. Stan (kolejka, tempo zmian, odciski ogłoszeń) jest zapisywany na dysk.
+    // Wyszukiwania są pobierane w trybie niskiej pamięci - on_results dostaje ogłoszenia
+    // strona po stronie, a w pamięci zostają tylko ich odciski.
+    """
+
+    def __init__(self, state_file: Optional[str] = None, request_budget: float = REQUEST_BUDGET_PER_HOUR,
+                 scraper_factory: Optional[Callable] = None,
+                 on_results: Optional[Callable[[ScheduledSearch, List[PropertyListing]], None]] = None,
+                 clock: Callable[[], float] = time.time):
+        self.state_file = state_file or cache_path("crawl_schedule.json")
+        self.request_budget = request_budget
+        self.scraper_factory = scraper_factory
+        self.on_results = on_results
+        self.clock = clock
+        self.searches: Dict[str, ScheduledSearch] = {}
+        self._lock = threading.RLock()
+        self._thread: Optional[threading.Thread] = None
+        self._load()
+
+    def _load(self):
+        """
+        // Wczytuje stan harmonogramu z pliku (jeśli istnieje)
+        """
+        try:
+            if not os.path.exists(self.state_file):
+                return
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != SCHEDULE_VERSION:
+                print(f"Ignoring crawl schedule with unsupported version {data.get('version')}")
+                return
+            self.searches = {item['name']: ScheduledSearch(**item) for item in data.get('searches', [])}
+        except Exception as e:
+            print(f"Error loading crawl schedule: {str(e)}")
+
+    def _save(self):
+        """
+        // Zapisuje stan harmonogramu (zapis atomowy przez plik tymczasowy)
+        """
+        try:
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': SCHEDULE_VERSION,
+                    'searches': [asdict(search) for search in self.searches.values()]
+                }, f)
+            os.replace(tmp_file, self.state_file)
+        except Exception as e:
+            print(f"Error saving crawl schedule: {str(e)}")
+
+    def add_search(self, name: str, params: dict, city: str = "Phuket", max_pages: Optional[int] = None,
+                   interval: float = DEFAULT_INTERVAL_SECONDS) -> ScheduledSearch:
+        """
+        // Dodaje (lub zastępuje) wyszukiwanie; pierwszy przebieg jest od razu w kolejce
+        Args:
+            name: Unikalna nazwa wyszukiwania
+            params: Parametry wyszukiwania (jak w search_sharding.build_search_url)
+            city: Miasto wyszukiwania
+            max_pages: Maksymalna liczba stron na przebieg (None dla wszystkich)
+            interval: Początkowy interwał odświeżania w sekundach
+        Returns:
+            ScheduledSearch: Zaplanowane wyszukiwanie
+        """
+        with self._lock:
+            search = ScheduledSearch(name=name, params=params, city=city, max_pages=max_pages,
+                                     interval=interval, next_run=self.clock())
+            self.searches[name] = search
+            self._reschedule()
+            self._save()
+            return search
+
+    def remove_search(self, name: str) -> bool:
+        with self._lock:
+            removed = self.searches.pop(name, None) is not None
+            if removed:
+                self._reschedule()
+                self._save()
+            return removed
+
+    @property
+    def budget_scale(self) -> float:
+        """
+        // Współczynnik rozciągnięcia interwałów (1.0 - budżet wystarcza na interwały z tempa zmian)
+        """
+        demand = sum(search.pages_per_run * 3600 / search.interval for search in self.searches.values())
+        return max(1.0, demand / self.request_budget) if self.request_budget > 0 else 1.0
+
+    def _reschedule(self):
+        # // Przelicza terminy po zmianie interwałów lub zapotrzebowania na budżet
+        scale = self.budget_scale
+        for search in self.searches.values():
+            if search.last_run is not None:
+                search.next_run = search.last_run + search.interval * scale
+
+    def queue(self) -> List[ScheduledSearch]:
+        """
+        // Zwraca wyszukiwania w kolejności następnego uruchomienia
+        """
+        with self._lock:
+            return sorted(self.searches.values(), key=lambda search: search.next_run)
+
+    def due(self) -> List[ScheduledSearch]:
+        now = self.clock()
+        return [search for search in self.queue() if search.next_run <= now]
+
+    def _new_scraper(self):
+        if self.scraper_factory is not None:
+            return self.scraper_factory()
+        from dd_property_scraper import DDPropertyScraper
+        return DDPropertyScraper()
+
+    def run_search(self, search: ScheduledSearch) -> Optional[int]:
+        """
+        // Wykonuje jeden przebieg wyszukiwania i dostosowuje jego interwał
+        Args:
+            search: Zaplanowane wyszukiwanie
+        Returns:
+            Optional[int]: Liczba nowych lub zmienionych ogłoszeń (None przy błędzie)
+        """
+        from search_sharding import build_search_url
+
+        pages = []
+        fingerprints: Dict[str, str] = {}
+
+        def on_page(page: int, total_pages: Optional[int], new_listings: List[PropertyListing]):
+            # // Tryb niskiej pamięci: ze strony zostają tylko odciski, ogłoszenia idą od razu do on_results
+            pages.append(page)
+            for listing in new_listings:
+                if listing.listing_info.id is not None:
+                    fingerprints[str(listing.listing_info.id)] = listing_fingerprint(listing)
+            if self.on_results is not None and new_listings:
+                try:
+                    self.on_results(search, new_listings)
+                except Exception as e:
+                    print(f"Error handling results of scheduled search '{search.name}': {str(e)}")
+
+        try:
+            with self._new_scraper() as scraper:
+                scraper.scrape_all_pages(
+                    build_search_url(search.params, search.city),
+                    max_pages=search.max_pages,
+                    on_page=on_page,
+                    keep_listings=False
+                )
+                fetch_errors = scraper.fetch_errors
+        except Exception as e:
+            self._record_failure(search, str(e))
+            return None
+
+        # // scrape_all_pages nie rzuca przy 429/5xx/błędzie sieci - zwraca to, co zdążył pobrać.
+        # // Taki przebieg nie jest porównywany z poprzednim (zachowuje odciski i interwał)
+        if fetch_errors or (not fingerprints and search.fingerprints):
+            self._record_failure(search, f"{fetch_errors} result pages failed, {len(fingerprints)} listings fetched")
+            return None
+
+        with self._lock:
+            changes = self._record_run(search, fingerprints, len(pages))
+            self._reschedule()
+            self._save()
+        SCHEDULED_RUNS.inc(outcome='ok')
+        SCHEDULED_CHANGES.observe(changes)
+        print(f"Scheduled search '{search.name}': {changes} new or changed of {len(fingerprints)} listings, "
+              f"next run in {(search.next_run - self.clock()) / 60:.0f} min")
+        return changes
+
+    def _record_failure(self, search: ScheduledSearch, error: str):
+        # // Nieudany przebieg: termin według dotychczasowego interwału, odciski bez zmian
+        with self._lock:
+            search.last_error = error
+            search.last_run = self.clock()
+            self._reschedule()
+            self._save()
+        SCHEDULED_RUNS.inc(outcome='failed')
+        print(f"Scheduled search '{search.name}' failed: {error}")
+
+    def _record_run(self, search: ScheduledSearch, fingerprints: Dict[str, str], pages: int) -> int:
+        """
+        // Porównuje odciski ogłoszeń z poprzednim przebiegiem i wylicza nowy interwał (wywoływane pod blokadą)
+        """
+        now = self.clock()
+        changes = sum(1 for listing_id, fingerprint in fingerprints.items()
+                      if search.fingerprints.get(listing_id) != fingerprint)
+
+        # // Pierwszy przebieg tylko ustala stan odniesienia - wszystko byłoby "nowe"
+        if search.last_run is not None and search.last_error is None:
+            hours = max(now - search.last_run, 1.0) / 3600
+            rate = changes / hours
+            if search.change_rate is None:
+                search.change_rate = rate
+            else:
+                search.change_rate = CHANGE_RATE_ALPHA * rate + (1 - CHANGE_RATE_ALPHA) * search.change_rate
+            if search.change_rate > 0:
+                interval = TARGET_CHANGES_PER_RUN / search.change_rate * 3600
+            else:
+                interval = search.interval * 2  # // Brak zmian - wydłuż interwał
+            search.interval = min(MAX_INTERVAL_SECONDS, max(MIN_INTERVAL_SECONDS, interval))
+
+        search.pages_per_run = (pages if search.runs == 0
+                                else CHANGE_RATE_ALPHA * pages + (1 - CHANGE_RATE_ALPHA) * search.pages_per_run)
+        search.pages_per_run = max(search.pages_per_run, 1.0)
+        search.fingerprints = fingerprints
+        search.last_changes = changes
+        search.last_error = None
+        search.last_run = now
+        search.runs += 1
+        return changes
+
+    def run_due(self) -> int:
+        """
+        // Wykonuje wszystkie wyszukiwania, których termin minął
+        Returns:
+            int: Liczba wykonanych przebiegów
+        """
+        due = self.due()
+        for search in due:
+            self.run_search(search)
+        return len(due)
+
+    def run_forever(self, stop_event: Optional[threading.Event] = None):
+        """
+        // Pętla demona: wykonuje zaległe wyszukiwania i śpi do najbliższego terminu
+        """
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            self.run_due()
+            queue = self.queue()
+            wait = queue[0].next_run - self.clock() if queue else POLL_SECONDS
+            stop_event.wait(min(max(wait, 0.0), POLL_SECONDS))
+
+    def start(self, stop_event: Optional[threading.Event] = None) -> threading.Thread:
+        """
+        // Uruchamia demona w wątku w tle (jeśli jeszcze nie działa)
+        """
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.run_forever, args=(stop_event,),
+                                                name="crawl-scheduler", daemon=True)
+                self._thread.start()
+            return self._thread
+
+
+def print_queue(scheduler: CrawlScheduler):
+    now = scheduler.clock()
+    print(f"Budget: {scheduler.request_budget:g} pages/h, interval scale x{scheduler.budget_scale:.2f}")
+    for search in scheduler.queue():
+        rate = f"{search.change_rate:.2f}/h" if search.change_rate is not None else "-"
+        print(f"{max(search.next_run - now, 0) / 60:8.0f} min  {search.name:<24} "
+              f"interval {search.interval / 3600:6.2f} h  changes {rate:>8}  pages/run {search.pages_per_run:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive scheduler for recurring DDProperty searches")
+    parser.add_argument("--budget", type=float, default=REQUEST_BUDGET_PER_HOUR,
+                        help="result pages per hour across all searches")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="schedule a search")
+    add.add_argument("name")
+    add.add_argument("--city", default="Phuket")
+    add.add_argument("--min-price", type=int)
+    add.add_argument("--max-price", type=int)
+    add.add_argument("--bedrooms", nargs="*")
+    add.add_argument("--property-types", nargs="*")
+    add.add_argument("--max-pages", type=int)
+
+    remove = commands.add_parser("remove", help="remove a scheduled search")
+    remove.add_argument("name")
+    commands.add_parser("queue", help="show the next-run queue")
+    commands.add_parser("run", help="run the scheduler daemon")
+    args = parser.parse_args()
+
+    from price_history import get_price_history
+    scheduler = CrawlScheduler(request_budget=args.budget,
+                               on_results=lambda search, listings: get_price_history().record(listings))
+    if args.command == "add":
+        params = {
+            "min_price": args.min_price,
+            "max_price": args.max_price,
+            "bedrooms": args.bedrooms,
+            "property_types": args.property_types
+        }
+        scheduler.add_search(args.name, {k: v for k, v in params.items() if v}, city=args.city,
+                             max_pages=args.max_pages)
+        print_queue(scheduler)
+    elif args.command == "remove":
+        if not scheduler.remove_search(args.name):
+            print(f"No scheduled search named '{args.name}'")
+    elif args.command == "queue":
+        print_queue(scheduler)
+    else:
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
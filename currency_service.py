@@ -1,37 +1,464 @@
-from decimal import Decimal
-import requests
+from datetime import date, datetime, timedelta
+from decimal import Decimal, ROUND_HALF_EVEN, ROUND_HALF_UP
+import json
+import os
+import threading
 import time
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Dict, Iterable, List, Union, TYPE_CHECKING
+from config import cache_path
+
+# // numpy, pandas i requests są importowane przy pierwszym użyciu (szybszy start dashboardu)
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# // Tabela A NBP zawiera średnie kursy wszystkich obsługiwanych walut względem PLN
+NBP_TABLE_URL = "https://api.nbp.pl/api/exchangerates/tables/a/"
+# // Kursy z zakresu dat; NBP pozwala na maksymalnie 367 dni w jednym zapytaniu
+NBP_RANGE_URL = "https://api.nbp.pl/api/exchangerates/rates/a/{code}/{start}/{end}/"
+NBP_MAX_RANGE_DAYS = 367
+# // Domyślne kursy (PLN za jednostkę waluty) używane gdy nie ma cache ani połączenia
+DEFAULT_PLN_RATES = {
+    'THB': Decimal('0.1179'),
+    'EUR': Decimal('4.2700'),
+    'USD': Decimal('3.9500'),
+}
+DEFAULT_THB_TO_PLN = DEFAULT_PLN_RATES['THB']
+# // Waluty docelowe dostępne w konwersji z THB
+SUPPORTED_CURRENCIES = ('PLN', 'EUR', 'USD')
+# // NBP publikuje tabelę A raz dziennie, więc kilka godzin świeżości wystarczy
+RATE_TTL_SECONDS = 6 * 60 * 60
+# // Po nieudanym pobraniu kolejne odświeżanie w tle dopiero po tym czasie (nie przy każdym nowym serwisie)
+RETRY_AFTER_FAILURE_SECONDS = 10 * 60
+REQUEST_TIMEOUT = 5
+# // Reguła zaokrąglania wspólna dla convert_to_pln i convert_many: kurs zaokrąglony do RATE_SCALE
+# // miejsc (NBP publikuje 4), kwota * kurs liczona dokładnie, wynik do pełnych groszy (połówki w górę)
+RATE_SCALE = 8
+CENT = Decimal('0.01')
+# // Większe iloczyny (kwota * kurs w jednostkach 10^-RATE_SCALE) nie mieszczą się w int64
+MAX_SCALED_PRODUCT = 2 ** 62
+
+
+class RateCache:
+    """
+    // Współdzielony w obrębie procesu cache kursów wymiany z TTL.
+    // Stan jest zapisywany na dysk, żeby nowe procesy startowały z ostatnim znanym kursem.
+    """
+
+    def __init__(self, cache_file: str, ttl: int = RATE_TTL_SECONDS,
+                 retry_after: int = RETRY_AFTER_FAILURE_SECONDS):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.retry_after = retry_after
+        # // Czas ostatniego nieudanego odświeżania (tylko w pamięci procesu)
+        self.last_failure: Optional[float] = None
+        self._lock = threading.Lock()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self.rates: Dict[str, Decimal] = {}
+        self.last_update: Optional[float] = None
+        self._load()
+
+    def _load(self):
+        """
+        // Wczytuje kursy z pliku cache (jeśli istnieje)
+        """
+        try:
+            if not os.path.exists(self.cache_file):
+                return
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.rates = {code: Decimal(value) for code, value in data.get('rates', {}).items()}
+            self.last_update = data.get('last_update')
+        except Exception as e:
+            print(f"Error loading exchange rate cache: {str(e)}")
+
+    def _save(self):
+        """
+        // Zapisuje kursy do pliku cache (zapis atomowy przez plik tymczasowy)
+        """
+        try:
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'rates': {code: str(value) for code, value in self.rates.items()},
+                    'last_update': self.last_update
+                }, f)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"Error saving exchange rate cache: {str(e)}")
+
+    def get(self, currency: str) -> Optional[Decimal]:
+        return self.rates.get(currency)
+
+    def update(self, rates: Dict[str, Decimal]):
+        """
+        // Aktualizuje kursy i zapisuje je na dysk
+        """
+        with self._lock:
+            self.rates.update(rates)
+            self.last_update = time.time()
+            self._save()
+
+    def is_stale(self) -> bool:
+        return self.last_update is None or time.time() - self.last_update > self.ttl
+
+    def refresh_async(self, fetch) -> bool:
+        """
+        // Uruchamia odświeżanie w tle, jeśli cache jest przeterminowany, nic już nie odświeża
+        // i od ostatniej porażki minęło retry_after sekund
+        Args:
+            fetch: Funkcja zwracająca (słownik kursów, komunikat błędu)
+        Returns:
+            bool: True jeśli uruchomiono nowy wątek odświeżania
+        """
+        with self._lock:
+            if not self.is_stale():
+                return False
+            if self._refresh_thread and self._refresh_thread.is_alive():
+                return False
+            if self.last_failure is not None and time.time() - self.last_failure < self.retry_after:
+                return False
+
+            def run():
+                rates, error = fetch()
+                if error:
+                    self.last_failure = time.time()
+                    print(f"Background exchange rate refresh failed: {error}")
+                else:
+                    self.last_failure = None
+                    self.update(rates)
+
+            self._refresh_thread = threading.Thread(target=run, name="rate-refresh", daemon=True)
+            self._refresh_thread.start()
+            return True
+
+
+_rate_cache: Optional[RateCache] = None
+_rate_cache_lock = threading.Lock()
+
+
+def get_rate_cache() -> RateCache:
+    """
+    // Zwraca jedyną w procesie instancję RateCache (tworzy ją przy pierwszym użyciu)
+    """
+    global _rate_cache
+    if _rate_cache is None:
+        with _rate_cache_lock:
+            if _rate_cache is None:
+                _rate_cache = RateCache(cache_path("exchange_rates.json"))
+    return _rate_cache
+
+
+class HistoricalRateTable:
+    """
+    // Lokalna tabela dziennych kursów NBP (PLN za 1 jednostkę waluty) do przeliczania cen historycznych.
+    // Dni bez publikacji (weekendy, święta) dostają ostatni opublikowany kurs, jak w praktyce NBP.
+    """
+
+    def __init__(self, cache_file: str, currency: str = 'THB'):
+        self.cache_file = cache_file
+        self.currency = currency
+        self._lock = threading.Lock()
+        # // Kursy dokładnie tak jak opublikował je NBP: 'YYYY-MM-DD' -> kurs
+        self.published: Dict[str, Decimal] = {}
+        # // Kursy dla każdego dnia w zakresie (wypełnione do przodu) - wyszukiwanie O(1)
+        self._daily: Dict[date, Decimal] = {}
+        self._last_day: Optional[date] = None
+        # // Ta sama tabela jako pd.Series do złączeń wektorowych (budowana przy pierwszym użyciu)
+        self._daily_series = None
+        # // Ostatni dzień, o który pytano NBP z powodzeniem - późniejszych publikacji jeszcze nie ma
+        self._checked_through: Optional[date] = None
+        # // Czas ostatniego nieudanego pobrania (tylko w pamięci procesu)
+        self.last_failure: Optional[float] = None
+        self._load()
+
+    def _load(self):
+        """
+        // Wczytuje tabelę kursów z pliku cache (jeśli istnieje)
+        """
+        try:
+            if not os.path.exists(self.cache_file):
+                return
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.published = {day: Decimal(value) for day, value in data.get('rates', {}).items()}
+            self._rebuild()
+        except Exception as e:
+            print(f"Error loading historical rate cache: {str(e)}")
+
+    def _save(self):
+        """
+        // Zapisuje opublikowane kursy do pliku cache
+        """
+        try:
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'currency': self.currency,
+                    'rates': {day: str(value) for day, value in sorted(self.published.items())}
+                }, f)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"Error saving historical rate cache: {str(e)}")
+
+    def _rebuild(self):
+        """
+        // Przelicza dzienną tabelę kursów z wypełnieniem dni bez publikacji
+        """
+        daily = {}
+        if self.published:
+            days = sorted(self.published)
+            current = date.fromisoformat(days[0])
+            last = date.fromisoformat(days[-1])
+            rate = self.published[days[0]]
+            while current <= last:
+                rate = self.published.get(current.isoformat(), rate)
+                daily[current] = rate
+                current += timedelta(days=1)
+        self._daily = daily
+        self._last_day = max(daily) if daily else None
+        self._daily_series = None
+
+    def daily_series(self) -> "pd.Series":
+        """
+        // Zwraca dzienną tabelę kursów jako pd.Series indeksowaną datą
+        """
+        if self._daily_series is None:
+            import numpy as np
+            import pandas as pd
+            self._daily_series = pd.Series(
+                [float(rate) for rate in self._daily.values()],
+                index=pd.DatetimeIndex(list(self._daily.keys())),
+                dtype=np.float64
+            )
+        return self._daily_series
+
+    def add_rates(self, rates: Iterable[Dict]) -> int:
+        """
+        // Dodaje kursy w formacie listy 'rates' z odpowiedzi NBP
+        Args:
+            rates: Elementy z kluczami 'effectiveDate' i 'mid'
+        Returns:
+            int: Liczba dodanych kursów
+        """
+        with self._lock:
+            count = 0
+            for rate in rates:
+                self.published[rate['effectiveDate']] = Decimal(str(rate['mid']))
+                count += 1
+            self._rebuild()
+            self._save()
+            return count
+
+    def load_fixture(self, path: str) -> int:
+        """
+        // Wczytuje kursy z lokalnego pliku (zapisana odpowiedź NBP lub sama lista 'rates')
+        Args:
+            path: Ścieżka do pliku JSON
+        Returns:
+            int: Liczba wczytanych kursów
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        rates = data.get('rates', []) if isinstance(data, dict) else data
+        return self.add_rates(rates)
+
+    def covers(self, start: date, end: date) -> bool:
+        """
+        // Czy tabela ma kursy dla całego zakresu; dni po ostatniej publikacji są pokryte,
+        // jeśli NBP już o nie pytano (kurs bierzemy wtedy z ostatniej publikacji)
+        """
+        if start not in self._daily:
+            return False
+        return end in self._daily or (self._checked_through is not None and end <= self._checked_through)
+
+    def load_range(self, start: date, end: date) -> Optional[str]:
+        """
+        // Pobiera kursy z zakresu dat z API NBP (w kawałkach po 367 dni), pomijając zakres już w cache
+        Args:
+            start: Pierwszy dzień zakresu
+            end: Ostatni dzień zakresu
+        Returns:
+            Optional[str]: Komunikat błędu jeśli wystąpił
+        """
+        if self.covers(start, end):
+            return None
+        if self.last_failure is not None and time.time() - self.last_failure < RETRY_AFTER_FAILURE_SECONDS:
+            return "Historical rates unavailable, retrying later"
+
+        import requests
+
+        rates = []
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(chunk_start + timedelta(days=NBP_MAX_RANGE_DAYS - 1), end)
+            url = NBP_RANGE_URL.format(
+                code=self.currency.lower(),
+                start=chunk_start.isoformat(),
+                end=chunk_end.isoformat()
+            )
+            try:
+                response = requests.get(url, timeout=REQUEST_TIMEOUT)
+                if response.status_code == 200:
+                    rates.extend(response.json().get('rates', []))
+                elif response.status_code != 404:
+                    # // 404 oznacza brak publikacji w całym zakresie (np. sam weekend)
+                    self.last_failure = time.time()
+                    return f"Error fetching historical rates: {response.status_code}"
+            except Exception as e:
+                self.last_failure = time.time()
+                return f"Error fetching historical rates: {str(e)}"
+            chunk_start = chunk_end + timedelta(days=1)
+
+        self.last_failure = None
+        self.add_rates(rates)
+        self._checked_through = max(end, self._checked_through or end)
+        return None
+
+    def get_rate(self, day: Union[date, datetime, str]) -> Optional[Decimal]:
+        """
+        // Zwraca kurs obowiązujący w danym dniu
+        Args:
+            day: Data (date, datetime lub 'YYYY-MM-DD')
+        Returns:
+            Optional[Decimal]: Kurs (po ostatniej publikacji - ostatni opublikowany) lub None przed początkiem tabeli
+        """
+        if isinstance(day, str):
+            day = date.fromisoformat(day[:10])
+        elif isinstance(day, datetime):
+            day = day.date()
+        if self._last_day is not None and day > self._last_day:
+            return self._daily[self._last_day]
+        return self._daily.get(day)
+
+    def convert_frame(self, df: "pd.DataFrame", date_column: str, price_column: str = 'price') -> "pd.Series":
+        """
+        // Przelicza kolumnę cen na PLN po kursie z dnia w kolumnie dat (bez zapytań per wiersz)
+        Args:
+            df: Tabela z cenami w walucie tabeli i datami obserwacji
+            date_column: Kolumna z datą (datetime, tekst lub timestamp unix w sekundach)
+            price_column: Kolumna z ceną
+        Returns:
+            pd.Series: Ceny w PLN zaokrąglone do 2 miejsc (NaN dla dni przed początkiem tabeli)
+        """
+        import numpy as np
+        import pandas as pd
+
+        dates = df[date_column]
+        if pd.api.types.is_numeric_dtype(dates):
+            dates = pd.to_datetime(dates, unit='s')
+        else:
+            dates = pd.to_datetime(dates)
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_localize(None)
+        # // Dni po ostatniej publikacji dostają ostatni kurs (wypełnienie do przodu, jak weekendy)
+        rates = self.daily_series().reindex(pd.DatetimeIndex(dates.dt.normalize()), method='ffill')
+        return (df[price_column].astype(np.float64) * rates.to_numpy()).round(2)
+
+
+_history_tables: Dict[str, HistoricalRateTable] = {}
+
+
+def get_history_table(currency: str = 'THB') -> HistoricalRateTable:
+    """
+    // Zwraca współdzieloną w procesie tabelę historycznych kursów dla waluty
+    """
+    with _rate_cache_lock:
+        if currency not in _history_tables:
+            _history_tables[currency] = HistoricalRateTable(
+                cache_path(f"historical_rates_{currency.lower()}.json"),
+                currency=currency
+            )
+        return _history_tables[currency]
+
 
 class CurrencyService:
-    def __init__(self):
-        # // Domyślny kurs wymiany THB/PLN
-        self.thb_to_pln_rate = Decimal('0.1179')
-        self.last_update = None
-        
-    def get_current_rate(self) -> Tuple[Decimal, Optional[str]]:
+    def __init__(self, rate_cache: Optional[RateCache] = None):
+        # // Wszystkie instancje korzystają z tego samego cache kursów
+        self.rate_cache = rate_cache or get_rate_cache()
+        # // Odśwież kurs w tle, nie blokując tworzenia scrapera/sesji
+        self.rate_cache.refresh_async(self._fetch_rates)
+
+    @property
+    def thb_to_pln_rate(self) -> Decimal:
+        return self.rate_cache.get('THB') or DEFAULT_THB_TO_PLN
+
+    def get_rate(self, currency: str = 'PLN') -> Decimal:
         """
-        // Pobiera aktualny kurs wymiany
+        // Zwraca kurs THB do wybranej waluty
+        Args:
+            currency: Kod waluty docelowej (PLN, EUR, USD)
         Returns:
-            Tuple[Decimal, Optional[str]]: (kurs wymiany, komunikat błędu jeśli wystąpił)
+            Decimal: Ile jednostek waluty docelowej kosztuje 1 THB
+        """
+        if currency not in SUPPORTED_CURRENCIES:
+            raise ValueError(f"Unsupported currency: {currency}")
+        if currency == 'PLN':
+            return self.thb_to_pln_rate
+        target_rate = self.rate_cache.get(currency) or DEFAULT_PLN_RATES[currency]
+        return self.thb_to_pln_rate / target_rate
+
+    @property
+    def history(self) -> HistoricalRateTable:
+        # // Dzienna tabela kursów THB/PLN do przeliczeń historycznych
+        return get_history_table('THB')
+
+    @property
+    def last_update(self) -> Optional[float]:
+        return self.rate_cache.last_update
+
+    def _fetch_rates(self) -> Tuple[Dict[str, Decimal], Optional[str]]:
+        """
+        // Pobiera kursy THB, EUR i USD z tabeli A API NBP
+        Returns:
+            Tuple[Dict[str, Decimal], Optional[str]]: (kursy wg kodu waluty, komunikat błędu jeśli wystąpił)
         """
         try:
-            # // Pobierz kurs THB z API NBP
-            nbp_url = "http://api.nbp.pl/api/exchangerates/rates/a/thb/"
-            response = requests.get(nbp_url)
-            
+            import requests
+            response = requests.get(NBP_TABLE_URL, timeout=REQUEST_TIMEOUT)
+
             if response.status_code == 200:
                 data = response.json()
-                rate = Decimal(str(data['rates'][0]['mid']))
-                self.thb_to_pln_rate = rate
-                self.last_update = time.time()
-                return rate, None
+                rates = {
+                    rate['code']: Decimal(str(rate['mid']))
+                    for rate in data[0]['rates']
+                    if rate['code'] in DEFAULT_PLN_RATES
+                }
+                if 'THB' not in rates:
+                    return {}, "Error fetching rate: THB missing in NBP table"
+                return rates, None
             else:
-                return self.thb_to_pln_rate, f"Error fetching rate: {response.status_code}"
-                
+                return {}, f"Error fetching rate: {response.status_code}"
+
         except Exception as e:
-            return self.thb_to_pln_rate, f"Error updating exchange rate: {str(e)}"
-    
+            return {}, f"Error updating exchange rate: {str(e)}"
+
+    def get_current_rate(self) -> Tuple[Decimal, Optional[str]]:
+        """
+        // Pobiera aktualny kurs wymiany (wymusza odświeżenie cache)
+        Returns:
+            Tuple[Decimal, Optional[str]]: (kurs wymiany, komunikat błędu jeśli wystąpił)
+        """
+        rates, error = self._fetch_rates()
+        if error:
+            return self.thb_to_pln_rate, error
+
+        self.rate_cache.update(rates)
+        return self.thb_to_pln_rate, None
+
+    def scaled_rate(self, currency: str = 'PLN') -> int:
+        """
+        // Kurs THB do waluty jako liczba całkowita w jednostkach 10^-RATE_SCALE
+        """
+        return int((self.get_rate(currency) * 10 ** RATE_SCALE).to_integral_value(ROUND_HALF_EVEN))
+
+    @staticmethod
+    def round_amount(amount: Decimal, scaled_rate: int) -> Decimal:
+        """
+        // Kwota w walucie docelowej według wspólnej reguły zaokrąglania (pełne grosze, połówki w górę)
+        """
+        return (amount * scaled_rate).scaleb(-RATE_SCALE).quantize(CENT, rounding=ROUND_HALF_UP)
+
     def convert_to_pln(self, thb_amount: float) -> Optional[float]:
         """
         // Konwertuje kwotę z THB na PLN
@@ -42,18 +469,71 @@ class CurrencyService:
         """
         if not thb_amount:
             return None
-            
+
         try:
-            pln_amount = float(Decimal(str(thb_amount)) * self.thb_to_pln_rate)
-            return round(pln_amount, 2)
+            return float(self.round_amount(Decimal(str(thb_amount)), self.scaled_rate('PLN')))
         except Exception as e:
             print(f"// Błąd konwersji waluty: {str(e)}")
             return None
-    
+
+    def convert_many(self, thb_amounts: Iterable, currency: str = 'PLN') -> "np.ndarray":
+        """
+        // Konwertuje wiele kwot z THB naraz (lista, tablica numpy lub kolumna pandas).
+        // Zaokrąglenie jak w convert_to_pln (round_amount): całkowite kwoty są liczone w groszach
+        // na liczbach całkowitych, pozostałe przez Decimal. Brakujące i zerowe kwoty dają NaN.
+        Args:
+            thb_amounts: Kwoty w bahtach
+            currency: Kod waluty docelowej (PLN, EUR, USD)
+        Returns:
+            np.ndarray: Kwoty w walucie docelowej (float64)
+        """
+        import numpy as np
+
+        scaled_rate = self.scaled_rate(currency)
+        if hasattr(thb_amounts, 'to_numpy'):
+            # // Kolumna pandas - brakujące wartości jako NaN
+            amounts = thb_amounts.to_numpy(dtype=np.float64, na_value=np.nan)
+        elif isinstance(thb_amounts, np.ndarray):
+            amounts = thb_amounts.astype(np.float64)
+        else:
+            amounts = np.array(
+                [np.nan if amount is None else amount for amount in thb_amounts],
+                dtype=np.float64
+            )
+        amounts = np.where(amounts == 0, np.nan, amounts)
+        result = np.full(amounts.shape, np.nan)
+        valid = ~np.isnan(amounts)
+        integral = valid & (amounts == np.trunc(amounts)) & (np.abs(amounts) * scaled_rate < MAX_SCALED_PRODUCT)
+
+        # // Iloczyn w jednostkach 10^-RATE_SCALE jest dokładny w int64; reszta z dzielenia decyduje o połówce
+        whole = amounts[integral].astype(np.int64)
+        divisor = 10 ** (RATE_SCALE - 2)
+        cents, remainder = np.divmod(np.abs(whole) * scaled_rate, divisor)
+        cents += 2 * remainder >= divisor
+        result[integral] = np.sign(whole) * cents / 100
+
+        for i in np.flatnonzero(valid & ~integral):
+            result[i] = float(self.round_amount(Decimal(str(float(amounts[i]))), scaled_rate))
+        return result
+
+    def update_listing_prices(self, listings: List) -> None:
+        """
+        // Przelicza price_pln dla wszystkich ogłoszeń jednym wywołaniem convert_many
+        Args:
+            listings: Lista obiektów PropertyListing
+        """
+        if not listings:
+            return
+        import numpy as np
+
+        pln_prices = self.convert_many([listing.price for listing in listings])
+        for listing, price_pln in zip(listings, pln_prices.tolist()):
+            listing.price_pln = None if np.isnan(price_pln) else price_pln
+
     def get_last_update_time(self) -> Optional[str]:
         """
         // Zwraca czas ostatniej aktualizacji kursu
         """
         if self.last_update:
             return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.last_update))
-        return None 
+        return None
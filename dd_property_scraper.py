@@ -1,29 +1,70 @@
-from curl_cffi import requests
-import time
+import threading
 import json
-from typing import List, Dict, Any, Optional
+import re
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from bs4 import BeautifulSoup
 from models import PropertyListing, Location, PropertyInfo, ListingInfo, AgentInfo
 from currency_service import CurrencyService
+from rate_limiter import get_limiter
+from session_pool import SessionPool, get_session_pool
+from config import DDPROPERTY_BASE_URL, DDPROPERTY_HEADERS, DDPROPERTY_IMPERSONATE
+from listing_dedup import ListingDeduplicator
+from parse_pool import PageRecords, ParsePool, records_to_listings
+import metrics
+
+# // Przerwy (s) między stronami wyników i po wizycie na stronie głównej
+PAGE_DELAY_SECONDS = 2
+HOME_WARMUP_SECONDS = 2
+# // Tryb niskiej pamięci: liczba ogłoszeń buforowanych przed zapisem bloku snapshotu
+SPILL_BATCH_SIZE = 1000
 
 class DDPropertyScraper:
-    def __init__(self):
+    def __init__(self, session_pool: Optional[SessionPool] = None):
         # // Inicjalizacja podstawowych ustawień
-        self.base_url = "https://www.ddproperty.com"
-        self.headers = {
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Referer': 'https://www.ddproperty.com/',
-            'Origin': 'https://www.ddproperty.com',
-            'Connection': 'keep-alive'
-        }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
-        self.impersonate = "chrome110"
+        self.base_url = DDPROPERTY_BASE_URL
+        self.headers = dict(DDPROPERTY_HEADERS)
+        self.impersonate = DDPROPERTY_IMPERSONATE
+        
+        # // Sesja z puli - zwykle ma już ciasteczka strony głównej, więc bez rozgrzewki
+        self.session_pool = session_pool or get_session_pool()
+        self.session, warm = self.session_pool.acquire()
+        if warm:
+            self._visited_home = True
+        # // Liczba stron, których nie udało się pobrać (status != 200, błąd sieci)
+        self.fetch_errors = 0
         
         # // Dodaj domyślny kurs wymiany THB/PLN
         self.currency_service = CurrencyService()
+        
+        # // Wspólny limit zapytań do DDProperty (strony wyników i strony szczegółów)
+        self.rate_limiter = get_limiter("ddproperty")
+
+    @classmethod
+    def parser(cls) -> "DDPropertyScraper":
+        """
+        // Instancja tylko do parsowania HTML - bez sesji i serwisu walut (np. w procesach parsera)
+        """
+        scraper = cls.__new__(cls)
+        scraper.base_url = DDPROPERTY_BASE_URL
+        scraper.session = None
+        scraper.currency_service = None
+        return scraper
+
+    def close(self):
+        """
+        // Oddaje sesję do puli (z zapisem ciasteczek)
+        """
+        if self.session is not None:
+            self.session_pool.release(self.session, warmed=hasattr(self, '_visited_home'))
+            self.session = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def safe_get(self, data: Dict, *keys: str, default: Any = None) -> Any:
         """
@@ -38,6 +79,26 @@ class DDPropertyScraper:
         except (AttributeError, TypeError):
             return default
 
+    def parse_floor_area(self, value: Any) -> Optional[float]:
+        """
+        // Zamienia powierzchnię (np. "45 sqm", "1,200 sq.ft.", 52) na metry kwadratowe
+        Args:
+            value: Surowa wartość z danych ogłoszenia
+        Returns:
+            Optional[float]: Powierzchnia w m² lub None
+        """
+        if value is None:
+            return None
+        if isinstance(value, (int, float)):
+            return float(value) if value > 0 else None
+        match = re.search(r'\d[\d,]*(?:\.\d+)?', str(value))
+        if not match:
+            return None
+        area = float(match.group(0).replace(',', ''))
+        if re.search(r'ft|feet', str(value), re.IGNORECASE):
+            area *= 0.09290304
+        return round(area, 2) if area > 0 else None
+
     def get_total_pages(self, soup: BeautifulSoup) -> int:
         """
         // Pobiera całkowitą liczbę stron z paginacji
@@ -87,37 +148,89 @@ class DDPropertyScraper:
             params_part = base_url.split('?')[1]
             return f"{base_part}/{page}?{params_part}"
 
-    def scrape_all_pages(self, base_url: str, max_pages: Optional[int] = None) -> List[PropertyListing]:
+    def scrape_all_pages(self, base_url: str, max_pages: Optional[int] = None,
+                         deduplicator: Optional[ListingDeduplicator] = None,
+                         on_page: Optional[Callable[[int, Optional[int], List[PropertyListing]], None]] = None,
+                         stop_event: Optional[threading.Event] = None,
+                         parse_pool: Optional[ParsePool] = None,
+                         keep_listings: bool = True) -> List[PropertyListing]:
         """
         // Scrapuje strony wyników do określonego limitu
         Args:
             base_url: Podstawowy URL pierwszej strony
             max_pages: Maksymalna liczba stron do pobrania (None dla wszystkich)
+            deduplicator: Wspólny zbiór ogłoszeń dla wielu wyszukiwań (domyślnie nowy)
+            on_page: Wywoływane po każdej stronie z (numer strony, liczba stron, nowe ogłoszenia)
+            stop_event: Ustawienie przerywa pobieranie przed kolejną stroną
+            parse_pool: Pula procesów parsera - strony są parsowane w tle, a w tym czasie
+                pobierana jest następna (domyślnie parsowanie w tym wątku)
+            keep_listings: False - tryb niskiej pamięci: ogłoszenia trafiają tylko do on_page
+                (np. zapis na dysk), a powtórzenia są rozpoznawane po samym ID
         Returns:
-            List[PropertyListing]: Lista wszystkich ogłoszeń
+            List[PropertyListing]: Lista unikalnych ogłoszeń z tego wyszukiwania (pusta przy keep_listings=False)
         """
+        deduplicator = deduplicator if deduplicator is not None else ListingDeduplicator()
         all_listings = []
-        page = 1
+        collected = set()
+        # // Tryb niskiej pamięci: tylko ID już przekazanych ogłoszeń
+        seen_ids = set()
         total_pages = None
-        
-        while True:
-            current_url = self.get_page_url(base_url, page)
-            print(f"\nScraping page {page}...")
-            
-            # // Pobierz dane z aktualnej strony
-            page_listings, soup = self.extract_listings_data(current_url, return_soup=True)
-            
-            # // Przy pierwszej stronie sprawdź całkowitą liczbę stron
+        # // Strony pobrane, ale jeszcze nieprzetworzone: (numer strony, Future)
+        pending = deque()
+
+        def collect(page: int, future: Future) -> bool:
+            # // Dodaje ogłoszenia ze sparsowanej strony; False gdy strona była pusta
+            nonlocal total_pages
+            page_listings, page_total = self._page_result(future)
             if page == 1:
-                total_pages = self.get_total_pages(soup)
+                total_pages = page_total or 1
                 print(f"Total pages found: {total_pages}")
             
             if not page_listings:
                 print(f"No listings found on page {page}")
-                break
+                return False
                 
-            all_listings.extend(page_listings)
-            print(f"Added {len(page_listings)} listings from page {page}")
+            # // Powtórzone ogłoszenia (np. promowane) łączymy z już zebranymi
+            new_listings = []
+            if keep_listings:
+                for listing in page_listings:
+                    listing = deduplicator.add(listing)
+                    if id(listing) not in collected:
+                        collected.add(id(listing))
+                        new_listings.append(listing)
+                all_listings.extend(new_listings)
+            else:
+                for listing in page_listings:
+                    listing_id = str(listing.listing_info.id)
+                    if listing_id not in seen_ids:
+                        seen_ids.add(listing_id)
+                        new_listings.append(listing)
+            added = len(new_listings)
+            print(f"Added {added} listings from page {page} ({len(page_listings) - added} duplicates)")
+            if on_page is not None:
+                on_page(page, total_pages, new_listings)
+            return True
+
+        page = 1
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                print(f"Stopped before page {page}")
+                break
+            current_url = self.get_page_url(base_url, page)
+            print(f"\nScraping page {page}...")
+            
+            # // Pobierz stronę i przekaż ją do parsowania
+            pending.append((page, self._parse_page(self.fetch_page_html(current_url), parse_pool, page == 1)))
+            
+            # // Przetwórz strony, które są już sparsowane (w kolejności stron). Pierwszą stronę
+            # // trzeba znać od razu - z niej pochodzi liczba stron.
+            empty_page = False
+            while pending and (page == 1 or pending[0][1].done()):
+                if not collect(*pending.popleft()):
+                    empty_page = True
+                    break
+            if empty_page:
+                break
             
             # // Sprawdź czy osiągnięto limit stron
             if max_pages and page >= max_pages:
@@ -129,11 +242,86 @@ class DDPropertyScraper:
                 break
                 
             page += 1
-            time.sleep(2)  # // Przerwa między stronami
+            if stop_event is None or not stop_event.is_set():
+                metrics.throttle_sleep(PAGE_DELAY_SECONDS, 'page_delay')  # // Przerwa między stronami
+        
+        # // Dokończ strony, które jeszcze były parsowane
+        while pending:
+            if not collect(*pending.popleft()):
+                break
         
         print(f"\nTotal listings collected: {len(all_listings)}")
         return all_listings
 
+    def _parse_page(self, html: Optional[str], parse_pool: Optional[ParsePool], first_page: bool = True) -> Future:
+        """
+        // Zleca parsowanie strony do puli procesów albo parsuje od razu (wynik jako Future).
+        // Liczba stron jest czytana tylko z pierwszej strony, a drzewo soup zwalniane od razu.
+        """
+        if html is not None and parse_pool is not None:
+            return parse_pool.submit(html)
+        future = Future()
+        if html is None:
+            future.set_result(([], None))
+        else:
+            listings, soup = self.parse_listings_html(html)
+            total_pages = None
+            if soup is not None:
+                total_pages = self.get_total_pages(soup) if first_page else None
+                # // Drzewo ma cykliczne referencje - bez decompose() czekałoby na GC
+                soup.decompose()
+            future.set_result((listings, total_pages))
+        return future
+
+    def crawl_to_snapshot(self, base_url: str, path: str, max_pages: Optional[int] = None,
+                          on_page: Optional[Callable[[int, Optional[int], List[PropertyListing]], None]] = None,
+                          stop_event: Optional[threading.Event] = None,
+                          parse_pool: Optional[ParsePool] = None) -> Tuple[int, Optional[str]]:
+        """
+        // Pobiera wyszukiwanie w trybie niskiej pamięci: ogłoszenia z każdej strony są od razu
+        // zapisywane do snapshotu (listing_snapshot) i nie są trzymane w pamięci. Eksport wyszukiwania
+        // do pliku; harmonogram (crawl_scheduler) używa tego samego trybu przez keep_listings=False.
+        Args:
+            base_url: Podstawowy URL pierwszej strony
+            path: Plik snapshotu (.arrow lub .jsonl)
+            max_pages: Maksymalna liczba stron do pobrania (None dla wszystkich)
+            on_page: Wywoływane po każdej stronie z (numer strony, liczba stron, nowe ogłoszenia)
+            stop_event: Ustawienie przerywa pobieranie przed kolejną stroną
+            parse_pool: Pula procesów parsera
+        Returns:
+            Tuple[int, Optional[str]]: (liczba zapisanych ogłoszeń, komunikat błędu)
+        """
+        from listing_snapshot import SnapshotWriter
+
+        try:
+            with SnapshotWriter(path, batch_size=SPILL_BATCH_SIZE) as writer:
+                def spill(page: int, total_pages: Optional[int], new_listings: List[PropertyListing]):
+                    writer.write(new_listings)
+                    if on_page is not None:
+                        on_page(page, total_pages, new_listings)
+
+                self.scrape_all_pages(base_url, max_pages=max_pages, on_page=spill, stop_event=stop_event,
+                                      parse_pool=parse_pool, keep_listings=False)
+            return writer.count, None
+        except Exception as e:
+            return 0, f"Error writing crawl snapshot {path}: {str(e)}"
+
+    def _page_result(self, future: Future) -> Tuple[List[PropertyListing], Optional[int]]:
+        """
+        // Zwraca (ogłoszenia, liczba stron) ze sparsowanej strony
+        """
+        try:
+            result = future.result()
+        except Exception as e:
+            print(f"Error parsing listings page: {str(e)}")
+            return [], None
+        if isinstance(result, PageRecords):
+            listings = records_to_listings(result)
+            if self.currency_service is not None:
+                self.currency_service.update_listing_prices(listings)
+            return listings, result.total_pages
+        return result
+
     def extract_image_url(self, listing_card, listing_id: str) -> str:
         """
         // Wyciąga URL obrazka z karty ogłoszenia, wybierając pierwszy dostępny
@@ -175,40 +363,83 @@ class DDPropertyScraper:
             print(f"Error extracting image URL for listing {listing_id}: {str(e)}")
             return None
 
-    def extract_listings_data(self, search_url: str, return_soup: bool = False) -> List[PropertyListing]:
+    def fetch_page_html(self, url: str) -> Optional[str]:
         """
-        // Pobiera dane o ogłoszeniach z wyników wyszukiwania
+        // Pobiera HTML strony wyników (bez parsowania)
         Args:
-            search_url (str): URL z parametrami wyszukiwania
-            return_soup (bool): Czy zwrócić również obiekt BeautifulSoup
+            url: URL strony wyników
         Returns:
-            List[PropertyListing]: Lista ogłoszeń z wymaganymi danymi
-            BeautifulSoup: Obiekt soup jeśli return_soup=True
+            Optional[str]: Treść strony lub None w przypadku błędu
         """
         try:
             # // Najpierw odwiedź stronę główną aby pobrać ciasteczka
             if not hasattr(self, '_visited_home'):
-                self.session.get(
-                    self.base_url,
-                    impersonate=self.impersonate
-                )
+                with metrics.HTTP_REQUEST_SECONDS.time(kind='home'):
+                    self.session.get(
+                        self.base_url,
+                        impersonate=self.impersonate
+                    )
                 self._visited_home = True
-                time.sleep(2)
+                metrics.throttle_sleep(HOME_WARMUP_SECONDS, 'home_warmup')
             
-            print(f"Making request to: {search_url}")
-            response = self.session.get(
-                search_url,
-                impersonate=self.impersonate,
-                timeout=30
-            )
+            print(f"Making request to: {url}")
+            self.rate_limiter.acquire()
+            with metrics.HTTP_REQUEST_SECONDS.time(kind='search'):
+                response = self.session.get(
+                    url,
+                    impersonate=self.impersonate,
+                    timeout=30
+                )
             
             print(f"Response status code: {response.status_code}")
+            metrics.HTTP_REQUESTS.inc(kind='search', status=response.status_code)
+            metrics.HTTP_RESPONSE_BYTES.inc(len(response.content), kind='search')
             
             if response.status_code != 200:
                 print(f"Error: Status code {response.status_code}")
-                return ([], None) if return_soup else []
+                self.fetch_errors += 1
+                return None
+            return response.text
 
-            soup = BeautifulSoup(response.text, 'html.parser')
+        except Exception as e:
+            print(f"Error during scraping: {str(e)}")
+            self.fetch_errors += 1
+            if hasattr(e, 'response'):
+                print(f"Response text: {e.response.text[:500]}...")
+            return None
+
+    def extract_listings_data(self, search_url: str, return_soup: bool = False) -> List[PropertyListing]:
+        """
+        // Pobiera dane o ogłoszeniach z wyników wyszukiwania
+        Args:
+            search_url (str): URL z parametrami wyszukiwania
+            return_soup (bool): Czy zwrócić również obiekt BeautifulSoup
+        Returns:
+            List[PropertyListing]: Lista ogłoszeń z wymaganymi danymi
+            BeautifulSoup: Obiekt soup jeśli return_soup=True
+        """
+        html = self.fetch_page_html(search_url)
+        if html is None:
+            return ([], None) if return_soup else []
+        listings, soup = self.parse_listings_html(html)
+        return (listings, soup) if return_soup else listings
+
+    def parse_listings_html(self, html: str) -> Tuple[List[PropertyListing], Optional[BeautifulSoup]]:
+        """
+        // Parsuje HTML strony wyników (bez żadnych zapytań sieciowych)
+        Args:
+            html: Treść strony wyników wyszukiwania
+        Returns:
+            Tuple[List[PropertyListing], Optional[BeautifulSoup]]: (lista ogłoszeń, obiekt soup)
+        """
+        with metrics.PAGE_PARSE_SECONDS.time(kind='results'):
+            listings, soup = self._parse_listings_html(html)
+        metrics.LISTINGS_PER_PAGE.observe(len(listings))
+        return listings, soup
+
+    def _parse_listings_html(self, html: str) -> Tuple[List[PropertyListing], Optional[BeautifulSoup]]:
+        try:
+            soup = BeautifulSoup(html, 'html.parser')
             script_tags = soup.find_all('script', {'type': 'text/javascript'})
             target_script = None
             
@@ -219,7 +450,7 @@ class DDPropertyScraper:
                     
             if not target_script:
                 print("Debug: Could not find script tag with listing data")
-                return ([], soup) if return_soup else []
+                return [], soup
 
             script_content = target_script.string
             start_idx = script_content.find('var guruApp = ') + len('var guruApp = ')
@@ -227,16 +458,17 @@ class DDPropertyScraper:
             
             if start_idx == -1 or end_idx == -1:
                 print("Debug: Could not find proper JSON data markers")
-                return ([], soup) if return_soup else []
+                return [], soup
                 
             json_str = script_content[start_idx:end_idx]
             
             try:
-                data = json.loads(json_str)
+                with metrics.JSON_DECODE_SECONDS.time():
+                    data = json.loads(json_str)
             except json.JSONDecodeError as e:
                 print(f"Debug: JSON parsing error: {str(e)}")
                 print(f"Debug: JSON string start: {json_str[:200]}...")
-                return ([], soup) if return_soup else []
+                return [], soup
             
             listings = []
             listings_data = self.safe_get(data, 'listingResultsWidget', 'gaECListings', default=[])
@@ -284,19 +516,21 @@ class DDPropertyScraper:
                     listing_card = soup.find('div', {'class': 'listing-card', 'data-listing-id': listing_id})
                     image_url = self.extract_image_url(listing_card, listing_id)
                     
-                    # // Dodaj konwersję ceny na PLN
+                    # // Znormalizowana powierzchnia i cena za m²
                     price_thb = product_data.get('price')
-                    price_pln = self.currency_service.convert_to_pln(price_thb) if price_thb else None
+                    floor_area_sqm = self.parse_floor_area(product_data.get('floorArea'))
+                    price_per_sqm = round(price_thb / floor_area_sqm, 2) if price_thb and floor_area_sqm else None
                     
                     property_listing = PropertyListing(
                         name=product_data.get('name'),
                         price=price_thb,  # // Oryginalna cena w THB
-                        price_pln=price_pln,  # // Dodaj cenę w PLN
+                        price_per_sqm=price_per_sqm,
                         location=Location(**location_data),
                         property_info=PropertyInfo(
                             bedrooms=product_data.get('bedrooms'),
                             bathrooms=product_data.get('bathrooms'),
                             floor_area=product_data.get('floorArea'),
+                            floor_area_sqm=floor_area_sqm,
                             property_type=product_data.get('category'),
                             image_url=image_url
                         ),
@@ -325,10 +559,12 @@ class DDPropertyScraper:
                     print(f"Error processing listing {i}: {str(e)}")
                     continue
             
-            return (listings, soup) if return_soup else listings
+            # // Przelicz ceny na PLN dla całej strony jednym wywołaniem
+            if self.currency_service is not None:
+                self.currency_service.update_listing_prices(listings)
+            
+            return listings, soup
 
         except Exception as e:
-            print(f"Error during scraping: {str(e)}")
-            if hasattr(e, 'response'):
-                print(f"Response text: {e.response.text[:500]}...")
-            return ([], None) if return_soup else []
+            print(f"Error parsing listings page: {str(e)}")
+            return [], None
@@ -0,0 +1,294 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from bs4 import BeautifulSoup
+from curl_cffi import requests
+from config import cache_path
+from models import PropertyListing
+from rate_limiter import get_limiter
+import metrics
+
+# // Przybliżone granice Tajlandii - odrzucamy współrzędne spoza nich
+THAILAND_BOUNDS = ((5.0, 21.0), (97.0, 106.0))
+
+
+def _find_values(data: Any, keys: set) -> Iterator[Any]:
+    """
+    // Przeszukuje rekurencyjnie zagnieżdżone słowniki/listy i zwraca wartości dla podanych kluczy
+    """
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key in keys:
+                yield value
+            yield from _find_values(value, keys)
+    elif isinstance(data, list):
+        for item in data:
+            yield from _find_values(item, keys)
+
+
+def _valid_coordinates(lat: Any, lon: Any) -> Optional[Tuple[float, float]]:
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    (min_lat, max_lat), (min_lon, max_lon) = THAILAND_BOUNDS
+    if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+        return lat, lon
+    return None
+
+
+def _extract_guru_app(soup: BeautifulSoup) -> Dict:
+    """
+    // Wyciąga obiekt guruApp ze skryptów strony (jak na stronie wyników)
+    """
+    for script in soup.find_all('script'):
+        content = script.string
+        if not content or 'var guruApp = ' not in content:
+            continue
+        start_idx = content.find('var guruApp = ') + len('var guruApp = ')
+        try:
+            data, _ = json.JSONDecoder().raw_decode(content[start_idx:])
+            return data
+        except json.JSONDecodeError as e:
+            print(f"Debug: guruApp JSON parsing error on detail page: {str(e)}")
+    return {}
+
+
+def parse_detail_html(html: str) -> Dict:
+    """
+    // Parsuje stronę szczegółów ogłoszenia: dokładne współrzędne, udogodnienia i galerię zdjęć
+    Args:
+        html: Treść strony ogłoszenia
+    Returns:
+        Dict: Słownik z kluczami coordinates, amenities, image_urls
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    guru_app = _extract_guru_app(soup)
+    coordinates = None
+
+    # // 1. Dane strukturalne schema.org (geo.latitude / geo.longitude)
+    for script in soup.find_all('script', {'type': 'application/ld+json'}):
+        try:
+            ld_data = json.loads(script.string or '')
+        except json.JSONDecodeError:
+            continue
+        for geo in _find_values(ld_data, {'geo'}):
+            if isinstance(geo, dict):
+                coordinates = _valid_coordinates(geo.get('latitude'), geo.get('longitude'))
+                if coordinates:
+                    break
+        if coordinates:
+            break
+
+    # // 2. Meta tagi z położeniem
+    if not coordinates:
+        lat_tag = soup.find('meta', attrs={'itemprop': 'latitude'}) or soup.find('meta', property='place:location:latitude')
+        lon_tag = soup.find('meta', attrs={'itemprop': 'longitude'}) or soup.find('meta', property='place:location:longitude')
+        if lat_tag and lon_tag:
+            coordinates = _valid_coordinates(lat_tag.get('content'), lon_tag.get('content'))
+
+    # // 3. Obiekt guruApp (pierwsza para latitude/longitude w Tajlandii)
+    if not coordinates:
+        for location in _find_values(guru_app, {'location', 'geo', 'map', 'coordinates'}):
+            if isinstance(location, dict):
+                coordinates = _valid_coordinates(
+                    location.get('latitude', location.get('lat')),
+                    location.get('longitude', location.get('lng', location.get('lon')))
+                )
+                if coordinates:
+                    break
+
+    # // Udogodnienia - lista tekstów lub obiektów z nazwą
+    amenities = []
+    for values in _find_values(guru_app, {'amenities', 'facilities'}):
+        if not isinstance(values, list):
+            continue
+        for value in values:
+            if isinstance(value, dict):
+                value = value.get('text') or value.get('name') or value.get('label')
+            if isinstance(value, str) and value and value not in amenities:
+                amenities.append(value)
+
+    # // Galeria zdjęć - obrazki z guruApp i z galerii w HTML
+    image_urls = []
+    for values in _find_values(guru_app, {'images', 'gallery', 'photos'}):
+        if not isinstance(values, list):
+            continue
+        for value in values:
+            if isinstance(value, dict):
+                value = value.get('src') or value.get('url') or value.get('original')
+            if isinstance(value, str) and value.startswith('http') and value not in image_urls:
+                image_urls.append(value)
+    if not image_urls:
+        for img in soup.select('.gallery-container img, .media-gallery img'):
+            url = img.get('data-original') or img.get('src')
+            if url and url.startswith('http') and url not in image_urls:
+                image_urls.append(url)
+    og_image = soup.find('meta', property='og:image')
+    if og_image and og_image.get('content') and not image_urls:
+        image_urls.append(og_image['content'])
+
+    return {
+        'coordinates': coordinates,
+        'amenities': amenities,
+        'image_urls': image_urls,
+    }
+
+
+class DetailCache:
+    """
+    // Cache stron szczegółów na dysku, ważny dopóki cena ogłoszenia się nie zmieni
+    """
+
+    def __init__(self, cache_file: Optional[str] = None):
+        self.cache_file = cache_file or cache_path("listing_details.json")
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict] = {}
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+        except Exception as e:
+            print(f"Error loading listing detail cache: {str(e)}")
+
+    def get(self, listing_id: Any, price: Any) -> Optional[Dict]:
+        entry = self.entries.get(str(listing_id))
+        if entry and entry.get('price') == price:
+            return entry
+        return None
+
+    def put(self, listing_id: Any, price: Any, details: Dict):
+        with self._lock:
+            self.entries[str(listing_id)] = {**details, 'price': price, 'fetched_at': time.time()}
+
+    def save(self):
+        try:
+            with self._lock:
+                tmp_file = f"{self.cache_file}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.entries, f)
+                os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"Error saving listing detail cache: {str(e)}")
+
+
+class DetailEnricher:
+    """
+    // Uzupełnia ogłoszenia danymi ze stron szczegółów, pobieranymi równolegle
+    // w ramach wspólnego limitu zapytań do DDProperty
+    """
+
+    def __init__(self, scraper, max_workers: int = 4, cache: Optional[DetailCache] = None):
+        self.scraper = scraper
+        self.max_workers = max_workers
+        self.cache = cache or DetailCache()
+        self.rate_limiter = get_limiter("ddproperty")
+        self._local = threading.local()
+        # // Sesje wątków pobierających - zamykane po zakończeniu enrich()
+        self._sessions: List[requests.Session] = []
+        self._sessions_lock = threading.Lock()
+
+    def _session(self) -> requests.Session:
+        """
+        // Osobna sesja curl_cffi dla każdego wątku, z ciasteczkami sesji scrapera
+        """
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.scraper.headers)
+            session.cookies.update(self.scraper.session.cookies)
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def close(self):
+        """
+        // Zamyka sesje wątków (ich połączenia); kolejne pobrania tworzą nowe
+        """
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+            self._local = threading.local()
+        for session in sessions:
+            session.close()
+
+    def fetch_detail(self, url: str) -> Optional[Dict]:
+        """
+        // Pobiera i parsuje stronę szczegółów ogłoszenia
+        Args:
+            url: Adres strony ogłoszenia
+        Returns:
+            Optional[Dict]: Sparsowane dane lub None w przypadku błędu
+        """
+        try:
+            self.rate_limiter.acquire()
+            with metrics.HTTP_REQUEST_SECONDS.time(kind='detail'):
+                response = self._session().get(url, impersonate=self.scraper.impersonate, timeout=30)
+            metrics.HTTP_REQUESTS.inc(kind='detail', status=response.status_code)
+            metrics.HTTP_RESPONSE_BYTES.inc(len(response.content), kind='detail')
+
+            if response.status_code != 200:
+                print(f"Error: Status code {response.status_code} for detail page {url}")
+                return None
+
+            with metrics.PAGE_PARSE_SECONDS.time(kind='detail'):
+                return parse_detail_html(response.text)
+        except Exception as e:
+            print(f"Error fetching detail page {url}: {str(e)}")
+            return None
+
+    def apply(self, listing: PropertyListing, details: Dict):
+        """
+        // Przenosi dane ze strony szczegółów do ogłoszenia
+        """
+        if details.get('coordinates'):
+            listing.location.coordinates = tuple(details['coordinates'])
+            listing.location.exact_coordinates = True
+        if details.get('amenities'):
+            listing.property_info.amenities = list(details['amenities'])
+        if details.get('image_urls'):
+            listing.property_info.image_urls = list(details['image_urls'])
+            if not listing.property_info.image_url:
+                listing.property_info.image_url = details['image_urls'][0]
+
+    def enrich(self, listings: List[PropertyListing]) -> int:
+        """
+        // Uzupełnia ogłoszenia danymi ze stron szczegółów (z cache lub z sieci)
+        Args:
+            listings: Lista ogłoszeń
+        Returns:
+            int: Liczba uzupełnionych ogłoszeń
+        """
+        enriched = 0
+        to_fetch = []
+        for listing in listings:
+            if not listing.listing_info.url:
+                continue
+            cached = self.cache.get(listing.listing_info.id, listing.price)
+            if cached:
+                metrics.DETAIL_CACHE_REQUESTS.inc(result='hit')
+                self.apply(listing, cached)
+                enriched += 1
+            else:
+                metrics.DETAIL_CACHE_REQUESTS.inc(result='miss')
+                to_fetch.append(listing)
+
+        if to_fetch:
+            print(f"Fetching {len(to_fetch)} detail pages ({len(listings) - len(to_fetch)} cached)")
+            try:
+                with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="detail") as executor:
+                    results = executor.map(lambda listing: self.fetch_detail(listing.listing_info.url), to_fetch)
+                    for listing, details in zip(to_fetch, results):
+                        if details is None:
+                            continue
+                        self.cache.put(listing.listing_info.id, listing.price, details)
+                        self.apply(listing, details)
+                        enriched += 1
+            finally:
+                self.close()
+            self.cache.save()
+
+        return enriched
@@ -0,0 +1,252 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Set, Tuple
+from config import CACHE_DIR
+import metrics
+
+THUMBNAIL_SIZE = (400, 300)
+THUMBNAIL_QUALITY = 70
+# // Limit rozmiaru katalogu z miniaturami
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+MAX_WORKERS = 8
+# // Ile pierwszych kart (w bieżącym sortowaniu) dostaje miniatury pobierane w tle przy przebiegu skryptu
+PREFETCH_LIMIT = 60
+# // Po nieudanym pobraniu obrazek jest ponawiany dopiero po tym czasie (błędy bywają chwilowe)
+FAILED_RETRY_SECONDS = 15 * 60
+
+THUMBNAIL_REQUESTS = metrics.REGISTRY.counter(
+    "thumbnail_requests_total", "Thumbnail lookups by result (hit, fetched, error)")
+THUMBNAIL_BYTES = metrics.REGISTRY.counter(
+    "thumbnail_bytes_total", "Bytes of original images downloaded and thumbnails stored, by kind")
+
+
+class ThumbnailCache:
+    """
+    // Lokalny cache miniatur zdjęć ogłoszeń (klucz: hash URL), z usuwaniem najdawniej używanych (LRU)
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = MAX_CACHE_BYTES,
+                 size: Tuple[int, int] = THUMBNAIL_SIZE, quality: int = THUMBNAIL_QUALITY):
+        self.cache_dir = cache_dir or os.path.join(CACHE_DIR, "thumbnails")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.size = size
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._fetching: Dict[str, threading.Event] = {}
+        # // Klucz -> czas nieudanego pobrania (bez ponawiania przy każdym odświeżeniu, do FAILED_RETRY_SECONDS)
+        self._failed: Dict[str, float] = {}
+        # // Adresy zlecone do pobrania w tle, a jeszcze nieobsłużone
+        self._queued: Set[str] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # // klucz -> rozmiar pliku, od najdawniej do ostatnio używanego
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._load_index()
+
+    def _load_index(self):
+        """
+        // Odtwarza kolejność LRU z czasów modyfikacji plików na dysku
+        """
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.jpg'):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, f"{self.key(url)}.jpg")
+
+    def _touch(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        try:
+            os.utime(os.path.join(self.cache_dir, f"{key}.jpg"))
+        except OSError:
+            pass
+
+    def _store(self, key: str, data: bytes):
+        """
+        // Zapisuje miniaturę i usuwa najdawniej używane, jeśli przekroczono limit
+        """
+        file_path = os.path.join(self.cache_dir, f"{key}.jpg")
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, file_path)
+
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, old_size = self._entries.popitem(last=False)
+                self._total_bytes -= old_size
+                try:
+                    os.remove(os.path.join(self.cache_dir, f"{old_key}.jpg"))
+                except OSError:
+                    pass
+
+    def make_thumbnail(self, data: bytes) -> bytes:
+        """
+        // Zmniejsza i kompresuje obrazek do JPEG
+        """
+        from PIL import Image
+
+        with Image.open(io.BytesIO(data)) as image:
+            image = image.convert('RGB')
+            image.thumbnail(self.size)
+            output = io.BytesIO()
+            image.save(output, format='JPEG', quality=self.quality, optimize=True)
+            return output.getvalue()
+
+    def fetch(self, url: str) -> Optional[str]:
+        """
+        // Zwraca ścieżkę miniatury, pobierając i zmniejszając obrazek tylko raz
+        Args:
+            url: Adres oryginalnego obrazka
+        Returns:
+            Optional[str]: Ścieżka do pliku miniatury lub None w przypadku błędu
+        """
+        if not url:
+            return None
+        key = self.key(url)
+        file_path = os.path.join(self.cache_dir, f"{key}.jpg")
+
+        # // Jeśli inny wątek już pobiera ten obrazek - poczekaj na niego
+        with self._lock:
+            cached = key in self._entries
+            event = None if cached else self._fetching.get(key)
+            owner = not cached and event is None
+            if owner:
+                event = self._fetching[key] = threading.Event()
+        if cached:
+            THUMBNAIL_REQUESTS.inc(result='hit')
+            self._touch(key)
+            return file_path
+        if not owner:
+            event.wait()
+            return file_path if key in self._entries else None
+
+        try:
+            from curl_cffi import requests
+
+            response = requests.get(url, impersonate="chrome110", timeout=20)
+            if response.status_code != 200:
+                print(f"Error: Status code {response.status_code} for image {url}")
+                THUMBNAIL_REQUESTS.inc(result='error')
+                self._failed[key] = time.monotonic()
+                return None
+            thumbnail = self.make_thumbnail(response.content)
+            THUMBNAIL_BYTES.inc(len(response.content), kind='original')
+            THUMBNAIL_BYTES.inc(len(thumbnail), kind='thumbnail')
+            self._store(key, thumbnail)
+            THUMBNAIL_REQUESTS.inc(result='fetched')
+            return file_path
+        except Exception as e:
+            print(f"Error creating thumbnail for {url}: {str(e)}")
+            THUMBNAIL_REQUESTS.inc(result='error')
+            self._failed[key] = time.monotonic()
+            return None
+        finally:
+            with self._lock:
+                self._fetching.pop(key, None)
+            event.set()
+
+    def _recently_failed(self, key: str) -> bool:
+        failed_at = self._failed.get(key)
+        if failed_at is None:
+            return False
+        if time.monotonic() - failed_at >= FAILED_RETRY_SECONDS:
+            self._failed.pop(key, None)
+            return False
+        return True
+
+    def prefetch(self, urls: Iterable[str], max_workers: int = MAX_WORKERS) -> int:
+        """
+        // Pobiera brakujące miniatury równolegle (z ograniczoną liczbą wątków)
+        Args:
+            urls: Adresy obrazków
+            max_workers: Maksymalna liczba jednoczesnych pobrań
+        Returns:
+            int: Liczba dostępnych miniatur
+        """
+        unique_urls = list(dict.fromkeys(url for url in urls if url))
+        missing = [
+            url for url in unique_urls
+            if self.key(url) not in self._entries and not self._recently_failed(self.key(url))
+        ]
+        if missing:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="thumbnail") as executor:
+                list(executor.map(self.fetch, missing))
+        return sum(1 for url in unique_urls if self.key(url) in self._entries)
+
+    def prefetch_async(self, urls: Iterable[str], limit: int = PREFETCH_LIMIT) -> int:
+        """
+        // Zleca pobranie brakujących miniatur w tle i wraca od razu (przebieg skryptu nie czeka)
+        Args:
+            urls: Adresy obrazków w kolejności wyświetlania
+            limit: Maksymalna liczba pierwszych adresów branych pod uwagę
+        Returns:
+            int: Liczba nowo zleconych pobrań
+        """
+        queued = 0
+        for url in list(dict.fromkeys(url for url in urls if url))[:limit]:
+            key = self.key(url)
+            with self._lock:
+                if key in self._entries or key in self._queued or self._recently_failed(key):
+                    continue
+                self._queued.add(key)
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="thumbnail")
+            self._executor.submit(self._fetch_queued, url, key)
+            queued += 1
+        return queued
+
+    def _fetch_queued(self, url: str, key: str):
+        try:
+            self.fetch(url)
+        finally:
+            with self._lock:
+                self._queued.discard(key)
+
+    def cached_path(self, url: str) -> Optional[str]:
+        """
+        // Zwraca ścieżkę miniatury, jeśli jest już w cache (bez pobierania)
+        """
+        if not url:
+            return None
+        key = self.key(url)
+        if key not in self._entries:
+            return None
+        self._touch(key)
+        return os.path.join(self.cache_dir, f"{key}.jpg")
+
+
+_thumbnail_cache: Optional[ThumbnailCache] = None
+_thumbnail_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    """
+    // Zwraca współdzielony w procesie cache miniatur
+    """
+    global _thumbnail_cache
+    with _thumbnail_cache_lock:
+        if _thumbnail_cache is None:
+            _thumbnail_cache = ThumbnailCache()
+        return _thumbnail_cache
@@ -0,0 +1,87 @@
+import time
+from typing import Dict, Iterable, List, Optional
+from models import PropertyListing
+import metrics
+
+LISTINGS_DEDUPLICATED = metrics.REGISTRY.counter(
+    "ddproperty_duplicate_listings_total", "Repeat sightings of an already collected listing")
+
+
+class ListingDeduplicator:
+    """
+    // Zbiera unikalne ogłoszenia (po ID) ze stron wyników i wielu wyszukiwań.
+    // Powtórne wystąpienie aktualizuje istniejące ogłoszenie zamiast dodawać kopię.
+    """
+
+    def __init__(self):
+        self._by_id: Dict[str, PropertyListing] = {}
+        self.listings: List[PropertyListing] = []
+        self.duplicates = 0
+
+    def __len__(self) -> int:
+        return len(self.listings)
+
+    def __contains__(self, listing_id) -> bool:
+        return str(listing_id) in self._by_id
+
+    def get(self, listing_id) -> Optional[PropertyListing]:
+        return self._by_id.get(str(listing_id))
+
+    def merge(self, existing: PropertyListing, listing: PropertyListing, seen_at: float):
+        """
+        // Łączy powtórne wystąpienie z zapisanym ogłoszeniem (nowsze wartości ceny i statusu wygrywają)
+        """
+        info = existing.listing_info
+        info.last_seen = max(info.last_seen or seen_at, seen_at)
+        info.seen_count += 1
+        if listing.price is not None:
+            existing.price = listing.price
+            existing.price_pln = listing.price_pln
+            existing.price_per_sqm = listing.price_per_sqm
+        if listing.listing_info.status:
+            info.status = listing.listing_info.status
+        if not existing.property_info.image_url:
+            existing.property_info.image_url = listing.property_info.image_url
+
+    def add(self, listing: PropertyListing, seen_at: Optional[float] = None) -> PropertyListing:
+        """
+        // Dodaje ogłoszenie lub łączy je z już zebranym
+        Args:
+            listing: Ogłoszenie ze strony wyników
+            seen_at: Czas wystąpienia (domyślnie teraz)
+        Returns:
+            PropertyListing: Kanoniczny obiekt ogłoszenia
+        """
+        seen_at = seen_at or time.time()
+        listing_id = listing.listing_info.id
+        key = str(listing_id) if listing_id is not None else None
+
+        existing = self._by_id.get(key) if key is not None else None
+        if existing is not None:
+            self.duplicates += 1
+            LISTINGS_DEDUPLICATED.inc()
+            self.merge(existing, listing, seen_at)
+            return existing
+
+        info = listing.listing_info
+        info.first_seen = info.first_seen or seen_at
+        info.last_seen = seen_at
+        info.seen_count = max(info.seen_count, 0) + 1
+        if key is not None:
+            self._by_id[key] = listing
+        self.listings.append(listing)
+        return listing
+
+    def add_many(self, listings: Iterable[PropertyListing], seen_at: Optional[float] = None) -> List[PropertyListing]:
+        """
+        // Dodaje listę ogłoszeń
+        Returns:
+            List[PropertyListing]: Ogłoszenia, które nie były wcześniej znane
+        """
+        new_listings = []
+        for listing in listings:
+            before = len(self.listings)
+            self.add(listing, seen_at)
+            if len(self.listings) > before:
+                new_listings.append(listing)
+        return new_listings
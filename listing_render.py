@@ -0,0 +1,190 @@
+from textwrap import dedent
+from typing import Hashable, List, Optional
+from models import PropertyListing
+from shared_cache import get_render_cache
+
+IMAGE_TEMPLATE = '<img src="{image_src}" class="property-image">'
+
+# // Szablony są przygotowane raz przy imporcie; fragmenty składane przez join (bez += w pętli)
+CARD_TEMPLATE = dedent("""
+    <div class="listing-card">
+        {image}
+        <div class="property-title">{name}</div>
+        <div class="price-container">
+            <div class="price-tag">฿{price:,}/month</div>
+            <div class="price-pln">(~{price_pln:,.2f} PLN/month)</div>
+        </div>
+        <div class="property-details">
+            🛏️ {bedrooms} beds<br>
+            🚿 {bathrooms} baths<br>
+            📏 {floor_area}{price_per_sqm}<br>
+            🏠 {property_type}<br>
+            📍 {area}, {district}<br>
+            <br>
+            {distances}
+        </div>
+""")
+
+POPUP_STYLE = dedent("""
+    <style>
+        .popup-container { padding: 5px; }
+        .property-card {
+            margin-bottom: 15px;
+            padding: 10px;
+            border: 1px solid #eee;
+            border-radius: 5px;
+            background-color: white;
+        }
+        .property-title {
+            font-weight: bold;
+            margin-bottom: 5px;
+        }
+        .property-price {
+            color: #FF4B4B;
+            font-weight: bold;
+            margin-bottom: 5px;
+        }
+        .property-details {
+            font-size: 0.9em;
+            margin-bottom: 5px;
+        }
+        .view-button {
+            background-color: #FF4B4B;
+            color: white;
+            padding: 5px 10px;
+            text-decoration: none;
+            border-radius: 3px;
+            display: inline-block;
+            margin-top: 5px;
+        }
+        .view-button:hover {
+            background-color: #FF3333;
+        }
+        .location-header {
+            background-color: #f8f9fa;
+            padding: 10px;
+            margin-bottom: 10px;
+            border-radius: 5px;
+            text-align: center;
+        }
+        .distances-list {
+            margin: 5px 0;
+            font-size: 0.9em;
+        }
+        .listing-separator {
+            height: 1px;
+            background: linear-gradient(
+                to right,
+                rgba(255, 75, 75, 0),
+                rgba(255, 75, 75, 1) 10%,
+                rgba(255, 75, 75, 1) 90%,
+                rgba(255, 75, 75, 0)
+            );
+            margin: 1rem 0;
+            border: none;
+            opacity: 0.8;
+        }
+    </style>
+""")
+
+# // Styl zawiera klamry CSS, więc jest doklejany do szablonu nagłówka, a nie formatowany
+POPUP_OPEN = '<div style="max-width:300px; overflow-y:auto;">' + POPUP_STYLE
+POPUP_HEADER_TEMPLATE = '<div class="popup-container"><div class="location-header"><h4>{area} - {count} properties</h4></div>'
+POPUP_CLOSE = '</div></div>'
+
+POPUP_CARD_TEMPLATE = dedent("""
+    <div class="property-card">
+        <div class="property-title">{name}</div>
+        <div class="property-price">฿{price:,}/month</div>
+        <div class="property-details">
+            {bedrooms} bed, {bathrooms} bath<br>
+            Size: {floor_area}
+        </div>
+        <div class='distances-list'>{distances}</div>
+        <a href="{url}" target="_blank" class="view-button">
+            View Property
+        </a>
+    </div>
+""")
+
+POPUP_SEPARATOR = '<div class="listing-separator"></div>'
+
+
+def _content_key(listing: PropertyListing, *extra) -> tuple:
+    # // Surowe pola wpływające na HTML, łącznie z odległościami - ogłoszenia z wyszukiwań w tle
+    # // i przywróconych snapshotów mają odległości do innych punktów niż bieżące punkty sesji
+    property_info, location = listing.property_info, listing.location
+    return (
+        listing.listing_info.id, hash((
+            listing.name, listing.price, listing.price_pln, listing.price_per_sqm,
+            property_info.bedrooms, property_info.bathrooms, property_info.floor_area, property_info.property_type,
+            location.area, location.district, location.coordinates, tuple(location.distances.items()),
+            listing.listing_info.url
+        ) + extra)
+    )
+
+
+def render_card(listing: PropertyListing, image_src: Optional[str], reference_version: Hashable) -> str:
+    """
+    // Zwraca HTML karty ogłoszenia (z cache, jeśli ogłoszenie i punkty referencyjne się nie zmieniły)
+    Args:
+        listing: Ogłoszenie
+        image_src: Adres obrazka (None - obrazek jest wyświetlany osobno, np. miniatura przez st.image)
+        reference_version: Wersja zestawu punktów referencyjnych (np. reference_points_key())
+    Returns:
+        str: HTML karty
+    """
+    def render() -> str:
+        property_info, location = listing.property_info, listing.location
+        return CARD_TEMPLATE.format(
+            image=IMAGE_TEMPLATE.format(image_src=image_src) if image_src else '',
+            name=listing.name,
+            price=listing.price,
+            price_pln=listing.price_pln,
+            bedrooms=property_info.bedrooms,
+            bathrooms=property_info.bathrooms,
+            floor_area=property_info.floor_area,
+            price_per_sqm=f" (฿{listing.price_per_sqm:,.0f}/sqm)" if listing.price_per_sqm else "",
+            property_type=property_info.property_type,
+            area=location.area,
+            district=location.district,
+            distances=' '.join(f'🎯 {distance:.1f} km to {name}<br>' for name, distance in location.distances.items())
+        )
+
+    key = ('card',) + _content_key(listing, image_src) + (reference_version,)
+    return get_render_cache().get_or_create(key, render, len)
+
+
+def render_popup_card(listing: PropertyListing, reference_version: Hashable) -> str:
+    """
+    // Zwraca HTML ogłoszenia w popupie mapy (z cache)
+    """
+    def render() -> str:
+        property_info = listing.property_info
+        return POPUP_CARD_TEMPLATE.format(
+            name=listing.name,
+            price=listing.price,
+            bedrooms=property_info.bedrooms,
+            bathrooms=property_info.bathrooms,
+            floor_area=property_info.floor_area,
+            distances=''.join(f"🎯 {distance:.1f} km to {name}<br>"
+                              for name, distance in listing.location.distances.items()),
+            url=listing.listing_info.url
+        )
+
+    key = ('popup_card',) + _content_key(listing) + (reference_version,)
+    return get_render_cache().get_or_create(key, render, len)
+
+
+def render_popup(area: str, listings: List[PropertyListing], reference_version: Hashable) -> str:
+    """
+    // Składa popup lokalizacji z kart ogłoszeń (jeden join zamiast doklejania w pętli)
+    Args:
+        area: Nazwa obszaru
+        listings: Ogłoszenia w tej lokalizacji
+        reference_version: Wersja zestawu punktów referencyjnych
+    Returns:
+        str: HTML popupu
+    """
+    cards = POPUP_SEPARATOR.join(render_popup_card(listing, reference_version) for listing in listings)
+    return ''.join((POPUP_OPEN, POPUP_HEADER_TEMPLATE.format(area=area, count=len(listings)), cards, POPUP_CLOSE))
@@ -0,0 +1,349 @@
+import dataclasses
+import json
+import os
+from itertools import islice
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from models import PropertyListing, Location, PropertyInfo, ListingInfo, AgentInfo
+
+# // Wersja schematu snapshotu - zwiększyć przy zmianie typu lub znaczenia kolumny.
+# // Nowe pola modeli nie wymagają zmiany wersji (brakujące kolumny dostają wartości domyślne).
+SNAPSHOT_FORMAT = "ddproperty-listings"
+SNAPSHOT_VERSION = 1
+# // Liczba ogłoszeń w jednym bloku (RecordBatch / porcja zapisu JSONL)
+BATCH_SIZE = 10_000
+COMPRESSION = "zstd"
+
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+
+# // Zagnieżdżone dataclassy PropertyListing - kolumny mają nazwy "location.district" itd.
+NESTED_MODELS = {
+    "location": Location,
+    "property_info": PropertyInfo,
+    "listing_info": ListingInfo,
+    "agent_info": AgentInfo,
+}
+
+
+def _arrow_type(annotation):
+    """
+    // Typ kolumny Arrow dla adnotacji pola dataclassy
+    """
+    import pyarrow as pa
+
+    types = {
+        Optional[str]: pa.string(),
+        Optional[int]: pa.int64(),
+        Optional[float]: pa.float64(),
+        int: pa.int64(),
+        bool: pa.bool_(),
+        List[str]: pa.list_(pa.string()),
+        Dict[str, float]: pa.map_(pa.string(), pa.float64()),
+        Optional[Tuple[float, float]]: pa.list_(pa.float64(), 2),
+    }
+    if annotation not in types:
+        raise TypeError(f"No snapshot column type for {annotation}")
+    return types[annotation]
+
+
+def _to_arrow(annotation) -> Optional[Callable]:
+    """
+    // Konwersja wartości pola przed zapisem (None jeśli niepotrzebna).
+    // Identyfikatory z JSON strony bywają liczbami - w snapshocie zawsze są tekstem.
+    """
+    if annotation == Optional[str]:
+        return lambda value: value if value is None or isinstance(value, str) else str(value)
+    return None
+
+
+def _from_arrow(annotation) -> Optional[Callable]:
+    """
+    // Konwersja wartości z to_pylist() z powrotem na typ pola (None jeśli niepotrzebna)
+    """
+    if annotation == Dict[str, float]:
+        return lambda value: dict(value) if value is not None else {}
+    if annotation == Optional[Tuple[float, float]]:
+        return lambda value: tuple(value) if value is not None else None
+    if annotation == List[str]:
+        return lambda value: value if value is not None else []
+    return None
+
+
+def _columns(model, prefix: str = "") -> List[Tuple[str, dataclasses.Field]]:
+    """
+    // Kolumny (nazwa, pole) w kolejności pól dataclassy
+    """
+    return [
+        (f"{prefix}{field.name}", field)
+        for field in dataclasses.fields(model)
+        if field.name not in NESTED_MODELS
+    ]
+
+
+# // Pola PropertyListing, a potem pola zagnieżdżonych modeli
+COLUMNS = _columns(PropertyListing) + [
+    column
+    for name, model in NESTED_MODELS.items()
+    for column in _columns(model, f"{name}.")
+]
+
+
+_GETTERS = [(name, attrgetter(name)) for name, _ in COLUMNS]
+
+
+def snapshot_schema():
+    """
+    // Schemat Arrow snapshotu (z wersją w metadanych)
+    """
+    import pyarrow as pa
+
+    return pa.schema(
+        [pa.field(name, _arrow_type(field.type)) for name, field in COLUMNS],
+        metadata={"format": SNAPSHOT_FORMAT, "version": str(SNAPSHOT_VERSION)}
+    )
+
+
+def _batches(listings: Iterable[PropertyListing], batch_size: int) -> Iterator[List[PropertyListing]]:
+    iterator = iter(listings)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def listings_to_columns(listings: List[PropertyListing]) -> Dict[str, List]:
+    """
+    // Zamienia ogłoszenia na kolumny prostych wartości (nazwy kolumn jak w COLUMNS).
+    // Taka postać jest też zwięzła do przekazywania między procesami.
+    """
+    return {name: [get(listing) for listing in listings] for name, get in _GETTERS}
+
+
+def listings_from_columns(columns: Dict[str, List], count: int) -> List[PropertyListing]:
+    """
+    // Odtwarza ogłoszenia z kolumn (brakujące kolumny dostają wartości domyślne pól)
+    """
+    values = {}
+    for name, field in COLUMNS:
+        column = columns.get(name)
+        if column is None:
+            if field.default_factory is not dataclasses.MISSING:
+                column = [field.default_factory() for _ in range(count)]
+            else:
+                column = [None if field.default is dataclasses.MISSING else field.default] * count
+        else:
+            convert = _from_arrow(field.type)
+            if convert:
+                column = [convert(value) for value in column]
+        values[name] = column
+
+    def build(model, prefix=""):
+        # // Pola są w kolejności dataclassy, więc wystarczy konstruktor pozycyjny
+        names = [name for name, _ in _columns(model, prefix)]
+        return [model(*row) for row in zip(*(values[name] for name in names))]
+
+    for name, model in NESTED_MODELS.items():
+        values[name] = build(model, f"{name}.")
+    # // Zagnieżdżone obiekty trafiają od razu do konstruktora (bez tworzenia pustych w __post_init__)
+    fields = [field.name for field in dataclasses.fields(PropertyListing)]
+    listings = [PropertyListing(*row) for row in zip(*(values[name] for name in fields))]
+    return listings
+
+
+def _check_version(format_name: Optional[str], version) -> None:
+    if format_name != SNAPSHOT_FORMAT:
+        raise ValueError(f"Not a listings snapshot (format: {format_name})")
+    if int(version) > SNAPSHOT_VERSION:
+        raise ValueError(f"Snapshot version {version} is newer than supported version {SNAPSHOT_VERSION}")
+
+
+def _listing_record(listing: PropertyListing) -> Dict:
+    """
+    // Ogłoszenie jako zagnieżdżony słownik (jak dataclasses.asdict, ale bez głębokiego kopiowania)
+    """
+    return {
+        name: vars(value) if name in NESTED_MODELS else value
+        for name, value in vars(listing).items()
+    }
+
+
+def _records_to_columns(records: List[Dict]) -> Dict[str, List]:
+    """
+    // Zamienia rekordy JSONL (zagnieżdżone słowniki) na kolumny
+    """
+    nested = {name: [record.get(name) or {} for record in records] for name in NESTED_MODELS}
+    columns = {}
+    for name, _ in COLUMNS:
+        prefix, _, key = name.rpartition(".")
+        rows = nested[prefix] if prefix else records
+        # // Starsze snapshoty nie mają nowych pól - te kolumny dostaną wartości domyślne
+        if rows and key in rows[0]:
+            columns[name] = [row.get(key) for row in rows]
+    return columns
+
+
+def is_jsonl(path: str) -> bool:
+    return path.endswith(JSONL_EXTENSIONS)
+
+
+class SnapshotWriter:
+    """
+    // Zapis snapshotu przyrostowo (np. strona po stronie w trakcie pobierania). Ogłoszenia są
+    // buforowane do pełnego bloku, a plik pojawia się pod docelową ścieżką dopiero po close().
+    """
+
+    def __init__(self, path: str, batch_size: int = BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.count = 0
+        self._tmp_path = f"{path}.tmp"
+        self._buffer: List[PropertyListing] = []
+        if is_jsonl(path):
+            self._file = open(self._tmp_path, 'w', encoding='utf-8')
+            self._file.write(json.dumps({"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION}) + "\n")
+            self._writer = None
+        else:
+            import pyarrow as pa
+
+            self._schema = snapshot_schema()
+            self._converters = [_to_arrow(field.type) for _, field in COLUMNS]
+            self._file = pa.OSFile(self._tmp_path, 'wb')
+            self._writer = pa.ipc.new_stream(
+                self._file, self._schema, options=pa.ipc.IpcWriteOptions(compression=COMPRESSION)
+            )
+
+    def write(self, listings: Iterable[PropertyListing]):
+        self._buffer.extend(listings)
+        while len(self._buffer) >= self.batch_size:
+            self._flush(self._buffer[:self.batch_size])
+            del self._buffer[:self.batch_size]
+
+    def _flush(self, batch: List[PropertyListing]):
+        if self._writer is None:
+            self._file.writelines(
+                json.dumps(_listing_record(listing), ensure_ascii=False) + "\n" for listing in batch
+            )
+        else:
+            import pyarrow as pa
+
+            columns = listings_to_columns(batch)
+            arrays = []
+            for i, (name, _) in enumerate(COLUMNS):
+                values = columns[name]
+                if self._converters[i]:
+                    values = [self._converters[i](value) for value in values]
+                arrays.append(pa.array(values, type=self._schema.field(i).type))
+            self._writer.write_batch(pa.record_batch(arrays, schema=self._schema))
+        self.count += len(batch)
+
+    def close(self):
+        """
+        // Zapisuje resztę bufora i przenosi plik na docelową ścieżkę
+        """
+        if self._buffer:
+            self._flush(self._buffer)
+            self._buffer = []
+        if self._writer is not None:
+            self._writer.close()
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        # // Przerwany zapis - usuń plik tymczasowy, istniejący snapshot zostaje bez zmian
+        if self._writer is not None:
+            self._writer.close()
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_snapshot(listings: Iterable[PropertyListing], path: str, batch_size: int = BATCH_SIZE) -> int:
+    """
+    // Zapisuje ogłoszenia strumieniowo (blok po bloku) do pliku Arrow IPC (zstd) lub JSONL
+    Args:
+        listings: Ogłoszenia (może być generator)
+        path: Ścieżka pliku; rozszerzenie .jsonl/.ndjson wybiera format JSONL
+        batch_size: Liczba ogłoszeń w bloku
+    Returns:
+        int: Liczba zapisanych ogłoszeń
+    """
+    with SnapshotWriter(path, batch_size) as writer:
+        for batch in _batches(listings, batch_size):
+            writer.write(batch)
+    return writer.count
+
+
+def iter_snapshot(path: str) -> Iterator[List[PropertyListing]]:
+    """
+    // Czyta snapshot strumieniowo - zwraca kolejne bloki ogłoszeń
+    Args:
+        path: Ścieżka pliku Arrow IPC lub JSONL
+    Returns:
+        Iterator[List[PropertyListing]]: Bloki ogłoszeń
+    """
+    if is_jsonl(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline() or "{}")
+            _check_version(header.get("format"), header.get("version", 0))
+            for lines in _batches(f, BATCH_SIZE):
+                records = [json.loads(line) for line in lines if line.strip()]
+                batch = listings_from_columns(_records_to_columns(records), len(records))
+                yield batch
+        return
+
+    import pyarrow as pa
+
+    with pa.OSFile(path, 'rb') as source, pa.ipc.open_stream(source) as reader:
+        metadata = reader.schema.metadata or {}
+        _check_version(
+            metadata.get(b"format", b"").decode() or None,
+            metadata.get(b"version", b"0").decode()
+        )
+        for record_batch in reader:
+            columns = {name: record_batch.column(name).to_pylist() for name in record_batch.schema.names}
+            batch = listings_from_columns(columns, record_batch.num_rows)
+            yield batch
+
+
+def save_snapshot(listings: Iterable[PropertyListing], path: str) -> Tuple[bool, str]:
+    """
+    // Zapisuje snapshot ogłoszeń
+    Args:
+        listings: Ogłoszenia
+        path: Ścieżka pliku (.arrow lub .jsonl)
+    Returns:
+        Tuple[bool, str]: (Sukces/Porażka, Wiadomość)
+    """
+    try:
+        count = write_snapshot(listings, path)
+        return True, f"Saved {count} listings to {path}"
+    except Exception as e:
+        error_msg = f"Error saving snapshot {path}: {str(e)}"
+        print(error_msg)
+        return False, error_msg
+
+
+def load_snapshot(path: str) -> Tuple[List[PropertyListing], Optional[str]]:
+    """
+    // Wczytuje cały snapshot ogłoszeń
+    Args:
+        path: Ścieżka pliku (.arrow lub .jsonl)
+    Returns:
+        Tuple[List[PropertyListing], Optional[str]]: (ogłoszenia, błąd)
+    """
+    try:
+        listings = []
+        for batch in iter_snapshot(path):
+            listings.extend(batch)
+        return listings, None
+    except Exception as e:
+        error_msg = f"Error loading snapshot {path}: {str(e)}"
+        print(error_msg)
+        return [], error_msg
@@ -1,12 +1,8 @@
-from typing import Tuple, Optional, Dict, List
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
-from haversine import haversine
-import time
-import ssl
-import certifi
-import geopy.geocoders
+from typing import Hashable, Tuple, Optional, Dict, List, Union
 from models import PropertyListing, Location
+from shared_cache import SharedCache, get_geocode_cache
+from reference_sets import DEFAULT_SET_NAME, ReferenceSetStore, get_reference_sets
+import metrics
 
 class LocationService:
     DEFAULT_REFERENCE_POINTS = {
@@ -28,43 +24,146 @@ class LocationService:
         }
     }
     
-    def __init__(self):
-        # // Inicjalizacja serwisu lokalizacji
-        ctx = ssl.create_default_context(cafile=certifi.where())
-        geopy.geocoders.options.default_ssl_context = ctx
+    def __init__(self, location_cache: Optional[SharedCache] = None,
+                 reference_sets: Optional[ReferenceSetStore] = None):
+        # // Klient Nominatim (z kontekstem SSL) jest tworzony przy pierwszym geokodowaniu
+        self._geolocator = None
         
-        self.geolocator = Nominatim(
-            user_agent="dd_property_scraper",
-            scheme='https',
-            timeout=10
-        )
+        # // Cache geokodowania współdzielony przez wszystkie sesje w procesie
+        self.location_cache = location_cache if location_cache is not None else get_geocode_cache()
         
-        # // Inicjalizacja cache w pamięci
-        self.location_cache = {}
+        # // Zapisane zestawy punktów i tablice odległości do centroidów obszarów
+        self.reference_sets = reference_sets if reference_sets is not None else get_reference_sets()
+        self._distance_table = None
+        self._table_points = None
         
         # // Inicjalizacja punktów referencyjnych
         self.reference_points = {}
         self.current_city = "Phuket"  # Default city
+        self.active_set = DEFAULT_SET_NAME
+        # // Wybór zestawu należy do sesji: miasto -> (nazwa zestawu, punkty) przy zmianie miasta
+        self._city_points: Dict[str, Tuple[str, Dict[str, Tuple[float, float]]]] = {}
         self.reset_to_defaults()
+        
+        # // Indeks przestrzenny współrzędnych ogłoszeń (budowany przy pierwszym zapytaniu)
+        self._listing_index = None
+        self._indexed_listings: Optional[List[PropertyListing]] = None
+        self._indexed_count = 0
+        self._indexed_version: Optional[Hashable] = None
+    
+    def copy(self) -> 'LocationService':
+        """
+        // Kopia z bieżącym miastem i punktami referencyjnymi (cache geokodowania i zestawy są wspólne).
+        // Wyszukiwania w tle liczą odległości na kopii - zmiany punktów w UI jej nie dotyczą.
+        """
+        service = LocationService(self.location_cache, self.reference_sets)
+        service.current_city = self.current_city
+        service.active_set = self.active_set
+        service.reference_points = dict(self.reference_points)
+        return service
+    
+    @property
+    def geolocator(self):
+        """
+        // Klient Nominatim - geopy, ssl i certifi ładowane dopiero przy pierwszym użyciu
+        """
+        if self._geolocator is None:
+            import ssl
+            import certifi
+            import geopy.geocoders
+            from geopy.geocoders import Nominatim
+            
+            ctx = ssl.create_default_context(cafile=certifi.where())
+            geopy.geocoders.options.default_ssl_context = ctx
+            
+            self._geolocator = Nominatim(
+                user_agent="dd_property_scraper",
+                scheme='https',
+                timeout=10
+            )
+        return self._geolocator
+    
+    @property
+    def listing_index(self):
+        if self._listing_index is None:
+            from spatial_index import SpatialIndex
+            self._listing_index = SpatialIndex()
+        return self._listing_index
     
     def reset_to_defaults(self):
         """
         // Resetuje punkty referencyjne do wartości domyślnych dla aktualnego miasta
         """
         self.reference_points = self.DEFAULT_REFERENCE_POINTS[self.current_city].copy()
+        self.active_set = DEFAULT_SET_NAME
         print(f"Reset reference points for {self.current_city}: {self.reference_points}")
     
     def set_city(self, city: str):
         """
-        // Changes the active city and resets reference points
+        // Changes the active city and restores the points this session last used there
         Args:
             city: Name of the city to switch to
         """
         if city in self.DEFAULT_REFERENCE_POINTS:
+            self._city_points[self.current_city] = (self.active_set, self.reference_points)
             self.current_city = city
-            self.reset_to_defaults()
+            if city in self._city_points:
+                self.active_set, self.reference_points = self._city_points[city]
+            else:
+                self.reset_to_defaults()
             print(f"Changed city to {city} with reference points: {self.reference_points}")
     
+    def reference_set_names(self) -> List[str]:
+        """
+        // Zwraca nazwy zestawów dostępnych w aktualnym mieście (wbudowany jako pierwszy)
+        """
+        return [DEFAULT_SET_NAME] + self.reference_sets.set_names(self.current_city)
+    
+    def use_reference_set(self, name: str) -> bool:
+        """
+        // Przełącza punkty referencyjne na zapisany zestaw aktualnego miasta
+        Args:
+            name: Nazwa zestawu
+        Returns:
+            bool: True jeśli zestaw istnieje
+        """
+        if name == DEFAULT_SET_NAME:
+            self.reset_to_defaults()
+            return True
+        points = self.reference_sets.get_set(self.current_city, name)
+        if points is None:
+            return False
+        self.reference_points = points
+        self.active_set = name
+        return True
+    
+    def save_reference_set(self, name: str) -> Tuple[bool, str]:
+        """
+        // Zapisuje aktualne punkty referencyjne jako nazwany zestaw miasta
+        Args:
+            name: Nazwa zestawu
+        Returns:
+            Tuple[bool, str]: (Sukces/Porażka, Wiadomość)
+        """
+        success, message = self.reference_sets.save_set(self.current_city, name, self.reference_points)
+        if success:
+            self.active_set = name.strip()
+        return success, message
+    
+    def delete_reference_set(self, name: str) -> bool:
+        """
+        // Usuwa zapisany zestaw (aktualne punkty zostają bez zmian)
+        Args:
+            name: Nazwa zestawu
+        Returns:
+            bool: True jeśli usunięto pomyślnie
+        """
+        if not self.reference_sets.delete_set(self.current_city, name):
+            return False
+        if self.active_set == name:
+            self.active_set = DEFAULT_SET_NAME
+        return True
+    
     def add_reference_point(self, name: str, location: str) -> Tuple[bool, str]:
         """
         // Dodaje nowy punkt referencyjny
@@ -123,6 +222,13 @@ class LocationService:
         Returns:
             Dict[str, float]: Słownik z odległościami do punktów referencyjnych
         """
+        # // Centroid znanego obszaru - odczyt z tablicy zestawu zamiast liczenia haversine
+        row = self._reference_table().lookup(coords)
+        if row is not None:
+            return {name: row[name] for name in self.reference_points}
+        
+        from haversine import haversine
+        
         distances = {}
         for name, ref_coords in self.reference_points.items():
             try:
@@ -133,6 +239,13 @@ class LocationService:
                 distances[name] = None
         return distances
 
+    def _reference_table(self):
+        # // Tablica odległości dla bieżących punktów (pobierana ponownie po każdej ich zmianie)
+        if self._table_points != self.reference_points:
+            self._table_points = dict(self.reference_points)
+            self._distance_table = self.reference_sets.distance_table(self._table_points)
+        return self._distance_table
+
     def get_location_details(self, listing: PropertyListing) -> Location:
         """
         // Pobiera szczegóły lokalizacji dla ogłoszenia
@@ -151,6 +264,12 @@ class LocationService:
             # // Złącz części adresu pomijając None/puste wartości
             address = ", ".join(filter(None, address_parts))
             
+            # // Dokładne współrzędne ze strony ogłoszenia - bez geokodowania
+            if location.exact_coordinates and location.coordinates:
+                location.distances = self.calculate_distances(location.coordinates)
+                location.address = address or location.address
+                return location
+            
             if not address:
                 return location
             
@@ -176,10 +295,14 @@ class LocationService:
         Returns:
             Tuple[float, float]: Para (szerokość, długość) geograficzna lub None
         """
+        from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
+        
         try:
             # // Sprawdź cache w pamięci
-            if location in self.location_cache:
-                return self.location_cache[location]
+            cached = self.location_cache.get(location)
+            if cached is not None:
+                metrics.GEOCODE_REQUESTS.inc(result='hit')
+                return cached
             
             # // Wyciągnij samą nazwę obszaru i dodaj ", Thailand"
             location_parts = location.split(',')
@@ -187,21 +310,27 @@ class LocationService:
             search_query = f"{area}, Thailand"
             
             # // Pobierz lokalizację z Nominatim
-            time.sleep(1)  # // Przestrzegaj limitów API
-            location_data = self.geolocator.geocode(search_query)
+            metrics.throttle_sleep(1, 'nominatim')  # // Przestrzegaj limitów API
+            with metrics.GEOCODE_SECONDS.time():
+                location_data = self.geolocator.geocode(search_query)
             
             if location_data:
+                metrics.GEOCODE_REQUESTS.inc(result='miss')
                 coords = (location_data.latitude, location_data.longitude)
                 # // Zapisz w cache oryginalną lokalizację
-                self.location_cache[location] = coords
+                self.location_cache.put(location, coords)
+                self.reference_sets.add_centroid(location, coords)
                 return coords
             
+            metrics.GEOCODE_REQUESTS.inc(result='not_found')
             return None
             
         except (GeocoderTimedOut, GeocoderUnavailable) as e:
+            metrics.GEOCODE_REQUESTS.inc(result='error')
             print(f"Error getting coordinates for {location}: {str(e)}")
             return None
         except Exception as e:
+            metrics.GEOCODE_REQUESTS.inc(result='error')
             print(f"Unexpected error getting coordinates for {location}: {str(e)}")
             return None
     
@@ -219,10 +348,98 @@ class LocationService:
                 return None
             
             # // Oblicz odległość używając Haversine
+            from haversine import haversine
             distance = haversine(coords, self.patong_beach_coords)
             return round(distance, 2)  # // Zaokrąglij do 2 miejsc po przecinku
             
         except Exception as e:
             print(f"Error calculating distance for {location}: {str(e)}")
             return None
- 
+
+    def index_listings(self, listings: List[PropertyListing], version: Optional[Hashable] = None):
+        """
+        // Buduje indeks przestrzenny ogłoszeń (pomija ogłoszenia bez współrzędnych)
+        Args:
+            listings: Lista ogłoszeń
+            version: Klucz wersji listy (np. listings_key sesji) - indeks jest przebudowywany, gdy się zmieni
+        """
+        self.listing_index.build(
+            (i, listing.location.coordinates) for i, listing in enumerate(listings)
+        )
+        self._indexed_listings = listings
+        self._indexed_count = len(listings)
+        self._indexed_version = version
+
+    def _ensure_index(self, listings: Optional[List[PropertyListing]], version: Optional[Hashable] = None):
+        if listings is None:
+            return
+        # // Bez klucza wersji: ta sama lista o tej samej długości (porównanie tożsamości z listą
+        # // trzymaną w _indexed_listings, nie z zapamiętanym id, które mogłoby trafić do nowej listy)
+        if version is not None:
+            fresh = self._indexed_version == version
+        else:
+            fresh = self._indexed_listings is listings and self._indexed_count == len(listings)
+        if not fresh:
+            self.index_listings(listings, version)
+
+    def _resolve_point(self, point: Union[str, Tuple[float, float]]) -> Tuple[float, float]:
+        if isinstance(point, str):
+            if point not in self.reference_points:
+                raise KeyError(f"Unknown reference point: {point}")
+            return self.reference_points[point]
+        return point
+
+    def listings_within(self, point: Union[str, Tuple[float, float]], radius_km: float,
+                        listings: Optional[List[PropertyListing]] = None,
+                        version: Optional[Hashable] = None) -> List[Tuple[PropertyListing, float]]:
+        """
+        // Zwraca ogłoszenia w promieniu od punktu
+        Args:
+            point: Nazwa punktu referencyjnego lub współrzędne
+            radius_km: Promień w kilometrach
+            listings: Lista ogłoszeń (indeks jest przebudowywany, jeśli lista się zmieniła)
+            version: Klucz wersji listy ogłoszeń
+        Returns:
+            List[Tuple[PropertyListing, float]]: Pary (ogłoszenie, odległość w km) od najbliższego
+        """
+        self._ensure_index(listings, version)
+        coords = self._resolve_point(point)
+        return [(self._indexed_listings[i], distance) for i, distance in self.listing_index.radius_query(coords, radius_km)]
+
+    def nearest_listings(self, point: Union[str, Tuple[float, float]], k: int = 10,
+                         listings: Optional[List[PropertyListing]] = None,
+                         version: Optional[Hashable] = None) -> List[Tuple[PropertyListing, float]]:
+        """
+        // Zwraca k ogłoszeń najbliższych punktowi
+        Args:
+            point: Nazwa punktu referencyjnego lub współrzędne
+            k: Liczba ogłoszeń
+            listings: Lista ogłoszeń (indeks jest przebudowywany, jeśli lista się zmieniła)
+            version: Klucz wersji listy ogłoszeń
+        Returns:
+            List[Tuple[PropertyListing, float]]: Pary (ogłoszenie, odległość w km) od najbliższego
+        """
+        self._ensure_index(listings, version)
+        coords = self._resolve_point(point)
+        return [(self._indexed_listings[i], distance) for i, distance in self.listing_index.nearest(coords, k)]
+
+    def filter_by_distance(self, listings: List[PropertyListing], max_distance_km: float,
+                           point_names: Optional[List[str]] = None,
+                           version: Optional[Hashable] = None) -> List[PropertyListing]:
+        """
+        // Filtruje ogłoszenia do tych w promieniu od dowolnego z wybranych punktów referencyjnych
+        Args:
+            listings: Lista ogłoszeń
+            max_distance_km: Maksymalna odległość w kilometrach
+            point_names: Nazwy punktów referencyjnych (domyślnie wszystkie)
+            version: Klucz wersji listy ogłoszeń (np. listings_key sesji)
+        Returns:
+            List[PropertyListing]: Ogłoszenia w zachowanej kolejności wejściowej
+        """
+        self._ensure_index(listings, version)
+        matched = set()
+        for name in point_names or list(self.reference_points):
+            coords = self.reference_points.get(name)
+            if coords:
+                matched.update(i for i, _ in self.listing_index.radius_query(coords, max_distance_km))
+        return [listing for i, listing in enumerate(listings) if i in matched]
@@ -0,0 +1,62 @@
+from typing import List
+from models import PropertyListing
+
+# // Bok komórki siatki w stopniach (~1.1 km szerokości geograficznej)
+GRID_CELL_DEG = 0.01
+# // Powyżej tylu ogłoszeń mapa domyślnie pokazuje siatkę zamiast markerów
+GRID_DEFAULT_MIN_LISTINGS = 500
+
+
+def grid_geojson(listings: List[PropertyListing], cell_size: float = GRID_CELL_DEG) -> dict:
+    """
+    // Agreguje ogłoszenia w regularną siatkę lat/lon: liczba ogłoszeń i mediana czynszu na komórkę.
+    // Rozmiar wyniku zależy od liczby zajętych komórek, a nie od liczby ogłoszeń.
+    Args:
+        listings: Lista ogłoszeń
+        cell_size: Bok komórki w stopniach
+    Returns:
+        dict: GeoJSON FeatureCollection z prostokątem na komórkę (właściwości count, median_price)
+    """
+    import numpy as np
+
+    located = [listing for listing in listings if listing.location.coordinates]
+    if not located:
+        return {"type": "FeatureCollection", "features": []}
+
+    coords = np.array([listing.location.coordinates for listing in located], dtype=np.float64)
+    prices = np.array([np.nan if listing.price is None else listing.price for listing in located], dtype=np.float64)
+    cells = np.floor(coords / cell_size).astype(np.int64)
+    keys, inverse, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+
+    # // Mediana w grupach: sortowanie po (komórka, cena) i odczyt środkowych elementów każdej grupy
+    priced = ~np.isnan(prices)
+    priced_cells, priced_values = inverse[priced], prices[priced]
+    order = np.lexsort((priced_values, priced_cells))
+    priced_cells, priced_values = priced_cells[order], priced_values[order]
+    priced_counts = np.bincount(priced_cells, minlength=len(keys))
+    starts = np.concatenate(([0], np.cumsum(priced_counts)[:-1]))
+    medians = np.full(len(keys), np.nan)
+    has_price = priced_counts > 0
+    lower = priced_values[(starts + (priced_counts - 1) // 2)[has_price]]
+    upper = priced_values[(starts + priced_counts // 2)[has_price]]
+    medians[has_price] = (lower + upper) / 2
+
+    features = []
+    for (lat_idx, lon_idx), count, median in zip(keys.tolist(), counts.tolist(), medians.tolist()):
+        south, west = lat_idx * cell_size, lon_idx * cell_size
+        north, east = south + cell_size, west + cell_size
+        features.append({
+            "type": "Feature",
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [[[west, south], [east, south], [east, north], [west, north], [west, south]]]
+            },
+            "properties": {
+                "count": count,
+                "median_price": None if median != median else round(median),
+                "label": f"{count} properties, median ฿{median:,.0f}/month" if median == median
+                         else f"{count} properties"
+            }
+        })
+    return {"type": "FeatureCollection", "features": features}
@@ -0,0 +1,218 @@
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Sequence, Tuple
+
+# // Domyślne przedziały histogramów czasu (w sekundach)
+DEFAULT_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 5, 10, 20, 30, 50, 100)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """
+    // Licznik rosnący (np. liczba zapytań, pobrane bajty)
+    """
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def to_prometheus(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict:
+        return {
+            "type": "counter",
+            "help": self.help_text,
+            "values": [{"labels": dict(key), "value": value} for key, value in sorted(self._values.items())]
+        }
+
+
+class Histogram:
+    """
+    // Histogram z przedziałami (np. czasy zapytań, liczba ogłoszeń na stronę)
+    """
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_TIME_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets))
+        # // Dla każdego zestawu etykiet: [liczniki przedziałów..., +Inf], suma, liczba
+        self._values: Dict[LabelKey, Dict] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+                self._values[key] = state
+            state["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        // Mierzy czas wykonania bloku with
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(_label_key(labels))
+        return state["count"] if state else 0
+
+    def total(self, **labels) -> float:
+        state = self._values.get(_label_key(labels))
+        return state["sum"] if state else 0.0
+
+    def to_prometheus(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, state["counts"]):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', repr(float(bound))))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {state['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {state['sum']}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {state['count']}")
+        return "\n".join(lines)
+
+    def to_dict(self) -> Dict:
+        return {
+            "type": "histogram",
+            "help": self.help_text,
+            "buckets": list(self.buckets),
+            "values": [
+                {
+                    "labels": dict(key),
+                    "counts": list(state["counts"]),
+                    "sum": state["sum"],
+                    "count": state["count"],
+                }
+                for key, state in sorted(self._values.items())
+            ]
+        }
+
+
+class MetricsRegistry:
+    """
+    // Rejestr metryk z eksportem do formatu tekstowego Prometheusa i JSON
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_TIME_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def reset(self):
+        """
+        // Zeruje wartości wszystkich metryk (np. przed nowym crawlem lub w testach)
+        """
+        for metric in self._metrics.values():
+            with metric._lock:
+                metric._values.clear()
+
+    def to_prometheus(self) -> str:
+        return "\n".join(metric.to_prometheus() for metric in self._metrics.values()) + "\n"
+
+    def to_dict(self) -> Dict:
+        return {name: metric.to_dict() for name, metric in self._metrics.items()}
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def write(self, path: str):
+        """
+        // Zapisuje metryki do pliku - format wybierany po rozszerzeniu (.json lub tekst Prometheusa)
+        """
+        content = self.to_json(indent=2) if path.endswith(".json") else self.to_prometheus()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+REGISTRY = MetricsRegistry()
+
+# // Metryki crawla
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "ddproperty_http_request_seconds", "Latency of HTTP requests to DDProperty by request kind")
+HTTP_REQUESTS = REGISTRY.counter(
+    "ddproperty_http_requests_total", "HTTP requests to DDProperty by request kind and status code")
+HTTP_RESPONSE_BYTES = REGISTRY.counter(
+    "ddproperty_http_response_bytes_total", "Bytes downloaded from DDProperty by request kind")
+PAGE_PARSE_SECONDS = REGISTRY.histogram(
+    "ddproperty_page_parse_seconds", "Time spent parsing a page, including JSON decode, by page kind")
+JSON_DECODE_SECONDS = REGISTRY.histogram(
+    "ddproperty_json_decode_seconds", "Time spent decoding the guruApp JSON blob")
+LISTINGS_PER_PAGE = REGISTRY.histogram(
+    "ddproperty_listings_per_page", "Listings parsed from a single result page", COUNT_BUCKETS)
+DETAIL_CACHE_REQUESTS = REGISTRY.counter(
+    "ddproperty_detail_cache_requests_total", "Listing detail cache lookups by result (hit, miss)")
+THROTTLE_SLEEP_SECONDS = REGISTRY.counter(
+    "ddproperty_throttle_sleep_seconds_total", "Time spent sleeping to respect rate limits, by reason")
+
+# // Metryki geokodowania
+GEOCODE_REQUESTS = REGISTRY.counter(
+    "geocode_requests_total", "Geocode lookups by result (hit, miss, not_found, error)")
+GEOCODE_SECONDS = REGISTRY.histogram(
+    "geocode_request_seconds", "Latency of Nominatim geocode requests (cache misses only)")
+
+
+def throttle_sleep(seconds: float, reason: str):
+    """
+    // time.sleep z rejestracją czasu spędzonego na throttlingu
+    Args:
+        seconds: Czas przerwy
+        reason: Powód przerwy (etykieta metryki)
+    """
+    THROTTLE_SLEEP_SECONDS.inc(seconds, reason=reason)
+    time.sleep(seconds)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, List
 
 @dataclass
 class Location:
@@ -12,15 +12,26 @@ class Location:
     coordinates: Optional[Tuple[float, float]] = None
     distances: Dict[str, float] = field(default_factory=dict)
     address: Optional[str] = None
+    # // True gdy współrzędne pochodzą ze strony ogłoszenia, a nie z geokodowania obszaru
+    exact_coordinates: bool = False
+
+    @property
+    def nearest_distance(self) -> Optional[float]:
+        # // Odległość do najbliższego punktu referencyjnego
+        values = [distance for distance in self.distances.values() if distance is not None]
+        return min(values) if values else None
 
 @dataclass
 class PropertyInfo:
     bedrooms: Optional[int] = None
     bathrooms: Optional[int] = None
     floor_area: Optional[str] = None
+    floor_area_sqm: Optional[float] = None
     property_type: Optional[str] = None
     furnishing: Optional[str] = None
     image_url: Optional[str] = None
+    image_urls: List[str] = field(default_factory=list)
+    amenities: List[str] = field(default_factory=list)
 
 @dataclass
 class ListingInfo:
@@ -29,6 +40,10 @@ class ListingInfo:
     position: Optional[int] = None
     status: Optional[str] = None
     variant: Optional[str] = None
+    # // Znaczniki czasu (unix) pierwszego i ostatniego wystąpienia w wynikach
+    first_seen: Optional[float] = None
+    last_seen: Optional[float] = None
+    seen_count: int = 0
 
 @dataclass
 class AgentInfo:
@@ -46,7 +61,8 @@ class AgentInfo:
 class PropertyListing:
     name: Optional[str] = None
     price: Optional[int] = None
-    price_pln: Optional[int] = None
+    price_pln: Optional[float] = None
+    price_per_sqm: Optional[float] = None
     location: Location = None
     property_info: PropertyInfo = None
     listing_info: ListingInfo = None
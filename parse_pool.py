@@ -0,0 +1,135 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+from models import PropertyListing
+import metrics
+
+# // Górny limit procesów parsera - każdy to osobny interpreter w pamięci, a pobieranie stron
+# // (limit zapytań) i tak nie nadąża za więcej niż kilkoma parserami
+MAX_PARSE_WORKERS = 4
+
+
+def available_cpus() -> int:
+    """
+    // Liczba rdzeni dostępnych dla procesu (z uwzględnieniem affinity/cgroup cpuset, nie wszystkich rdzeni hosta)
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def parse_workers_for(concurrent_crawls: int) -> int:
+    """
+    // Liczba procesów parsera dla danej liczby równoległych wyszukiwań - każde wyszukiwanie
+    // parsuje naraz jedną stronę (w trakcie pobierania następnej), więc więcej procesów stoi bezczynnie
+    Args:
+        concurrent_crawls: Liczba wyszukiwań wykonywanych jednocześnie
+    Returns:
+        int: Liczba procesów (1 - parsowanie w wątku wyszukiwania, bez puli)
+    """
+    return max(1, min(concurrent_crawls, MAX_PARSE_WORKERS, available_cpus()))
+
+
+DEFAULT_PARSE_WORKERS = min(MAX_PARSE_WORKERS, available_cpus())
+
+
+class PageRecords(NamedTuple):
+    """
+    // Wynik parsowania strony wyników w procesie parsera: ogłoszenia jako kolumny prostych
+    // wartości (bez obiektów soup i dataclass), liczba stron wyników i czas parsowania
+    """
+    columns: Dict[str, List]
+    count: int
+    total_pages: Optional[int]
+    parse_seconds: float
+
+
+_parser = None
+
+
+def parse_page_records(html: str) -> PageRecords:
+    """
+    // Parsuje stronę wyników (wykonywane w procesie parsera)
+    Args:
+        html: Treść strony wyników
+    Returns:
+        PageRecords: Zwięzłe rekordy ogłoszeń
+    """
+    global _parser
+    from dd_property_scraper import DDPropertyScraper
+    from listing_snapshot import listings_to_columns
+
+    if _parser is None:
+        _parser = DDPropertyScraper.parser()
+    start = time.perf_counter()
+    listings, soup = _parser.parse_listings_html(html)
+    total_pages = _parser.get_total_pages(soup) if soup is not None else None
+    columns = listings_to_columns(listings)
+    return PageRecords(columns, len(listings), total_pages, time.perf_counter() - start)
+
+
+def records_to_listings(records: PageRecords) -> List[PropertyListing]:
+    """
+    // Odtwarza ogłoszenia z rekordów zwróconych przez proces parsera
+    """
+    from listing_snapshot import listings_from_columns
+
+    metrics.PAGE_PARSE_SECONDS.observe(records.parse_seconds, kind='results')
+    metrics.LISTINGS_PER_PAGE.observe(records.count)
+    return listings_from_columns(records.columns, records.count)
+
+
+class ParsePool:
+    """
+    // Pula procesów parsujących HTML stron wyników. Pobieranie (wątki, limit zapytań) zostaje
+    // w procesie głównym, a parsowanie (CPU, GIL) jest rozkładane na rdzenie.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_PARSE_WORKERS):
+        self.max_workers = max_workers
+        # // spawn - proces główny ma działające wątki (pula sesji, Streamlit), więc bez fork
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def submit(self, html: str) -> "Future[PageRecords]":
+        """
+        // Zleca parsowanie strony; wynik (PageRecords) zamienia się na ogłoszenia przez records_to_listings
+        """
+        return self._executor.submit(parse_page_records, html)
+
+    def parse_many(self, pages: List[str]) -> List[List[PropertyListing]]:
+        """
+        // Parsuje wiele stron równolegle
+        Args:
+            pages: Treści stron wyników
+        Returns:
+            List[List[PropertyListing]]: Ogłoszenia z każdej strony (w kolejności stron)
+        """
+        futures = [self.submit(html) for html in pages]
+        return [records_to_listings(future.result()) for future in futures]
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+_parse_pool: Optional[ParsePool] = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool(max_workers: int = DEFAULT_PARSE_WORKERS) -> ParsePool:
+    """
+    // Zwraca współdzieloną w procesie pulę parserów
+    Args:
+        max_workers: Liczba procesów (używana przy pierwszym wywołaniu, gdy pula powstaje)
+    """
+    global _parse_pool
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ParsePool(max_workers)
+        return _parse_pool
@@ -0,0 +1,207 @@
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+from config import cache_path
+from models import PropertyListing
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listings (
+    listing_id TEXT PRIMARY KEY,
+    name TEXT,
+    area TEXT,
+    district TEXT,
+    bedrooms INTEGER,
+    property_type TEXT,
+    last_price INTEGER,
+    last_ts REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS listings_by_area ON listings (area COLLATE NOCASE, bedrooms);
+CREATE INDEX IF NOT EXISTS listings_by_district ON listings (district COLLATE NOCASE, bedrooms);
+CREATE TABLE IF NOT EXISTS observations (
+    listing_id TEXT NOT NULL,
+    ts REAL NOT NULL,
+    price INTEGER NOT NULL,
+    prev_price INTEGER,
+    PRIMARY KEY (listing_id, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS observations_by_ts ON observations (ts);
+CREATE INDEX IF NOT EXISTS price_drops_by_ts ON observations (ts, listing_id, prev_price, price)
+    WHERE price < prev_price;
+"""
+
+PENDING_SCHEMA = """
+CREATE TEMP TABLE IF NOT EXISTS pending_prices (
+    listing_id TEXT PRIMARY KEY,
+    name TEXT,
+    area TEXT,
+    district TEXT,
+    bedrooms INTEGER,
+    property_type TEXT,
+    price INTEGER
+)
+"""
+
+
+class PriceChange(NamedTuple):
+    listing_id: str
+    ts: float
+    old_price: int
+    new_price: int
+    name: Optional[str]
+    area: Optional[str]
+    bedrooms: Optional[int]
+
+    @property
+    def change_pct(self) -> float:
+        return (self.new_price - self.old_price) / self.old_price * 100 if self.old_price else 0.0
+
+
+class PriceHistoryStore:
+    """
+    // Historia cen ogłoszeń (SQLite, tylko dopisywanie). Obserwacja (czas, cena THB) jest
+    // zapisywana tylko, gdy cena się zmieniła; każdy wiersz pamięta poprzednią cenę,
+    // więc obniżki w zakresie dat są czytane z częściowego indeksu bez porównywania wierszy.
+    """
+
+    def __init__(self, db_file: str):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        # // Bieżąca porcja zapisu - porównanie z ostatnią ceną odbywa się w SQL (baza współdzielona przez procesy)
+        self._conn.execute(PENDING_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record(self, listings: Iterable[PropertyListing], seen_at: Optional[float] = None) -> int:
+        """
+        // Zapisuje ceny ogłoszeń, które są nowe lub zmieniły cenę
+        Args:
+            listings: Ogłoszenia z wyników wyszukiwania
+            seen_at: Czas obserwacji (domyślnie teraz)
+        Returns:
+            int: Liczba zapisanych obserwacji
+        """
+        seen_at = seen_at or time.time()
+        # // Ostatnie wystąpienie ogłoszenia w porcji wygrywa
+        pending = {}
+        for listing in listings:
+            listing_id = listing.listing_info.id
+            if listing_id is None or listing.price is None:
+                continue
+            pending[str(listing_id)] = (
+                str(listing_id), listing.name, listing.location.area, listing.location.district,
+                listing.property_info.bedrooms, listing.property_info.property_type, int(listing.price)
+            )
+        if not pending:
+            return 0
+
+        with self._lock:
+            # // BEGIN IMMEDIATE: porównanie i zapis w jednej transakcji zapisu, także względem innych procesów
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM pending_prices")
+                self._conn.executemany("INSERT INTO pending_prices VALUES (?, ?, ?, ?, ?, ?, ?)", pending.values())
+                recorded = self._conn.execute(
+                    "INSERT OR REPLACE INTO observations (listing_id, ts, price, prev_price) "
+                    "SELECT p.listing_id, ?, p.price, l.last_price FROM pending_prices p "
+                    "LEFT JOIN listings l ON l.listing_id = p.listing_id WHERE l.last_price IS NOT p.price",
+                    (seen_at,)
+                ).rowcount
+                self._conn.execute(
+                    "INSERT INTO listings SELECT p.listing_id, p.name, p.area, p.district, p.bedrooms, "
+                    "p.property_type, p.price, ? FROM pending_prices p "
+                    "LEFT JOIN listings l ON l.listing_id = p.listing_id WHERE l.last_price IS NOT p.price "
+                    "ON CONFLICT (listing_id) DO UPDATE SET name = excluded.name, area = excluded.area, "
+                    "district = excluded.district, bedrooms = excluded.bedrooms, "
+                    "property_type = excluded.property_type, last_price = excluded.last_price, "
+                    "last_ts = excluded.last_ts",
+                    (seen_at,)
+                )
+                self._conn.execute("DELETE FROM pending_prices")
+                self._conn.commit()
+            except Exception:
+                self._conn.rollback()
+                raise
+            return recorded
+
+    def history(self, listing_id, start: Optional[float] = None, end: Optional[float] = None) -> List[Tuple[float, int]]:
+        """
+        // Zwraca historię cen ogłoszenia
+        Args:
+            listing_id: ID ogłoszenia
+            start: Początek zakresu (unix, włącznie)
+            end: Koniec zakresu (unix, wyłącznie)
+        Returns:
+            List[Tuple[float, int]]: Pary (czas, cena THB) rosnąco po czasie
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT ts, price FROM observations WHERE listing_id = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (str(listing_id), start if start is not None else float('-inf'),
+                 end if end is not None else float('inf'))
+            ).fetchall()
+
+    def price_drops(self, since: float, until: Optional[float] = None, area: Optional[str] = None,
+                    bedrooms: Optional[int] = None, property_type: Optional[str] = None,
+                    limit: Optional[int] = None) -> List[PriceChange]:
+        """
+        // Zwraca obniżki cen w zakresie dat, od najnowszych
+        Args:
+            since: Początek zakresu (unix)
+            until: Koniec zakresu (unix, domyślnie bez ograniczenia)
+            area: Obszar lub dzielnica (np. 'Rawai'), bez rozróżniania wielkości liter
+            bedrooms: Liczba sypialni
+            property_type: Typ nieruchomości (jak w PropertyInfo.property_type)
+            limit: Maksymalna liczba wyników
+        Returns:
+            List[PriceChange]: Obniżki cen
+        """
+        query = (
+            "SELECT o.listing_id, o.ts, o.prev_price, o.price, l.name, l.area, l.bedrooms "
+            "FROM observations o JOIN listings l ON l.listing_id = o.listing_id "
+            "WHERE o.price < o.prev_price AND o.ts >= ? AND o.ts < ?"
+        )
+        args: list = [since, until if until is not None else float('inf')]
+        if area:
+            query += " AND (l.area = ? COLLATE NOCASE OR l.district = ? COLLATE NOCASE)"
+            args += [area, area]
+        if bedrooms is not None:
+            query += " AND l.bedrooms = ?"
+            args.append(bedrooms)
+        if property_type:
+            query += " AND l.property_type = ?"
+            args.append(property_type)
+        query += " ORDER BY o.ts DESC"
+        if limit:
+            query += " LIMIT ?"
+            args.append(limit)
+        with self._lock:
+            return [PriceChange(*row) for row in self._conn.execute(query, args)]
+
+    def observation_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM observations").fetchone()[0]
+
+
+_price_history: Optional[PriceHistoryStore] = None
+_price_history_lock = threading.Lock()
+
+
+def get_price_history() -> PriceHistoryStore:
+    """
+    // Zwraca współdzieloną w procesie historię cen
+    """
+    global _price_history
+    with _price_history_lock:
+        if _price_history is None:
+            _price_history = PriceHistoryStore(cache_path("price_history.sqlite3"))
+        return _price_history
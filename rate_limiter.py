@@ -0,0 +1,58 @@
+import threading
+import time
+from typing import Dict
+import metrics
+
+
+class RateLimiter:
+    """
+    // Limiter typu token bucket współdzielony przez wątki.
+    // Każde zapytanie do serwisu pobiera jeden token; brak tokenu oznacza czekanie.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, name: str = "default"):
+        self.rate = rate
+        self.burst = burst
+        self.name = name
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        // Czeka aż będzie dostępny token i go zużywa
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            metrics.throttle_sleep(wait, f"rate_limit_{self.name}")
+
+
+# // Domyślne budżety zapytań na serwis
+DEFAULT_RATES = {
+    "ddproperty": (0.5, 2),  # // 1 zapytanie / 2 s, z krótkim burstem
+}
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> RateLimiter:
+    """
+    // Zwraca współdzielony w procesie limiter dla serwisu
+    Args:
+        name: Nazwa serwisu (np. 'ddproperty')
+    Returns:
+        RateLimiter: Limiter wspólny dla wszystkich scraperów i wątków
+    """
+    with _limiters_lock:
+        if name not in _limiters:
+            rate, burst = DEFAULT_RATES.get(name, (1.0, 1))
+            _limiters[name] = RateLimiter(rate, burst, name=name)
+        return _limiters[name]
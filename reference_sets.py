@@ -0,0 +1,233 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from config import cache_path
+
+Coords = Tuple[float, float]
+
+# // Nazwa wbudowanego zestawu (LocationService.DEFAULT_REFERENCE_POINTS) - nie jest zapisywany w pliku
+DEFAULT_SET_NAME = "Default"
+# // Liczba tablic odległości trzymanych w pamięci (zestawy zapisane i doraźne)
+MAX_DISTANCE_TABLES = 32
+# // Nowe centroidy są zapisywane na dysk najwyżej raz na tyle sekund (oraz przy flush/zamknięciu procesu)
+CENTROID_SAVE_SECONDS = 30
+REFERENCE_SETS_VERSION = 1
+
+
+def points_signature(points: Dict[str, Coords]) -> tuple:
+    return tuple(sorted((name, tuple(coords)) for name, coords in points.items()))
+
+
+class DistanceTable:
+    """
+    // Odległości od stałego zestawu punktów referencyjnych do znanych centroidów obszarów
+    // (km, zaokrąglone jak w LocationService.calculate_distances). Nowe centroidy są
+    // dopisywane wektorowo, więc przełączenie zestawu nie wymaga liczenia haversine per ogłoszenie.
+    """
+
+    def __init__(self, points: Dict[str, Coords]):
+        self.points = {name: tuple(coords) for name, coords in points.items()}
+        self.rows: Dict[Coords, Dict[str, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def extend(self, centroids: Iterable[Coords]):
+        """
+        // Dolicza wiersze dla centroidów, których jeszcze nie ma w tablicy
+        Args:
+            centroids: Współrzędne centroidów obszarów
+        """
+        missing = [coords for coords in dict.fromkeys(tuple(c) for c in centroids) if coords not in self.rows]
+        if not missing or not self.points:
+            return
+
+        import numpy as np
+        from spatial_index import haversine_many
+
+        lats = np.array([coords[0] for coords in missing], dtype=np.float64)
+        lons = np.array([coords[1] for coords in missing], dtype=np.float64)
+        columns = {name: np.round(haversine_many(point, lats, lons), 2).tolist()
+                   for name, point in self.points.items()}
+        for i, coords in enumerate(missing):
+            self.rows[coords] = {name: column[i] for name, column in columns.items()}
+
+    def lookup(self, coords: Coords) -> Optional[Dict[str, float]]:
+        return self.rows.get(tuple(coords))
+
+
+class ReferenceSetStore:
+    """
+    // Nazwane zestawy punktów referencyjnych per miasto i znane centroidy obszarów
+    // (adres -> współrzędne z geokodowania), zapisywane na dysk. Wybór zestawu należy do sesji
+    // (LocationService). Dla każdego zestawu w pamięci jest tablica odległości do wszystkich centroidów.
+    """
+
+    def __init__(self, state_file: Optional[str] = None, max_tables: int = MAX_DISTANCE_TABLES,
+                 save_interval: float = CENTROID_SAVE_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.state_file = state_file or cache_path("reference_sets.json")
+        self.max_tables = max_tables
+        self.save_interval = save_interval
+        self.clock = clock
+        self._dirty = False
+        self._last_save = clock()
+        # // miasto -> nazwa zestawu -> punkty
+        self.sets: Dict[str, Dict[str, Dict[str, Coords]]] = {}
+        self.centroids: Dict[str, Coords] = {}
+        self._tables: "OrderedDict[tuple, DistanceTable]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """
+        // Wczytuje zestawy i centroidy z pliku (jeśli istnieje)
+        """
+        try:
+            if not os.path.exists(self.state_file):
+                return
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != REFERENCE_SETS_VERSION:
+                print(f"Ignoring reference sets with unsupported version {data.get('version')}")
+                return
+            self.sets = {
+                city: {name: {point: tuple(coords) for point, coords in points.items()}
+                       for name, points in sets.items()}
+                for city, sets in data.get('sets', {}).items()
+            }
+            self.centroids = {address: tuple(coords) for address, coords in data.get('centroids', {}).items()}
+        except Exception as e:
+            print(f"Error loading reference sets: {str(e)}")
+
+    def _save(self):
+        """
+        // Zapisuje zestawy i centroidy (zapis atomowy przez plik tymczasowy, poza blokadą danych)
+        """
+        # // Wywoływane bez self._lock; _save_lock porządkuje zapisy, więc starszy stan nie nadpisze nowszego
+        try:
+            with self._save_lock:
+                with self._lock:
+                    data = json.dumps({
+                        'version': REFERENCE_SETS_VERSION,
+                        'sets': self.sets,
+                        'centroids': self.centroids
+                    })
+                    self._dirty = False
+                    self._last_save = self.clock()
+                tmp_file = f"{self.state_file}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(tmp_file, self.state_file)
+        except Exception as e:
+            print(f"Error saving reference sets: {str(e)}")
+
+    def flush(self):
+        """
+        // Zapisuje centroidy dodane od ostatniego zapisu
+        """
+        if self._dirty:
+            self._save()
+
+    def set_names(self, city: str) -> List[str]:
+        with self._lock:
+            return sorted(self.sets.get(city, {}))
+
+    def get_set(self, city: str, name: str) -> Optional[Dict[str, Coords]]:
+        with self._lock:
+            points = self.sets.get(city, {}).get(name)
+            return dict(points) if points is not None else None
+
+    def save_set(self, city: str, name: str, points: Dict[str, Coords]) -> Tuple[bool, str]:
+        """
+        // Zapisuje (lub nadpisuje) zestaw punktów i od razu liczy jego tablicę odległości
+        Args:
+            city: Miasto
+            name: Nazwa zestawu
+            points: Punkty referencyjne (nazwa -> współrzędne)
+        Returns:
+            Tuple[bool, str]: (Sukces/Porażka, Wiadomość)
+        """
+        name = name.strip()
+        if not name:
+            return False, "Please enter a set name"
+        if name == DEFAULT_SET_NAME:
+            return False, f"'{DEFAULT_SET_NAME}' is reserved for the built-in points"
+        if not points:
+            return False, "Cannot save an empty set of reference points"
+
+        with self._lock:
+            self.sets.setdefault(city, {})[name] = {point: tuple(coords) for point, coords in points.items()}
+        self._save()
+        table = self.distance_table(points)
+        return True, f"Saved {len(points)} reference points as '{name}' ({len(table)} areas precomputed)"
+
+    def delete_set(self, city: str, name: str) -> bool:
+        with self._lock:
+            if self.sets.get(city, {}).pop(name, None) is None:
+                return False
+            if not self.sets[city]:
+                del self.sets[city]
+        self._save()
+        return True
+
+    def add_centroid(self, address: str, coords: Coords):
+        """
+        // Zapamiętuje centroid obszaru i dopisuje go do wszystkich tablic odległości.
+        // Plik jest zapisywany porcjami (co save_interval sekund), a nie po każdym geokodowaniu.
+        Args:
+            address: Adres geokodowanego obszaru
+            coords: Współrzędne z geokodowania
+        """
+        coords = tuple(coords)
+        with self._lock:
+            if self.centroids.get(address) == coords:
+                return
+            self.centroids[address] = coords
+            for table in self._tables.values():
+                table.extend([coords])
+            self._dirty = True
+            due = self.clock() - self._last_save >= self.save_interval
+        if due:
+            self._save()
+
+    def distance_table(self, points: Dict[str, Coords]) -> DistanceTable:
+        """
+        // Zwraca tablicę odległości dla zestawu punktów (liczoną raz dla wszystkich znanych centroidów)
+        Args:
+            points: Punkty referencyjne (nazwa -> współrzędne)
+        Returns:
+            DistanceTable: Tablica odległości
+        """
+        signature = points_signature(points)
+        with self._lock:
+            table = self._tables.get(signature)
+            if table is None:
+                table = DistanceTable(points)
+                table.extend(self.centroids.values())
+                self._tables[signature] = table
+                while len(self._tables) > self.max_tables:
+                    self._tables.popitem(last=False)
+            else:
+                self._tables.move_to_end(signature)
+            return table
+
+
+_reference_sets: Optional[ReferenceSetStore] = None
+_reference_sets_lock = threading.Lock()
+
+
+def get_reference_sets() -> ReferenceSetStore:
+    """
+    // Zwraca współdzielone w procesie zestawy punktów referencyjnych
+    """
+    global _reference_sets
+    with _reference_sets_lock:
+        if _reference_sets is None:
+            _reference_sets = ReferenceSetStore()
+            atexit.register(_reference_sets.flush)
+        return _reference_sets
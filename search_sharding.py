@@ -0,0 +1,209 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional
+from urllib.parse import quote
+from models import PropertyListing
+from listing_dedup import ListingDeduplicator
+from config import DDPROPERTY_BASE_URL
+import metrics
+
+SEARCH_BASE_URL = f"{DDPROPERTY_BASE_URL}/en/property-for-rent"
+
+CITY_REGION_CODES = {
+    "Phuket": "TH83",
+    "Bangkok": "TH10",
+    "Chiang Mai": "TH50",
+    "Chiang Rai": "TH57"
+}
+
+# // Shard z większą liczbą stron wyników jest dzielony dalej
+MAX_SHARD_PAGES = 10
+# // Maksymalna głębokość podziału (zabezpieczenie przed nieskończonym dzieleniem)
+MAX_SHARD_DEPTH = 8
+# // Liczba shardów pobieranych jednocześnie (i tak obowiązuje wspólny limit zapytań)
+SHARD_WORKERS = 4
+# // Najwęższy przedział cen (THB), który jeszcze dzielimy
+MIN_PRICE_BAND = 1000
+# // Punkt podziału przedziału cen bez górnej granicy (kolejne podziały podwajają granicę)
+OPEN_PRICE_SPLIT = 50000
+
+SHARDS_SPLIT = metrics.REGISTRY.counter(
+    "ddproperty_search_shards_total", "Search shards by outcome (crawled, split)")
+
+
+def _as_list(value) -> List:
+    # // Pojedyncza wartość filtra (np. '2' z selectboxa) traktowana jak lista
+    if value is None:
+        return []
+    return [value] if isinstance(value, (str, int)) else list(value)
+
+
+def build_search_url(params: dict, city: str = "Phuket") -> str:
+    """
+    // Buduje URL wyszukiwania na podstawie parametrów
+    Args:
+        params: Słownik z parametrami wyszukiwania
+        city: Miasto wyszukiwania
+    Returns:
+        str: Pełny URL wyszukiwania
+    """
+    region_code = CITY_REGION_CODES.get(city, 'TH83')  # Default to Phuket if not found
+    query_parts = [
+        ("freetext", city),
+        ("region_code", region_code),
+        ("market", "residential"),
+        ("search", "true"),
+    ]
+
+    if params.get("min_price"):
+        query_parts.append(("minprice", params["min_price"]))
+    if params.get("max_price"):
+        query_parts.append(("maxprice", params["max_price"]))
+    for bed in _as_list(params.get("bedrooms")):
+        query_parts.append(("beds[]", bed))
+    for bath in _as_list(params.get("bathrooms")):
+        query_parts.append(("baths[]", bath))
+    for p_type in _as_list(params.get("property_types")):
+        query_parts.append(("property_type_code[]", p_type))
+    for furn in _as_list(params.get("furnishing")):
+        query_parts.append(("furnishing[]", furn))
+    if params.get("max_size"):
+        query_parts.append(("maxsize", params["max_size"]))
+
+    query_string = "&".join(f"{k}={quote(str(v), safe='')}" for k, v in query_parts)
+    return f"{SEARCH_BASE_URL}?{query_string}"
+
+
+def split_params(params: dict) -> List[dict]:
+    """
+    // Dzieli wyszukiwanie na rozłączne pod-wyszukiwania: najpierw przedział cen na pół,
+    // a gdy jest już wąski - po typach nieruchomości, potem po liczbie sypialni. Po typach i sypialniach
+    // dzielimy tylko wartości wybrane przez użytkownika - wyliczona lista wartości pominęłaby
+    // ogłoszenia o innym typie (lub bez liczby sypialni) i shardy zwróciłyby mniej niż całe wyszukiwanie.
+    Args:
+        params: Parametry wyszukiwania
+    Returns:
+        List[dict]: Parametry pod-wyszukiwań (pusta lista, jeśli nie da się podzielić)
+    """
+    low = params.get("min_price") or 0
+    high = params.get("max_price")
+    if high is None or high - low > MIN_PRICE_BAND:
+        middle = (low + high) // 2 if high is not None else max(OPEN_PRICE_SPLIT, low * 2)
+        # // Wspólna granica może dać to samo ogłoszenie w obu połówkach - usuwa je deduplikacja
+        lower = {**params, "min_price": low or None, "max_price": middle}
+        upper = {**params, "min_price": middle, "max_price": high}
+        return [{k: v for k, v in shard.items() if v is not None} for shard in (lower, upper)]
+
+    types = _as_list(params.get("property_types"))
+    if len(types) > 1:
+        return [{**params, "property_types": [p_type]} for p_type in types]
+
+    beds = _as_list(params.get("bedrooms"))
+    if len(beds) > 1:
+        return [{**params, "bedrooms": [bed]} for bed in beds]
+
+    return []
+
+
+class ShardedSearch:
+    """
+    // Pobiera duże wyszukiwanie jako wiele płytkich pod-wyszukiwań (shardów) równolegle.
+    // Shard, który po pierwszej stronie nadal ma za dużo stron, jest dzielony dalej.
+    // Wyniki są łączone i deduplikowane po ID ogłoszenia.
+    """
+
+    def __init__(self, params: dict, city: str = "Phuket", max_shard_pages: int = MAX_SHARD_PAGES,
+                 max_workers: int = SHARD_WORKERS, max_depth: int = MAX_SHARD_DEPTH,
+                 scraper_factory: Optional[Callable] = None):
+        self.params = params
+        self.city = city
+        self.max_shard_pages = max_shard_pages
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        self.scraper_factory = scraper_factory
+        self.deduplicator = ListingDeduplicator()
+        self._lock = threading.Lock()
+        self._collected = set()
+        self.listings: List[PropertyListing] = []
+        self.pages_done = 0
+        self.pages_planned = 0
+        self.shards_crawled = 0
+
+    def _new_scraper(self):
+        if self.scraper_factory is not None:
+            return self.scraper_factory()
+        from dd_property_scraper import DDPropertyScraper
+        return DDPropertyScraper()
+
+    def run(self, on_page: Optional[Callable[[int, Optional[int], List[PropertyListing]], None]] = None,
+            stop_event: Optional[threading.Event] = None) -> List[PropertyListing]:
+        """
+        // Wykonuje wyszukiwanie
+        Args:
+            on_page: Wywoływane po każdej stronie z (pobrane strony, zaplanowane strony, nowe ogłoszenia)
+            stop_event: Ustawienie przerywa pobieranie
+        Returns:
+            List[PropertyListing]: Unikalne ogłoszenia ze wszystkich shardów
+        """
+        stop_event = stop_event or threading.Event()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="shard") as executor:
+            pending = {executor.submit(self._crawl_shard, self.params, 0, on_page, stop_event)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    children, depth = future.result()
+                    pending.update(
+                        executor.submit(self._crawl_shard, child, depth + 1, on_page, stop_event)
+                        for child in children
+                    )
+        print(f"Sharded search: {len(self.listings)} listings from {self.shards_crawled} shards, "
+              f"{self.pages_done} pages ({self.deduplicator.duplicates} duplicates)")
+        return self.listings
+
+    def _crawl_shard(self, params: dict, depth: int, on_page, stop_event: threading.Event):
+        """
+        // Pobiera jeden shard. Zwraca (pod-shardy do pobrania, głębokość) - pod-shardy tylko
+        // wtedy, gdy shard okazał się za głęboki i dało się go podzielić
+        """
+        if stop_event.is_set():
+            return [], depth
+        children = split_params(params) if depth < self.max_depth else []
+        shard_stop = threading.Event()
+        split = []
+
+        def shard_page(page: int, total_pages: Optional[int], new_listings: List[PropertyListing]):
+            if stop_event.is_set():
+                shard_stop.set()
+            if page == 1:
+                pages = total_pages or 1
+                if pages > self.max_shard_pages and children:
+                    # // Za głęboki - zbierz pierwszą stronę i podziel zamiast przechodzić całość
+                    split.extend(children)
+                    shard_stop.set()
+                else:
+                    with self._lock:
+                        self.pages_planned += pages
+            self._collect(new_listings, on_page)
+
+        url = build_search_url(params, self.city)
+        with self._new_scraper() as scraper:
+            scraper.scrape_all_pages(url, on_page=shard_page, stop_event=shard_stop)
+        SHARDS_SPLIT.inc(outcome='split' if split else 'crawled')
+        if not split:
+            with self._lock:
+                self.shards_crawled += 1
+        return split, depth
+
+    def _collect(self, new_listings: List[PropertyListing], on_page):
+        # // Łączy ogłoszenia shardu z wynikami wszystkich shardów (wywoływane z wielu wątków)
+        with self._lock:
+            added = []
+            for listing in new_listings:
+                listing = self.deduplicator.add(listing)
+                if id(listing) not in self._collected:
+                    self._collected.add(id(listing))
+                    added.append(listing)
+            self.listings.extend(added)
+            self.pages_done += 1
+            if on_page is not None:
+                on_page(self.pages_done, max(self.pages_planned, self.pages_done), added)
@@ -0,0 +1,234 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from curl_cffi import requests
+from config import cache_path, DDPROPERTY_BASE_URL, DDPROPERTY_HEADERS, DDPROPERTY_IMPERSONATE
+from rate_limiter import get_limiter
+import metrics
+
+# // Liczba rozgrzanych sesji czekających na użycie
+DEFAULT_POOL_SIZE = 2
+# // Po tym czasie ciasteczka sesji uznajemy za nieświeże i sesja jest rozgrzewana ponownie
+SESSION_MAX_AGE = 30 * 60
+REFRESH_INTERVAL = 60
+
+SESSION_POOL_REQUESTS = metrics.REGISTRY.counter(
+    "ddproperty_session_pool_requests_total", "Session pool checkouts by result (warm, cold)")
+
+
+def export_cookies(session: requests.Session) -> List[Dict]:
+    """
+    // Zamienia ciasteczka sesji na listę słowników (do zapisu w JSON)
+    """
+    return [
+        {
+            'name': cookie.name,
+            'value': cookie.value,
+            'domain': cookie.domain,
+            'path': cookie.path,
+            'expires': cookie.expires,
+            'secure': cookie.secure,
+        }
+        for cookie in session.cookies.jar
+    ]
+
+
+def import_cookies(session: requests.Session, cookies: List[Dict]):
+    """
+    // Wczytuje ciasteczka do sesji, pomijając wygasłe
+    """
+    now = time.time()
+    for cookie in cookies:
+        if cookie.get('expires') and cookie['expires'] < now:
+            continue
+        session.cookies.set(
+            cookie['name'],
+            cookie['value'],
+            domain=cookie.get('domain') or '',
+            path=cookie.get('path') or '/',
+            secure=bool(cookie.get('secure')),
+        )
+
+
+class SessionPool:
+    """
+    // Pula sesji curl_cffi z już pobranymi ciasteczkami strony głównej DDProperty.
+    // Ciasteczka są zapisywane na dysk i odświeżane w tle, więc wyszukiwanie
+    // nie czeka na wizytę na stronie głównej. Wątek odświeżania (ruch do DDProperty) działa
+    // dopiero po jawnym start() - uruchamia go dashboard przez get_crawl_worker().
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, cookie_file: Optional[str] = None,
+                 max_age: int = SESSION_MAX_AGE, refresh_interval: int = REFRESH_INTERVAL):
+        self.size = size
+        self.cookie_file = cookie_file or cache_path("ddproperty_cookies.json")
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self.rate_limiter = get_limiter("ddproperty")
+        self._lock = threading.Lock()
+        # // Rozgrzane sesje: (sesja, czas rozgrzania)
+        self._idle: List[Tuple[requests.Session, float]] = []
+        self._cookies: List[Dict] = []
+        self._cookies_time: Optional[float] = None
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+        self._load_cookies()
+
+    def _load_cookies(self):
+        try:
+            if not os.path.exists(self.cookie_file):
+                return
+            with open(self.cookie_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._cookies = data.get('cookies', [])
+            self._cookies_time = data.get('saved_at')
+        except Exception as e:
+            print(f"Error loading session cookies: {str(e)}")
+
+    def _save_cookies(self, session: requests.Session, warmed_at: float):
+        try:
+            cookies = export_cookies(session)
+            with self._lock:
+                self._cookies = cookies
+                self._cookies_time = warmed_at
+            tmp_file = f"{self.cookie_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'cookies': cookies, 'saved_at': warmed_at}, f)
+            os.replace(tmp_file, self.cookie_file)
+        except Exception as e:
+            print(f"Error saving session cookies: {str(e)}")
+
+    def _cookies_fresh(self) -> bool:
+        return bool(self._cookies) and self._cookies_time is not None and \
+            time.time() - self._cookies_time < self.max_age
+
+    def new_session(self) -> requests.Session:
+        """
+        // Tworzy nową sesję z domyślnymi nagłówkami i ostatnio zapisanymi ciasteczkami
+        """
+        session = requests.Session()
+        session.headers.update(DDPROPERTY_HEADERS)
+        import_cookies(session, self._cookies)
+        return session
+
+    def warm(self, session: Optional[requests.Session] = None) -> Optional[requests.Session]:
+        """
+        // Odwiedza stronę główną, żeby sesja dostała ciasteczka
+        Returns:
+            Optional[requests.Session]: Rozgrzana sesja lub None w przypadku błędu
+        """
+        session = session or self.new_session()
+        try:
+            self.rate_limiter.acquire()
+            with metrics.HTTP_REQUEST_SECONDS.time(kind='home'):
+                response = session.get(DDPROPERTY_BASE_URL, impersonate=DDPROPERTY_IMPERSONATE, timeout=30)
+            metrics.HTTP_REQUESTS.inc(kind='home', status=response.status_code)
+            if response.status_code != 200:
+                print(f"Error warming session: status code {response.status_code}")
+                return None
+            self._save_cookies(session, time.time())
+            return session
+        except Exception as e:
+            print(f"Error warming session: {str(e)}")
+            return None
+
+    def acquire(self) -> Tuple[requests.Session, bool]:
+        """
+        // Wydaje sesję z puli bez czekania na sieć (nie uruchamia rozgrzewania)
+        Returns:
+            Tuple[requests.Session, bool]: (sesja, czy jest rozgrzana)
+        """
+        now = time.time()
+        expired = []
+        with self._lock:
+            while self._idle:
+                session, warmed_at = self._idle.pop()
+                if now - warmed_at < self.max_age:
+                    break
+                expired.append(session)
+            else:
+                session = None
+        # // Przeterminowane sesje zamykamy poza blokadą, jak w _refresh_loop
+        for stale in expired:
+            stale.close()
+        if session is not None:
+            self._wakeup.set()
+            SESSION_POOL_REQUESTS.inc(result='warm')
+            return session, True
+
+        # // Brak rozgrzanej sesji - świeże ciasteczka z dysku też wystarczą
+        warm = self._cookies_fresh()
+        self._wakeup.set()
+        SESSION_POOL_REQUESTS.inc(result='warm' if warm else 'cold')
+        return self.new_session(), warm
+
+    def release(self, session: requests.Session, warmed: bool = True):
+        """
+        // Zwraca sesję do puli (nadmiarowe sesje są zamykane)
+        """
+        now = time.time()
+        if warmed:
+            self._save_cookies(session, now)
+        with self._lock:
+            if warmed and len(self._idle) < self.size:
+                self._idle.append((session, now))
+                return
+        session.close()
+
+    def _refresh_loop(self):
+        """
+        // Wątek w tle: usuwa przeterminowane sesje i uzupełnia pulę rozgrzanymi
+        """
+        while not self._stop.is_set():
+            now = time.time()
+            with self._lock:
+                expired = [session for session, warmed_at in self._idle if now - warmed_at >= self.max_age]
+                self._idle = [(session, warmed_at) for session, warmed_at in self._idle if now - warmed_at < self.max_age]
+                missing = self.size - len(self._idle)
+            for session in expired:
+                session.close()
+
+            for _ in range(missing):
+                if self._stop.is_set():
+                    return
+                session = self.warm()
+                if session is None:
+                    break
+                with self._lock:
+                    self._idle.append((session, time.time()))
+
+            self._wakeup.wait(self.refresh_interval)
+            self._wakeup.clear()
+
+    def start(self):
+        """
+        // Uruchamia wątek odświeżania (jeśli jeszcze nie działa)
+        """
+        with self._lock:
+            if self._refresh_thread and self._refresh_thread.is_alive():
+                return
+            self._stop.clear()
+            self._refresh_thread = threading.Thread(target=self._refresh_loop, name="session-pool", daemon=True)
+            self._refresh_thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+
+
+_session_pool: Optional[SessionPool] = None
+_session_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> SessionPool:
+    """
+    // Zwraca współdzieloną w procesie pulę sesji DDProperty
+    """
+    global _session_pool
+    with _session_pool_lock:
+        if _session_pool is None:
+            _session_pool = SessionPool()
+        return _session_pool
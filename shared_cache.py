@@ -0,0 +1,209 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+import metrics
+
+# // Limit pamięci współdzielonego cache ogłoszeń i map (MB, nadpisywany zmienną środowiskową)
+DEFAULT_LISTING_CACHE_MB = int(os.environ.get("DDPROPERTY_SHARED_CACHE_MB", "512"))
+# // Czas ważności wyników wyszukiwań (i wyliczonych z nich map/analiz) we współdzielonym cache -
+# // po nim to samo wyszukiwanie jest pobierane ponownie (s, nadpisywany zmienną środowiskową)
+DEFAULT_LISTING_TTL_SECONDS = float(os.environ.get("DDPROPERTY_SHARED_CACHE_TTL", str(6 * 60 * 60)))
+# // Limit pamięci cache wyrenderowanego HTML kart i popupów (MB)
+DEFAULT_RENDER_CACHE_MB = 64
+# // Maksymalna liczba zapamiętanych adresów w cache geokodowania
+DEFAULT_GEOCODE_CACHE_SIZE = 50_000
+# // Liczba ogłoszeń, z których szacowany jest rozmiar całej listy
+SIZE_SAMPLE = 20
+
+SHARED_CACHE_REQUESTS = metrics.REGISTRY.counter(
+    "shared_cache_requests_total", "Shared cache lookups by cache and result (hit, miss, wait)")
+SHARED_CACHE_EVICTIONS = metrics.REGISTRY.counter(
+    "shared_cache_evictions_total", "Entries evicted from shared caches, by cache")
+
+
+def deep_sizeof(obj: Any, seen: Optional[set] = None) -> int:
+    """
+    // Przybliżony rozmiar obiektu w pamięci razem z zawartością (dataclassy, słowniki, listy)
+    """
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+def estimate_listings_bytes(listings: List) -> int:
+    """
+    // Szacuje rozmiar listy ogłoszeń na podstawie próbki (bez przechodzenia całej listy)
+    Args:
+        listings: Lista obiektów PropertyListing
+    Returns:
+        int: Przybliżony rozmiar w bajtach
+    """
+    if not listings:
+        return sys.getsizeof(listings)
+    step = max(1, len(listings) // SIZE_SAMPLE)
+    sample = listings[::step][:SIZE_SAMPLE]
+    per_listing = sum(deep_sizeof(listing) for listing in sample) / len(sample)
+    return sys.getsizeof(listings) + int(per_listing * len(listings))
+
+
+class SharedCache:
+    """
+    // Współdzielony między sesjami Streamlit cache LRU z limitem łącznego rozmiaru wpisów.
+    // Wartości są tylko do odczytu - sesja, która chce je zmienić, tworzy kopię pod nowym kluczem.
+    // Równoczesne żądania tego samego klucza czekają na jedno wyliczenie.
+    // Przy ustawionym ttl wpisy starsze niż ttl sekund są traktowane jak nieobecne.
+    """
+
+    def __init__(self, max_size: int, name: str = "shared", ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.name = name
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        # // klucz -> (wartość, rozmiar, czas wygaśnięcia), od najdawniej do ostatnio używanego
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._loading: Dict[Hashable, threading.Event] = {}
+        self.total_size = 0
+
+    def _live(self, key: Hashable) -> bool:
+        # // Czy wpis istnieje i nie wygasł; wygasły jest usuwany (wywoływane pod blokadą)
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        if entry[2] is not None and entry[2] <= self.clock():
+            del self._entries[key]
+            self.total_size -= entry[1]
+            return False
+        return True
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if not self._live(key):
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key: Hashable, value: Any, size: int = 1) -> Any:
+        """
+        // Zapisuje wartość i usuwa najdawniej używane wpisy ponad limit
+        Args:
+            key: Klucz wpisu
+            value: Wartość
+            size: Rozmiar (koszt) wpisu, np. w bajtach
+        Returns:
+            Any: Zapisana wartość
+        """
+        if size > self.max_size:
+            # // Pojedynczy wpis większy niż cały cache - nie zapamiętuj
+            return value
+        with self._lock:
+            if key in self._entries:
+                self.total_size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size, self.clock() + self.ttl if self.ttl is not None else None)
+            self.total_size += size
+            while self.total_size > self.max_size and len(self._entries) > 1:
+                _, (_, old_size, _) = self._entries.popitem(last=False)
+                self.total_size -= old_size
+                SHARED_CACHE_EVICTIONS.inc(cache=self.name)
+        return value
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any],
+                      sizeof: Callable[[Any], int] = lambda value: 1) -> Any:
+        """
+        // Zwraca wartość z cache albo wylicza ją raz (inne sesje czekają na wynik)
+        Args:
+            key: Klucz wpisu
+            factory: Funkcja wyliczająca wartość (wynik pusty/None nie jest zapamiętywany)
+            sizeof: Funkcja szacująca rozmiar wartości
+        Returns:
+            Any: Wartość
+        """
+        while True:
+            with self._lock:
+                if self._live(key):
+                    self._entries.move_to_end(key)
+                    SHARED_CACHE_REQUESTS.inc(cache=self.name, result='hit')
+                    return self._entries[key][0]
+                event = self._loading.get(key)
+                if event is None:
+                    event = self._loading[key] = threading.Event()
+                    break
+            # // Inna sesja już wylicza ten wpis - poczekaj i sprawdź ponownie
+            SHARED_CACHE_REQUESTS.inc(cache=self.name, result='wait')
+            event.wait()
+
+        SHARED_CACHE_REQUESTS.inc(cache=self.name, result='miss')
+        try:
+            value = factory()
+            if value:
+                self.put(key, value, sizeof(value))
+            return value
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            event.set()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._live(key)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_size = 0
+
+
+_listing_cache: Optional[SharedCache] = None
+_geocode_cache: Optional[SharedCache] = None
+_render_cache: Optional[SharedCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_listing_cache() -> SharedCache:
+    """
+    // Zwraca współdzielony w procesie cache ogłoszeń i map (rozmiar w bajtach)
+    """
+    global _listing_cache
+    with _shared_cache_lock:
+        if _listing_cache is None:
+            _listing_cache = SharedCache(DEFAULT_LISTING_CACHE_MB * 1024 * 1024, name="listings",
+                                         ttl=DEFAULT_LISTING_TTL_SECONDS)
+        return _listing_cache
+
+
+def get_geocode_cache() -> SharedCache:
+    """
+    // Zwraca współdzielony w procesie cache geokodowania (adres -> współrzędne)
+    """
+    global _geocode_cache
+    with _shared_cache_lock:
+        if _geocode_cache is None:
+            _geocode_cache = SharedCache(DEFAULT_GEOCODE_CACHE_SIZE, name="geocode")
+        return _geocode_cache
+
+
+def get_render_cache() -> SharedCache:
+    """
+    // Zwraca współdzielony w procesie cache fragmentów HTML (karty ogłoszeń, popupy mapy)
+    """
+    global _render_cache
+    with _shared_cache_lock:
+        if _render_cache is None:
+            _render_cache = SharedCache(DEFAULT_RENDER_CACHE_MB * 1024 * 1024, name="render")
+        return _render_cache
@@ -0,0 +1,91 @@
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+from models import PropertyListing
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# // Wartości, po których można sortować ogłoszenia
+SORT_KEYS: Dict[str, Callable[[PropertyListing], Optional[float]]] = {
+    "price": lambda listing: listing.price,
+    "size": lambda listing: listing.property_info.floor_area_sqm,
+    "price_per_sqm": lambda listing: listing.price_per_sqm,
+    "distance": lambda listing: listing.location.nearest_distance,
+}
+
+# // Opcje sortowania w UI: (klucz, malejąco)
+SORT_OPTIONS: Dict[str, Tuple[str, bool]] = {
+    "price_low_high": ("price", False),
+    "price_high_low": ("price", True),
+    "size_large_small": ("size", True),
+    "size_small_large": ("size", False),
+    "price_per_sqm_low_high": ("price_per_sqm", False),
+    "price_per_sqm_high_low": ("price_per_sqm", True),
+    "distance_near_far": ("distance", False),
+}
+
+SORT_LABELS = {
+    "default": "Default",
+    "price_low_high": "Price: Low to High",
+    "price_high_low": "Price: High to Low",
+    "size_large_small": "Size: Large to Small",
+    "size_small_large": "Size: Small to Large",
+    "price_per_sqm_low_high": "Price/sqm: Low to High",
+    "price_per_sqm_high_low": "Price/sqm: High to Low",
+    "distance_near_far": "Distance: Nearest First",
+}
+
+
+class ListingSortIndex:
+    """
+    // Przechowuje permutacje sortowania ogłoszeń dla każdego klucza.
+    // Każda permutacja jest liczona raz (przy pierwszym użyciu), potem wydanie
+    // posortowanej listy to tylko O(n). Ogłoszenia bez wartości zawsze są na końcu.
+    """
+
+    def __init__(self, listings: List[PropertyListing]):
+        self.listings = listings
+        self._permutations: Dict[str, Tuple["np.ndarray", int]] = {}
+
+    def _permutation(self, key: str) -> Tuple["np.ndarray", int]:
+        """
+        // Zwraca (permutacja rosnąca, liczba ogłoszeń z wartością) dla klucza
+        """
+        if key not in self._permutations:
+            import numpy as np
+
+            get_value = SORT_KEYS[key]
+            values = np.array(
+                [np.nan if (value := get_value(listing)) is None else value for listing in self.listings],
+                dtype=np.float64
+            )
+            # // Sortowanie stabilne; NaN (brak wartości) trafia na koniec
+            order = np.argsort(values, kind='stable')
+            self._permutations[key] = (order, int(np.count_nonzero(~np.isnan(values))))
+        return self._permutations[key]
+
+    def order(self, sort_by: str) -> "np.ndarray":
+        """
+        // Zwraca indeksy ogłoszeń w kolejności wybranej opcji sortowania
+        """
+        import numpy as np
+
+        if sort_by not in SORT_OPTIONS:
+            return np.arange(len(self.listings))
+        key, descending = SORT_OPTIONS[sort_by]
+        order, present = self._permutation(key)
+        if descending:
+            return np.concatenate([order[:present][::-1], order[present:]])
+        return order
+
+    def sorted(self, sort_by: str) -> List[PropertyListing]:
+        """
+        // Zwraca ogłoszenia posortowane według wybranej opcji
+        Args:
+            sort_by: Klucz z SORT_OPTIONS (lub 'default' dla kolejności wejściowej)
+        Returns:
+            List[PropertyListing]: Posortowana lista ogłoszeń
+        """
+        if sort_by not in SORT_OPTIONS:
+            return self.listings
+        listings = self.listings
+        return [listings[i] for i in self.order(sort_by).tolist()]
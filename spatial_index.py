@@ -0,0 +1,138 @@
+import math
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+import numpy as np
+
+# // Średni promień Ziemi w km (ten sam co w bibliotece haversine)
+EARTH_RADIUS_KM = 6371.0088
+# // Rozmiar komórki siatki w stopniach (~5.5 km szerokości geograficznej)
+DEFAULT_CELL_SIZE = 0.05
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_many(point: Tuple[float, float], lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """
+    // Wektorowa odległość haversine (km) od punktu do tablicy współrzędnych
+    """
+    lat1, lon1 = np.radians(point[0]), np.radians(point[1])
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class SpatialIndex:
+    """
+    // Indeks przestrzenny na regularnej siatce lat/lon (jak geohash o stałej precyzji).
+    // Zapytania sprawdzają tylko komórki pokrywające okrąg, a dokładną odległość
+    // liczą wektorowo dla kandydatów.
+    """
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.keys: List[Hashable] = []
+        self.lats = np.empty(0, dtype=np.float64)
+        self.lons = np.empty(0, dtype=np.float64)
+        self.cells: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_size)), int(math.floor(lon / self.cell_size))
+
+    def build(self, items: Iterable[Tuple[Hashable, Tuple[float, float]]]) -> "SpatialIndex":
+        """
+        // Buduje indeks od zera
+        Args:
+            items: Pary (klucz, (szerokość, długość))
+        Returns:
+            SpatialIndex: self
+        """
+        keys, lats, lons = [], [], []
+        for key, coords in items:
+            if not coords:
+                continue
+            keys.append(key)
+            lats.append(coords[0])
+            lons.append(coords[1])
+
+        self.keys = keys
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+
+        cells: Dict[Tuple[int, int], List[int]] = {}
+        if keys:
+            rows = np.floor(self.lats / self.cell_size).astype(np.int64)
+            cols = np.floor(self.lons / self.cell_size).astype(np.int64)
+            for i, cell in enumerate(zip(rows.tolist(), cols.tolist())):
+                cells.setdefault(cell, []).append(i)
+        self.cells = {cell: np.asarray(indices, dtype=np.int64) for cell, indices in cells.items()}
+        return self
+
+    def _candidates(self, point: Tuple[float, float], radius_km: float) -> np.ndarray:
+        """
+        // Zwraca indeksy punktów z komórek pokrywających okrąg o danym promieniu
+        """
+        lat_span = radius_km / KM_PER_DEGREE_LAT
+        cos_lat = max(math.cos(math.radians(min(abs(point[0]) + lat_span, 89.9))), 1e-6)
+        lon_span = lat_span / cos_lat
+
+        min_row, min_col = self._cell(point[0] - lat_span, point[1] - lon_span)
+        max_row, max_col = self._cell(point[0] + lat_span, point[1] + lon_span)
+
+        # // Przy dużym promieniu taniej przejrzeć zajęte komórki niż cały prostokąt
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self.cells):
+            found = [
+                indices for (row, col), indices in self.cells.items()
+                if min_row <= row <= max_row and min_col <= col <= max_col
+            ]
+        else:
+            found = [
+                self.cells[(row, col)]
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)
+                if (row, col) in self.cells
+            ]
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def radius_query(self, point: Tuple[float, float], radius_km: float) -> List[Tuple[Hashable, float]]:
+        """
+        // Zwraca wszystkie punkty w promieniu od punktu
+        Args:
+            point: Współrzędne (szerokość, długość)
+            radius_km: Promień w kilometrach
+        Returns:
+            List[Tuple[Hashable, float]]: Pary (klucz, odległość w km) posortowane po odległości
+        """
+        candidates = self._candidates(point, radius_km)
+        if not len(candidates):
+            return []
+        distances = haversine_many(point, self.lats[candidates], self.lons[candidates])
+        mask = distances <= radius_km
+        matched, matched_distances = candidates[mask], distances[mask]
+        order = np.argsort(matched_distances, kind='stable')
+        return [(self.keys[i], round(float(d), 2)) for i, d in zip(matched[order].tolist(), matched_distances[order].tolist())]
+
+    def nearest(self, point: Tuple[float, float], k: int = 1,
+                max_radius_km: Optional[float] = None) -> List[Tuple[Hashable, float]]:
+        """
+        // Zwraca k najbliższych punktów (promień wyszukiwania rośnie aż do znalezienia k punktów)
+        Args:
+            point: Współrzędne (szerokość, długość)
+            k: Liczba punktów
+            max_radius_km: Opcjonalny limit odległości
+        Returns:
+            List[Tuple[Hashable, float]]: Pary (klucz, odległość w km) posortowane po odległości
+        """
+        if not self.keys or k <= 0:
+            return []
+
+        radius = self.cell_size * KM_PER_DEGREE_LAT
+        while True:
+            if max_radius_km is not None:
+                radius = min(radius, max_radius_km)
+            results = self.radius_query(point, radius)
+            # // Wynik jest pewny gdy mamy k punktów w promieniu albo przejrzeliśmy wszystko
+            if len(results) >= k or len(results) == len(self.keys) or \
+                    (max_radius_km is not None and radius >= max_radius_km):
+                return results[:k]
+            radius *= 2
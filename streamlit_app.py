@@ -1,97 +1,39 @@
 import streamlit as st
-from dd_property_scraper import DDPropertyScraper
 from location_service import LocationService
-import folium
-from streamlit_folium import st_folium
-from typing import List
+from typing import List, Optional
 from models import PropertyListing
 from currency_service import CurrencyService
+# // Scraper, folium i cache miniatur są importowane dopiero tam, gdzie są potrzebne,
+# // żeby pierwszy ekran aplikacji renderował się bez ładowania ciężkich bibliotek
+from sort_index import ListingSortIndex, SORT_LABELS
+from config import cache_path
+from shared_cache import get_listing_cache, estimate_listings_bytes
+from crawl_jobs import CrawlJob, get_crawl_worker
+import search_sharding
+import dataclasses
+import json
+import os
+import re
+import time
+import uuid
+import metrics
 
 def build_search_url(params: dict) -> str:
     """
-    // Buduje URL wyszukiwania na podstawie parametrów
+    // Buduje URL wyszukiwania dla miasta wybranego w sesji
     Args:
         params: Słownik z parametrami wyszukiwania
     Returns:
         str: Pełny URL wyszukiwania
     """
-    base_url = "https://www.ddproperty.com/en/property-for-rent"
-    query_parts = []
-    
-    # // Add city and corresponding region code
-    city_region_codes = {
-        "Phuket": "TH83",
-        "Bangkok": "TH10",
-        "Chiang Mai": "TH50",
-        "Chiang Rai": "TH57"
-    }
-    
-    # // Get the current city from session state
-    current_city = st.session_state.get('current_city', 'Phuket')
-    region_code = city_region_codes.get(current_city, 'TH83')  # Default to Phuket if not found
-    
-    # // Add city-specific parameters
-    query_parts.append(("freetext", current_city))
-    query_parts.append(("region_code", region_code))
-    query_parts.append(("market", "residential"))
-    query_parts.append(("search", "true"))
-    
-    # // Add remaining parameters if they are set
-    if params.get("min_price"):
-        query_parts.append(("minprice", params["min_price"]))
-        
-    if params.get("max_price"):
-        query_parts.append(("maxprice", params["max_price"]))
-        
-    if params.get("bedrooms"):
-        for bed in params["bedrooms"]:
-            query_parts.append(("beds[]", bed))
-            
-    if params.get("bathrooms"):
-        for bath in params["bathrooms"]:
-            query_parts.append(("baths[]", bath))
-            
-    if params.get("property_types"):
-        for p_type in params["property_types"]:
-            query_parts.append(("property_type_code[]", p_type))
-            
-    if params.get("furnishing"):
-        for furn in params["furnishing"]:
-            query_parts.append(("furnishing[]", furn))
-            
-    if params.get("max_size"):
-        query_parts.append(("maxsize", params["max_size"]))
-    
-    # // Join all parameters into URL
-    query_string = "&".join(f"{k}={v}" for k, v in query_parts)
-    return f"{base_url}?{query_string}"
+    return search_sharding.build_search_url(params, st.session_state.get('current_city', 'Phuket'))
 
-def scrape_listings(max_pages: int = None, search_params: dict = None) -> List[PropertyListing]:
+def create_base_map():
     """
-    // Pobiera ogłoszenia z DD Property i oblicza odległości
+    // Tworzy mapę wyśrodkowaną na mieście sesji z punktami referencyjnymi
     """
-    scraper = DDPropertyScraper()
-    location_service = st.session_state['location_service']
-    
-    # // Użyj parametrów wyszukiwania do zbudowania URL
-    base_url = build_search_url(search_params or {})
-    listings = scraper.scrape_all_pages(base_url, max_pages=max_pages)
+    import folium
     
-    # // Dodaj informacje o lokalizacji i odległościach
-    for listing in listings:
-        # // Upewnij się, że mamy wszystkie odległości
-        location_service.get_location_details(listing)
-        
-        # // Debug print
-        print(f"\nListing: {listing.name}")
-        print("Distances:", listing.location.distances)
-    
-    return listings
-
-def create_map(listings: List[PropertyListing]):
-    """
-    // Tworzy mapę z zaznaczonymi lokalizacjami
-    """
     # // Define city center coordinates
     city_centers = {
         "Phuket": [7.9519, 98.3381],
@@ -125,6 +67,18 @@ def create_map(listings: List[PropertyListing]):
             icon=folium.Icon(color='blue', icon='info-sign')
         ).add_to(m)
     
+    return m
+
+def create_map(listings: List[PropertyListing]):
+    """
+    // Tworzy mapę z zaznaczonymi lokalizacjami
+    """
+    import folium
+    from listing_render import render_popup
+    
+    m = create_base_map()
+    reference_version = reference_points_key()
+    
     # // Group listings by coordinates
     location_groups = {}
     for listing in listings:
@@ -146,99 +100,8 @@ def create_map(listings: List[PropertyListing]):
         coords = location_data['coordinates']
         area = location_data['area']
         
-        # // Create HTML for popup with multiple listings
-        popup_html = f"""
-            <div style="max-width:300px; overflow-y:auto;">
-                <style>
-                    .popup-container {{ padding: 5px; }}
-                    .property-card {{
-                        margin-bottom: 15px;
-                        padding: 10px;
-                        border: 1px solid #eee;
-                        border-radius: 5px;
-                        background-color: white;
-                    }}
-                    .property-title {{
-                        font-weight: bold;
-                        margin-bottom: 5px;
-                    }}
-                    .property-price {{
-                        color: #FF4B4B;
-                        font-weight: bold;
-                        margin-bottom: 5px;
-                    }}
-                    .property-details {{
-                        font-size: 0.9em;
-                        margin-bottom: 5px;
-                    }}
-                    .view-button {{
-                        background-color: #FF4B4B;
-                        color: white;
-                        padding: 5px 10px;
-                        text-decoration: none;
-                        border-radius: 3px;
-                        display: inline-block;
-                        margin-top: 5px;
-                    }}
-                    .view-button:hover {{
-                        background-color: #FF3333;
-                    }}
-                    .location-header {{
-                        background-color: #f8f9fa;
-                        padding: 10px;
-                        margin-bottom: 10px;
-                        border-radius: 5px;
-                        text-align: center;
-                    }}
-                    .distances-list {{
-                        margin: 5px 0;
-                        font-size: 0.9em;
-                    }}
-                    .listing-separator {{
-                        height: 1px;
-                        background: linear-gradient(
-                            to right,
-                            rgba(255, 75, 75, 0),
-                            rgba(255, 75, 75, 1) 10%,
-                            rgba(255, 75, 75, 1) 90%,
-                            rgba(255, 75, 75, 0)
-                        );
-                        margin: 1rem 0;
-                        border: none;
-                        opacity: 0.8;
-                    }}
-                </style>
-                <div class="popup-container">
-                    <div class="location-header">
-                        <h4>{area} - {len(listings)} properties</h4>
-                    </div>
-        """
-        
-        for i, listing in enumerate(listings):
-            distances_html = "<div class='distances-list'>"
-            for loc_name, distance in listing.location.distances.items():
-                distances_html += f"🎯 {distance:.1f} km to {loc_name}<br>"
-            distances_html += "</div>"
-            
-            popup_html += f"""
-                <div class="property-card">
-                    <div class="property-title">{listing.name}</div>
-                    <div class="property-price">฿{listing.price:,}/month</div>
-                    <div class="property-details">
-                        {listing.property_info.bedrooms} bed, {listing.property_info.bathrooms} bath<br>
-                        Size: {listing.property_info.floor_area}
-                    </div>
-                    {distances_html}
-                    <a href="{listing.listing_info.url}" target="_blank" class="view-button">
-                        View Property
-                    </a>
-                </div>
-            """
-            # Add separator between cards, but not after the last one
-            if i < len(listings) - 1:
-                popup_html += '<div class="listing-separator"></div>'
-        
-        popup_html += "</div></div>"
+        # // Popup z kart zapamiętanych w cache renderowania (wspólnego z innymi mapami i sesjami)
+        popup_html = render_popup(area, listings, reference_version)
         
         # // Create marker with icon showing number of listings
         icon = folium.DivIcon(
@@ -262,6 +125,46 @@ def create_map(listings: List[PropertyListing]):
     
     return m
 
+def create_grid_map(listings: List[PropertyListing]):
+    """
+    // Tworzy mapę z siatką komórek (liczba ogłoszeń, mediana czynszu) jako jedną warstwą GeoJSON
+    """
+    import folium
+    from branca.colormap import LinearColormap
+    from map_grid import grid_geojson
+    
+    m = create_base_map()
+    grid = grid_geojson(listings)
+    prices = [feature['properties']['median_price'] for feature in grid['features']
+              if feature['properties']['median_price'] is not None]
+    if not prices:
+        return m
+    
+    colormap = LinearColormap(
+        ['#ffffb2', '#fd8d3c', '#bd0026'],
+        vmin=min(prices),
+        vmax=max(prices) if max(prices) > min(prices) else min(prices) + 1,
+        caption="Median rent (THB/month)"
+    )
+    
+    def style(feature):
+        median_price = feature['properties']['median_price']
+        return {
+            'fillColor': colormap(median_price) if median_price is not None else '#999999',
+            'color': '#555555',
+            'weight': 1,
+            'fillOpacity': 0.6
+        }
+    
+    folium.GeoJson(
+        grid,
+        name="Listings grid",
+        style_function=style,
+        tooltip=folium.GeoJsonTooltip(fields=['label'], labels=False)
+    ).add_to(m)
+    colormap.add_to(m)
+    return m
+
 def sort_listings(listings: List[PropertyListing], sort_by: str) -> List[PropertyListing]:
     """
     // Sortuje listę ogłoszeń według wybranego kryterium
@@ -271,11 +174,227 @@ def sort_listings(listings: List[PropertyListing], sort_by: str) -> List[Propert
     Returns:
         List[PropertyListing]: Posortowana lista ogłoszeń
     """
-    if sort_by == "price_low_high":
-        return sorted(listings, key=lambda x: x.price or float('inf'))
-    elif sort_by == "price_high_low":
-        return sorted(listings, key=lambda x: x.price or float('-inf'), reverse=True)
-    return listings
+    return ListingSortIndex(listings).sorted(sort_by)
+
+def get_sort_index(listings: List[PropertyListing], listings_key: tuple) -> ListingSortIndex:
+    """
+    // Zwraca indeks sortowania z session_state, przebudowując go tylko gdy zmieniły się
+    // ogłoszenia lub punkty referencyjne (od których zależy sortowanie po odległości)
+    Args:
+        listings: Ogłoszenia sesji
+        listings_key: Klucz wersji ogłoszeń (st.session_state['listings_key'])
+    """
+    version = (listings_key, reference_points_key())
+    if st.session_state.get('sort_index_version') != version:
+        st.session_state['sort_index'] = ListingSortIndex(listings)
+        st.session_state['sort_index_version'] = version
+    return st.session_state['sort_index']
+
+def reference_points_key() -> tuple:
+    """
+    // Klucz zestawu punktów referencyjnych sesji (miasto + punkty), od którego zależą odległości
+    """
+    location_service = st.session_state['location_service']
+    return (location_service.current_city, tuple(sorted(location_service.reference_points.items())))
+
+def search_cache_key(max_pages: int, search_params: dict, enrich_details: bool) -> tuple:
+    """
+    // Klucz wyszukiwania we współdzielonym cache (te same parametry = te same wyniki)
+    """
+    return (
+        st.session_state.get('current_city', 'Phuket'),
+        max_pages,
+        enrich_details,
+        json.dumps(search_params, sort_keys=True)
+    )
+
+def show_listings(listings: List[PropertyListing], listings_key: tuple):
+    """
+    // Ustawia ogłoszenia sesji i mapę - mapa jest budowana raz dla danego klucza i współdzielona
+    """
+    st.session_state['listings'] = listings
+    st.session_state['listings_key'] = listings_key
+    st.session_state['map'] = get_listing_cache().get_or_create(
+        ('map',) + listings_key,
+        lambda: create_map(listings),
+        lambda _: estimate_listings_bytes(listings)
+    )
+
+def show_area_analytics(listings: List[PropertyListing]):
+    """
+    // Zestawienia czynszów po obszarze, dzielnicy i liczbie sypialni. Liczone raz na wersję
+    // zbioru ogłoszeń (klucz wyszukiwania), nie przy każdym przebiegu skryptu
+    """
+    from area_analytics import GROUPINGS, analytics_bytes, area_analytics
+    
+    dataset_key = st.session_state['listings_key'][0]
+    analytics = get_listing_cache().get_or_create(
+        ('analytics', dataset_key),
+        lambda: area_analytics(listings),
+        analytics_bytes
+    )
+    if not analytics:
+        st.caption("No listings to analyze")
+        return
+    
+    column_config = {
+        "listings": st.column_config.NumberColumn("Listings"),
+        "median_rent": st.column_config.NumberColumn("Median rent (THB)", format="%.0f"),
+        "p25_rent": st.column_config.NumberColumn("P25 rent (THB)", format="%.0f"),
+        "p75_rent": st.column_config.NumberColumn("P75 rent (THB)", format="%.0f"),
+        "median_price_per_sqm": st.column_config.NumberColumn("Median THB/sqm", format="%.0f"),
+    }
+    for tab, name in zip(st.tabs(list(GROUPINGS)), GROUPINGS):
+        with tab:
+            st.dataframe(analytics[name], column_config=column_config, use_container_width=True)
+
+def update_distances():
+    """
+    // Przelicza odległości po zmianie punktów referencyjnych. Ogłoszenia ze współdzielonego
+    // cache nie są modyfikowane - powstaje kopia (z nowymi obiektami Location) pod nowym kluczem
+    """
+    if 'listings' not in st.session_state:
+        return
+    location_service = st.session_state['location_service']
+    source = st.session_state['listings']
+    
+    def relocate():
+        listings = [
+            dataclasses.replace(listing, location=dataclasses.replace(listing.location))
+            for listing in source
+        ]
+        for listing in listings:
+            location_service.get_location_details(listing)
+        return listings
+    
+    search_key = st.session_state['listings_key'][0]
+    listings_key = (search_key, reference_points_key())
+    listings = get_listing_cache().get_or_create(('listings',) + listings_key, relocate, estimate_listings_bytes)
+    show_listings(listings, listings_key)
+
+# // Co ile sekund odświeżany jest pasek postępu wyszukiwania w tle
+CRAWL_POLL_SECONDS = 1.0
+# // Maksymalna liczba obniżek cen pokazywanych w panelu
+PRICE_DROPS_LIMIT = 200
+# // Snapshoty wyników kart, których nikt nie otwierał przez tydzień, są usuwane
+SNAPSHOT_MAX_AGE = 7 * 24 * 60 * 60
+SNAPSHOT_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+# // Karty ogłoszeń na stronie siatki - miniatury są pobierane w tle tylko dla widocznej strony
+CARDS_PER_PAGE = 30
+
+def sync_crawl_job():
+    """
+    // Przenosi do sesji częściowe wyniki wyszukiwania w tle (po każdej nowej stronie),
+    // a po jego zakończeniu zapisuje wyniki tak jak wyniki zwykłego wyszukiwania
+    Returns:
+        CrawlJob: Trwające zadanie sesji lub None
+    """
+    job_id = st.session_state.get('crawl_job_id')
+    job = get_crawl_worker().get(job_id) if job_id else None
+    if job is None:
+        st.session_state.pop('crawl_job_id', None)
+        return None
+    
+    if job.finished:
+        del st.session_state['crawl_job_id']
+        listings = None
+        if job.status == 'done' and job.listings:
+            listings = get_listing_cache().get_or_create(('listings',) + job.key, job.snapshot, estimate_listings_bytes)
+        if listings:
+            show_listings(listings, job.key)
+            from listing_snapshot import save_snapshot
+            save_snapshot(listings, last_search_snapshot_path(create=True))
+            st.success(f'Found {len(listings)} properties!')
+        elif job.status == 'failed':
+            st.error(job.error)
+        elif job.status == 'cancelled':
+            st.warning(f"Search cancelled after {job.page} pages ({len(job.listings)} properties)")
+        else:
+            st.error("No properties found. Please try again.")
+        return None
+    
+    if job.page != st.session_state.get('crawl_page_shown'):
+        st.session_state['crawl_page_shown'] = job.page
+        listings = job.snapshot()
+        if listings:
+            st.session_state['listings'] = listings
+            st.session_state['listings_key'] = (('crawl', job.id, job.page), job.key[1])
+            st.session_state['map'] = create_map(listings)
+    return job
+
+@st.fragment(run_every=CRAWL_POLL_SECONDS)
+def crawl_progress(job: CrawlJob):
+    """
+    // Pasek postępu wyszukiwania w tle - odświeżany sam, pełny przebieg skryptu tylko po nowej stronie
+    """
+    if job.finished or job.page != st.session_state.get('crawl_page_shown'):
+        st.rerun()
+    
+    if job.status == 'queued':
+        text = "Waiting for a free crawl worker..."
+    elif job.status == 'enriching':
+        text = f"Fetching detail pages for {len(job.listings)} properties..."
+    else:
+        text = f"Fetching page {job.page + 1} of {job.total_pages or job.max_pages or '?'} ({len(job.listings)} properties so far)"
+    st.progress(job.progress, text=text)
+    if st.button("⏹️ Cancel search"):
+        job.cancel()
+
+def last_search_snapshot_path(create: bool = False) -> Optional[str]:
+    """
+    // Plik ze snapshotem wyników ostatniego wyszukiwania tej karty przeglądarki.
+    // Identyfikator jest w parametrze URL, więc odświeżenie strony lub restart aplikacji
+    // przywraca wyniki tylko tej karcie, a nowe sesje zaczynają bez cudzych wyników.
+    Args:
+        create: Nadaj identyfikator, jeśli karta jeszcze go nie ma
+    Returns:
+        Optional[str]: Ścieżka pliku lub None (brak identyfikatora)
+    """
+    snapshot_id = st.query_params.get('snapshot')
+    if not snapshot_id or not SNAPSHOT_ID_PATTERN.fullmatch(snapshot_id):
+        if not create:
+            return None
+        snapshot_id = uuid.uuid4().hex
+        st.query_params['snapshot'] = snapshot_id
+        path = cache_path("snapshots", f"search_{snapshot_id}.arrow")
+        prune_snapshots(os.path.dirname(path))
+        return path
+    return cache_path("snapshots", f"search_{snapshot_id}.arrow")
+
+def prune_snapshots(directory: str):
+    """
+    // Usuwa snapshoty wyszukiwań nieużywane dłużej niż SNAPSHOT_MAX_AGE
+    """
+    cutoff = time.time() - SNAPSHOT_MAX_AGE
+    try:
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.startswith("search_") and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+    except OSError as e:
+        print(f"Error pruning snapshots: {str(e)}")
+
+def restore_last_search():
+    """
+    // Wczytuje wyniki ostatniego wyszukiwania tej karty do session_state, jeśli zapisano snapshot
+    """
+    path = last_search_snapshot_path()
+    if path is None or not os.path.exists(path):
+        return
+    from listing_snapshot import load_snapshot
+    
+    def load():
+        listings, error = load_snapshot(path)
+        return None if error else listings
+    
+    # // Odległości w snapshocie policzono dla punktów z chwili zapisu
+    listings_key = (('snapshot', path, os.path.getmtime(path)), 'saved')
+    listings = get_listing_cache().get_or_create(('listings',) + listings_key, load, estimate_listings_bytes)
+    if listings:
+        show_listings(listings, listings_key)
+        # // Przywrócony snapshot jest w użyciu - nie usuwaj go w prune_snapshots
+        os.utime(path)
+        print(f"Restored {len(listings)} listings from {path}")
 
 def main():
     st.set_page_config(
@@ -293,6 +412,10 @@ def main():
     if 'currency_service' not in st.session_state:
         st.session_state['currency_service'] = CurrencyService()
     
+    # // Po odświeżeniu karty lub restarcie pokaż jej wyniki ostatniego wyszukiwania
+    if 'listings' not in st.session_state:
+        restore_last_search()
+    
     # // Custom CSS
     st.markdown("""
         <style>
@@ -425,11 +548,23 @@ def main():
             help="Choose whether to scrape a specific number of pages or all available pages"
         )
         
+        sharded = False
         if scrape_mode == "Specific pages":
             max_pages = st.number_input("Number of pages to scrape", min_value=1, value=1)
         else:
             max_pages = None
             st.info("Will scrape all available pages")
+            sharded = st.checkbox(
+                "Split into parallel sub-searches",
+                value=False,
+                help="Splits large searches by price band (then property type and bedrooms) and crawls the parts in parallel. Results are merged and deduplicated"
+            )
+        
+        enrich_details = st.checkbox(
+            "Fetch listing detail pages",
+            value=False,
+            help="Slower first search, but gives exact coordinates, amenities and full galleries. Detail pages are cached until the price changes"
+        )
         st.markdown('</div>', unsafe_allow_html=True)
         st.markdown('<hr class="section-separator">', unsafe_allow_html=True)
         
@@ -571,17 +706,9 @@ def main():
         st.markdown('<div class="sidebar-section">', unsafe_allow_html=True)
         st.subheader("📊 Sort Properties")
         sort_option = st.selectbox(
-            "Sort by price",
-            options=[
-                "default",
-                "price_low_high",
-                "price_high_low"
-            ],
-            format_func=lambda x: {
-                "default": "Default",
-                "price_low_high": "Price: Low to High",
-                "price_high_low": "Price: High to Low"
-            }[x]
+            "Sort by",
+            options=list(SORT_LABELS),
+            format_func=lambda x: SORT_LABELS[x]
         )
         st.markdown('</div>', unsafe_allow_html=True)
         st.markdown('<hr class="section-separator">', unsafe_allow_html=True)
@@ -604,9 +731,7 @@ def main():
                         st.success(message)
                         if 'listings' in st.session_state:
                             with st.spinner('Updating distances...'):
-                                for listing in st.session_state['listings']:
-                                    st.session_state['location_service'].get_location_details(listing)
-                                st.session_state['map'] = create_map(st.session_state['listings'])
+                                update_distances()
                             st.rerun()
                     else:
                         st.error(message)
@@ -628,9 +753,7 @@ def main():
                             st.session_state['location_service'].reset_to_defaults()
                         if 'listings' in st.session_state:
                             with st.spinner('Updating distances...'):
-                                for listing in st.session_state['listings']:
-                                    st.session_state['location_service'].get_location_details(listing)
-                                st.session_state['map'] = create_map(st.session_state['listings'])
+                                update_distances()
                         st.rerun()
         
         # // Reset button moved here, after displaying current points
@@ -638,10 +761,57 @@ def main():
             st.session_state['location_service'].reset_to_defaults()
             if 'listings' in st.session_state:
                 with st.spinner('Updating distances...'):
-                    for listing in st.session_state['listings']:
-                        st.session_state['location_service'].get_location_details(listing)
-                    st.session_state['map'] = create_map(st.session_state['listings'])
+                    update_distances()
             st.rerun()
+
+        # // Saved reference sets (distances come from precomputed per-area tables)
+        with st.expander("💾 Saved Reference Sets", expanded=False):
+            location_service = st.session_state['location_service']
+            set_names = location_service.reference_set_names()
+            active_set = location_service.active_set
+            selected_set = st.selectbox(
+                "Reference set",
+                options=set_names,
+                index=set_names.index(active_set) if active_set in set_names else 0,
+                key=f"reference_set_{location_service.current_city}"
+            )
+            col1, col2 = st.columns(2)
+            with col1:
+                if st.button("Use Set"):
+                    if location_service.use_reference_set(selected_set):
+                        if 'listings' in st.session_state:
+                            with st.spinner('Updating distances...'):
+                                update_distances()
+                        st.rerun()
+            with col2:
+                if st.button("Delete Set", disabled=selected_set == set_names[0]):
+                    location_service.delete_reference_set(selected_set)
+                    st.rerun()
+            new_set_name = st.text_input("Save current points as", value="" if active_set == set_names[0] else active_set)
+            if st.button("Save Set"):
+                success, message = location_service.save_reference_set(new_set_name)
+                if success:
+                    st.success(message)
+                else:
+                    st.error(message)
+        st.markdown('</div>', unsafe_allow_html=True)
+        st.markdown('<hr class="section-separator">', unsafe_allow_html=True)
+        
+        # // Distance filter (radius query on the spatial index)
+        st.markdown('<div class="sidebar-section">', unsafe_allow_html=True)
+        st.subheader("📏 Distance Filter")
+        max_distance = st.number_input(
+            "Max distance (km)",
+            min_value=0.0,
+            value=0.0,
+            step=0.5,
+            help="Show only properties within this distance of a selected reference point. Leave as 0 for no limit"
+        )
+        distance_points = st.multiselect(
+            "From reference points",
+            options=list(st.session_state['location_service'].reference_points),
+            default=list(st.session_state['location_service'].reference_points)
+        )
         st.markdown('</div>', unsafe_allow_html=True)
         st.markdown('<hr class="section-separator">', unsafe_allow_html=True)
         
@@ -665,12 +835,65 @@ def main():
             else:
                 st.success(f"Updated: 1 THB = {rate:.4f} PLN")
                 if 'listings' in st.session_state:
-                    for listing in st.session_state['listings']:
-                        listing.price_pln = st.session_state['currency_service'].convert_to_pln(listing.price)
+                    # // Kurs jest wspólny dla procesu, więc przeliczenie współdzielonych ogłoszeń
+                    # // daje ten sam wynik we wszystkich sesjach
+                    st.session_state['currency_service'].update_listing_prices(st.session_state['listings'])
                     st.rerun()
         st.markdown('</div>', unsafe_allow_html=True)
         st.markdown('<hr class="section-separator">', unsafe_allow_html=True)
         
+        # // Price drops from the price history of all searches
+        with st.expander("📉 Price Drops", expanded=False):
+            drops_area = st.text_input("Area", placeholder="e.g. Rawai")
+            drops_days = st.slider("Last days", min_value=1, max_value=90, value=7)
+            drops_bedrooms = st.selectbox("Bedrooms", options=['Any', '1', '2', '3', '4', '5'], key="drops_bedrooms")
+            from price_history import get_price_history
+            drops = get_price_history().price_drops(
+                time.time() - drops_days * 24 * 60 * 60,
+                area=drops_area.strip() or None,
+                bedrooms=int(drops_bedrooms) if drops_bedrooms != 'Any' else None,
+                limit=PRICE_DROPS_LIMIT
+            )
+            if drops:
+                # // Nowa cena w PLN po kursie NBP z dnia obniżki - jedno złączenie z dzienną tabelą kursów
+                import pandas as pd
+                from datetime import date
+                rate_history = st.session_state['currency_service'].history
+                rate_history.load_range(date.fromtimestamp(drops[-1].ts), date.today())
+                new_pln = rate_history.convert_frame(pd.DataFrame(drops), 'ts', 'new_price')
+                st.dataframe(
+                    [{
+                        "Property": drop.name,
+                        "Area": drop.area,
+                        "Old (THB)": drop.old_price,
+                        "New (THB)": drop.new_price,
+                        "New (PLN)": None if pd.isna(pln) else pln,
+                        "Change": f"{drop.change_pct:.1f}%",
+                        "Date": time.strftime('%Y-%m-%d', time.localtime(drop.ts))
+                    } for drop, pln in zip(drops, new_pln)],
+                    hide_index=True
+                )
+            else:
+                st.caption("No price drops recorded in this period")
+        
+        # // Crawl metrics export
+        with st.expander("📈 Crawl Metrics", expanded=False):
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    "Prometheus",
+                    metrics.REGISTRY.to_prometheus(),
+                    file_name="metrics.prom",
+                    mime="text/plain"
+                )
+            with col2:
+                st.download_button(
+                    "JSON",
+                    metrics.REGISTRY.to_json(indent=2),
+                    file_name="metrics.json",
+                    mime="application/json"
+                )
+        
         # // Search button at the bottom
         # // Prepare search parameters with THB values
         search_params = {
@@ -687,26 +910,75 @@ def main():
         search_params = {k: v for k, v in search_params.items() if v is not None}
         
         if st.button("🔍 Search Properties", use_container_width=True):
-            with st.spinner('Fetching properties...'):
-                listings = scrape_listings(max_pages, search_params)
-                if listings:
-                    st.session_state['listings'] = listings
-                    st.session_state['map'] = create_map(listings)
-                    st.success(f'Found {len(listings)} properties!')
-                else:
-                    st.error("No properties found. Please try again.")
+            # // Te same parametry i punkty referencyjne w innej sesji = wyniki z pamięci
+            listings_key = (search_cache_key(max_pages, search_params, enrich_details), reference_points_key())
+            listings = get_listing_cache().get(('listings',) + listings_key)
+            if listings:
+                show_listings(listings, listings_key)
+                st.success(f'Found {len(listings)} properties!')
+            else:
+                # // Wyszukiwanie działa w tle - UI nie jest blokowany, wyniki pojawiają się po każdej stronie
+                job = get_crawl_worker().submit(
+                    build_search_url(search_params),
+                    st.session_state['location_service'],
+                    max_pages=max_pages,
+                    enrich_details=enrich_details,
+                    key=listings_key,
+                    sharded_params=search_params if sharded else None,
+                    city=st.session_state.get('current_city', 'Phuket')
+                )
+                st.session_state['crawl_job_id'] = job.id
+                st.session_state['crawl_page_shown'] = None
     
     # // Main content
+    job = sync_crawl_job()
+    if job is not None:
+        crawl_progress(job)
+    
     if 'listings' not in st.session_state:
-        st.info("👈 Set your search parameters and click 'Search Properties' to start")
+        if job is None:
+            st.info("👈 Set your search parameters and click 'Search Properties' to start")
         return
     
-    # // Sort listings if needed
-    sorted_listings = sort_listings(st.session_state['listings'], sort_option)
+    # // Sort listings using the precomputed permutations (no re-sort on rerun)
+    # // Ogłoszenia i ich klucz wersji są ustawiane razem (show_listings, sync_crawl_job)
+    listings = st.session_state['listings']
+    listings_key = st.session_state['listings_key']
+    sorted_listings = get_sort_index(listings, listings_key).sorted(sort_option)
+    
+    # // Filter by distance to reference points if needed (keeps the sorted order)
+    if max_distance > 0:
+        nearby = st.session_state['location_service'].filter_by_distance(
+            listings, max_distance, distance_points, version=listings_key
+        )
+        nearby_ids = {id(listing) for listing in nearby}
+        sorted_listings = [listing for listing in sorted_listings if id(listing) in nearby_ids]
+        st.caption(f"{len(sorted_listings)} of {len(listings)} properties within {max_distance:g} km")
     
     # // Display map
     st.subheader("📍 Property Locations")
-    st_folium(st.session_state['map'], use_container_width=True, height=600)
+    from streamlit_folium import st_folium
+    from map_grid import GRID_DEFAULT_MIN_LISTINGS
+    map_view = st.radio(
+        "Map view",
+        options=["Markers", "Grid"],
+        index=1 if len(listings) > GRID_DEFAULT_MIN_LISTINGS else 0,
+        horizontal=True,
+        help="Grid shows listing counts and median rent per map cell - fast for large result sets"
+    )
+    if map_view == "Grid":
+        # // Siatka liczona raz na zbiór ogłoszeń i punkty referencyjne, wspólna dla sesji
+        property_map = get_listing_cache().get_or_create(
+            ('grid_map',) + listings_key,
+            lambda: create_grid_map(listings)
+        )
+    else:
+        property_map = st.session_state['map']
+    st_folium(property_map, use_container_width=True, height=600)
+    
+    # // Area analytics - computed once per dataset (search results), shared by all sessions
+    with st.expander("📊 Area Analytics", expanded=False):
+        show_area_analytics(listings)
     
     # // Display listings in grid
     st.subheader("🏠 Available Properties")
@@ -871,30 +1143,43 @@ def main():
         </style>
     """, unsafe_allow_html=True)
     
+    # // The grid is paginated, so only one page of cards (and original images) is sent per rerun
+    page_count = max(1, -(-len(sorted_listings) // CARDS_PER_PAGE))
+    if st.session_state.get('grid_page', 1) > page_count:
+        st.session_state['grid_page'] = page_count
+    grid_page = 1
+    if page_count > 1:
+        grid_page = int(st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1, key='grid_page'))
+    start = (grid_page - 1) * CARDS_PER_PAGE
+    page_listings = sorted_listings[start:start + CARDS_PER_PAGE]
+    if page_count > 1:
+        st.caption(f"Showing {start + 1}-{start + len(page_listings)} of {len(sorted_listings)} properties")
+    
+    # // Missing thumbnails for the visible page are fetched in the background (the rerun doesn't wait);
+    # // until one is cached the card shows the original image URL
+    from image_cache import get_thumbnail_cache
+    thumbnails = get_thumbnail_cache()
+    thumbnails.prefetch_async((listing.property_info.image_url for listing in page_listings), limit=CARDS_PER_PAGE)
+    
+    # // Cards come from the render cache - reruns that only change sorting or filters reuse them
+    from listing_render import render_card
+    reference_version = reference_points_key()
+    
     # // In the grid layout section, update how we display listings:
     cols = st.columns(3)
     
-    for i, listing in enumerate(sorted_listings):
+    for i, listing in enumerate(page_listings):
         with cols[i % 3]:
             with st.container():
-                st.markdown(f"""
-                    <div class="listing-card">
-                        <img src="{listing.property_info.image_url or 'https://via.placeholder.com/400x300?text=No+Image'}" class="property-image">
-                        <div class="property-title">{listing.name}</div>
-                        <div class="price-container">
-                            <div class="price-tag">฿{listing.price:,}/month</div>
-                            <div class="price-pln">(~{listing.price_pln:,.2f} PLN/month)</div>
-                        </div>
-                        <div class="property-details">
-                            🛏️ {listing.property_info.bedrooms} beds<br>
-                            🚿 {listing.property_info.bathrooms} baths<br>
-                            📏 {listing.property_info.floor_area}<br>
-                            🏠 {listing.property_info.property_type}<br>
-                            📍 {listing.location.area}, {listing.location.district}<br>
-                            <br>
-                            {' '.join(f'🎯 {distance:.1f} km to {loc_name}<br>' for loc_name, distance in listing.location.distances.items())}
-                        </div>
-                """, unsafe_allow_html=True)
+                # // Cached thumbnails are served as media files (cacheable URL) instead of inline data URIs
+                thumbnail = thumbnails.cached_path(listing.property_info.image_url)
+                if thumbnail:
+                    st.image(thumbnail, width="stretch")
+                image_src = None if thumbnail else (
+                    listing.property_info.image_url
+                    or 'https://via.placeholder.com/400x300?text=No+Image'
+                )
+                st.markdown(render_card(listing, image_src, reference_version), unsafe_allow_html=True)
                 
                 # // Updated agent information section with improved icon and styling
                 if listing.agent_info:
@@ -0,0 +1,38 @@
+from models import PropertyListing, Location, PropertyInfo
+from area_analytics import area_analytics
+
+
+def listing(price, area, bedrooms, price_per_sqm=None):
+    return PropertyListing(price=price, price_per_sqm=price_per_sqm,
+                           location=Location(area=area, district="Mueang Phuket"),
+                           property_info=PropertyInfo(bedrooms=bedrooms))
+
+
+def test_rent_quartiles_and_counts_by_area_district_and_bedrooms():
+    listings = [
+        listing(10000, "Rawai", 1, 300.0),
+        listing(20000, "Rawai", 2, 400.0),
+        listing(30000, "Rawai", 2),
+        listing(40000, "Rawai", 2, 600.0),
+        listing(50000, "Patong", 3, 1000.0),
+        listing(None, None, None),
+    ]
+    analytics = area_analytics(listings)
+
+    rawai = analytics["Area"].loc["Rawai"]
+    assert rawai["listings"] == 4
+    assert (rawai["p25_rent"], rawai["median_rent"], rawai["p75_rent"]) == (17500, 25000, 32500)
+    assert rawai["median_price_per_sqm"] == 400.0
+    assert list(analytics["Area"].index) == ["Rawai", "Patong"]
+
+    assert analytics["District"].loc["Mueang Phuket", "listings"] == 6
+    assert analytics["Bedrooms"].loc[2, "median_rent"] == 30000
+    assert area_analytics([]) == {}
+
+
+def test_grouping_without_values_gives_empty_table():
+    # // Same działki: brak sypialni w każdym ogłoszeniu
+    analytics = area_analytics([listing(15000, "Rawai", None)])
+    assert analytics["Bedrooms"].empty
+    assert list(analytics["Bedrooms"].columns) == list(analytics["Area"].columns)
+    assert analytics["Area"].loc["Rawai", "listings"] == 1
@@ -0,0 +1,93 @@
+import threading
+import time
+import dd_property_scraper
+import detail_enricher
+from models import PropertyListing, ListingInfo, Location
+from crawl_jobs import CrawlWorker
+from location_service import LocationService
+from price_history import PriceHistoryStore
+from reference_sets import ReferenceSetStore
+from shared_cache import SharedCache
+
+
+def make_location_service(tmp_path):
+    return LocationService(location_cache=SharedCache(10),
+                           reference_sets=ReferenceSetStore(str(tmp_path / "reference_sets.json")))
+
+
+def page(start, count):
+    # // Dokładne współrzędne - odległości bez geokodowania
+    return [
+        PropertyListing(name=f"Condo {i}", listing_info=ListingInfo(id=str(i)),
+                        location=Location(coordinates=(7.89, 98.29), exact_coordinates=True))
+        for i in range(start, start + count)
+    ]
+
+
+def test_job_reports_pages_and_results(monkeypatch, tmp_path, fake_scraper):
+    pages = [page(0, 3), page(3, 2)]
+    monkeypatch.setattr(dd_property_scraper, "DDPropertyScraper", fake_scraper(lambda url: pages))
+    worker = CrawlWorker(max_workers=1, price_history=PriceHistoryStore(str(tmp_path / "history.sqlite3")))
+
+    job = worker.submit("https://example.invalid/search", make_location_service(tmp_path), key="search")
+    worker._executor.shutdown(wait=True)
+
+    assert job.status == 'done' and job.progress == 1.0
+    assert (job.page, job.total_pages) == (2, 2)
+    assert [listing.name for listing in job.listings] == [f"Condo {i}" for i in range(5)]
+    assert all(listing.location.distances for listing in job.listings)
+
+
+def test_partial_results_identical_searches_and_cancel(monkeypatch, tmp_path, fake_scraper):
+    release_page = threading.Event()
+    pages = [page(0, 2), page(2, 2), page(4, 2)]
+    monkeypatch.setattr(dd_property_scraper, "DDPropertyScraper", fake_scraper(lambda url: pages, release_page))
+    worker = CrawlWorker(max_workers=1, price_history=PriceHistoryStore(str(tmp_path / "history.sqlite3")))
+
+    location_service = make_location_service(tmp_path)
+    job = worker.submit("https://example.invalid/search", location_service, key="search")
+    assert worker.submit("https://example.invalid/search", location_service, key="search") is job
+    # // Zmiana punktów w sesji nie dotyczy zleconego zadania (liczy na kopii z chwili zlecenia)
+    location_service.reference_points["Airport"] = (8.11, 98.31)
+
+    # // Pierwsza strona jest widoczna, zanim wyszukiwanie się skończy
+    while job.page < 1:
+        time.sleep(0.01)
+    assert len(job.snapshot()) == 2 and not job.finished
+
+    job.cancel()
+    release_page.set()
+    worker._executor.shutdown(wait=True)
+    assert job.status == 'cancelled' and job.page == 1
+    assert all(set(listing.location.distances) == {"Patong Beach"} for listing in job.listings)
+
+
+def test_enriched_search_geocodes_only_listings_without_exact_coordinates(monkeypatch, tmp_path, fake_scraper):
+    class FakeEnricher:
+        # // Strony szczegółów dają dokładne współrzędne wszystkim ogłoszeniom poza pierwszym
+        def __init__(self, scraper):
+            pass
+
+        def enrich(self, listings):
+            for listing in listings[1:]:
+                listing.location.coordinates, listing.location.exact_coordinates = (7.89, 98.29), True
+            return len(listings) - 1
+
+    geocoded = []
+    monkeypatch.setattr(LocationService, "get_coordinates",
+                        lambda self, address: geocoded.append(address) or (7.88, 98.39))
+    monkeypatch.setattr(detail_enricher, "DetailEnricher", FakeEnricher)
+    pages = [
+        [PropertyListing(name=f"Condo {i}", listing_info=ListingInfo(id=str(i)), location=Location(area=f"Area {i}"))
+         for i in range(start, start + 3)]
+        for start in (0, 3)
+    ]
+    monkeypatch.setattr(dd_property_scraper, "DDPropertyScraper", fake_scraper(lambda url: pages))
+    worker = CrawlWorker(max_workers=1, price_history=PriceHistoryStore(str(tmp_path / "history.sqlite3")))
+
+    job = worker.submit("https://example.invalid/search", make_location_service(tmp_path), enrich_details=True)
+    worker._executor.shutdown(wait=True)
+
+    # // Geokodowanie dopiero po stronach szczegółów - tylko ogłoszenie bez dokładnych współrzędnych
+    assert job.status == 'done' and geocoded == ["Area 0"]
+    assert all(listing.location.distances for listing in job.listings)
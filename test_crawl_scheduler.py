@@ -0,0 +1,89 @@
+from models import PropertyListing, ListingInfo
+from crawl_scheduler import CrawlScheduler, MIN_INTERVAL_SECONDS
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def search_pages(results):
+    # // results: nazwa wyszukiwania (min_price) -> funkcja zwracająca ogłoszenia dla kolejnego przebiegu (None - awaria)
+    def pages_for(base_url):
+        listings = results[base_url.split("minprice=")[1].split("&")[0]]()
+        return None if listings is None else [listings]
+
+    return pages_for
+
+
+def listing(i, price=10000):
+    return PropertyListing(name=f"Condo {i}", price=price, listing_info=ListingInfo(id=str(i)))
+
+
+def test_busy_searches_run_more_often_and_state_persists(tmp_path, fake_scraper):
+    clock = FakeClock()
+    runs = {"busy": 0}
+
+    def busy():
+        runs["busy"] += 1
+        return [listing(runs["busy"] * 100 + i) for i in range(20)]  # // Co przebieg 20 nowych ogłoszeń
+
+    results = {"1000": busy, "2000": lambda: [listing(i) for i in range(20)]}
+    state_file = str(tmp_path / "schedule.json")
+    scheduler = CrawlScheduler(state_file, request_budget=1000, scraper_factory=fake_scraper(search_pages(results)),
+                               clock=clock)
+    scheduler.add_search("busy", {"min_price": 1000})
+    scheduler.add_search("quiet", {"min_price": 2000})
+
+    assert scheduler.run_due() == 2
+    for _ in range(3):
+        clock.now = scheduler.queue()[0].next_run
+        scheduler.run_due()
+
+    busy_search, quiet_search = scheduler.searches["busy"], scheduler.searches["quiet"]
+    assert busy_search.last_changes == 20 and quiet_search.last_changes == 0
+    assert MIN_INTERVAL_SECONDS <= busy_search.interval < quiet_search.interval
+    assert busy_search.runs > quiet_search.runs
+
+    reloaded = CrawlScheduler(state_file, clock=clock)
+    assert [search.name for search in reloaded.queue()] == [search.name for search in scheduler.queue()]
+    assert reloaded.searches["quiet"].fingerprints == quiet_search.fingerprints
+
+
+def test_budget_stretches_intervals(tmp_path, fake_scraper):
+    clock = FakeClock()
+    scheduler = CrawlScheduler(str(tmp_path / "schedule.json"), request_budget=2, clock=clock,
+                               scraper_factory=fake_scraper(search_pages({"1000": lambda: [listing(1)]})))
+    search = scheduler.add_search("a", {"min_price": 1000}, interval=3600)
+    scheduler.add_search("b", {"min_price": 1000}, interval=3600)
+    scheduler.add_search("c", {"min_price": 1000}, interval=3600)
+    scheduler.add_search("d", {"min_price": 1000}, interval=3600)
+    scheduler.run_search(search)
+
+    # // 4 wyszukiwania po 1 stronie co godzinę przy budżecie 2 stron/h - interwały rozciągnięte 2x
+    assert scheduler.budget_scale == 2.0
+    assert search.next_run == clock.now + 2 * 3600
+
+
+def test_outage_is_a_failed_run_and_keeps_fingerprints(tmp_path, fake_scraper):
+    clock = FakeClock()
+    outage = {"down": False}
+    results = {"1000": lambda: None if outage["down"] else [listing(i) for i in range(10)]}
+    scheduler = CrawlScheduler(str(tmp_path / "schedule.json"), clock=clock,
+                               scraper_factory=fake_scraper(search_pages(results)))
+    search = scheduler.add_search("a", {"min_price": 1000}, interval=3600)
+    scheduler.run_search(search)
+    fingerprints, interval = dict(search.fingerprints), search.interval
+
+    outage["down"] = True
+    clock.now += 3600
+    assert scheduler.run_search(search) is None
+    assert search.last_error and search.fingerprints == fingerprints and search.interval == interval
+
+    # // Po awarii te same ogłoszenia nie liczą się jako zmienione
+    outage["down"] = False
+    clock.now += 3600
+    assert scheduler.run_search(search) == 0 and search.last_error is None
@@ -0,0 +1,100 @@
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from currency_service import CurrencyService, RateCache, HistoricalRateTable, DEFAULT_THB_TO_PLN
+
+
+def make_service(tmp_path, monkeypatch, rates=None, error=None):
+    # // Serwis z cache w katalogu tymczasowym i podmienionym pobieraniem z NBP
+    monkeypatch.setattr(CurrencyService, "_fetch_rates", lambda self: (rates or {}, error))
+    cache = RateCache(str(tmp_path / "rates.json"))
+    return CurrencyService(rate_cache=cache), cache
+
+
+def test_default_rate_when_fetch_fails(tmp_path, monkeypatch):
+    service, cache = make_service(tmp_path, monkeypatch, error="offline")
+    cache._refresh_thread.join()
+
+    assert service.thb_to_pln_rate == DEFAULT_THB_TO_PLN
+    assert service.last_update is None
+
+    # // Kolejne serwisy nie ponawiają pobierania od razu po porażce
+    failed_thread = cache._refresh_thread
+    CurrencyService(rate_cache=cache)
+    assert cache._refresh_thread is failed_thread
+    cache.last_failure -= cache.retry_after
+    assert cache.refresh_async(lambda: ({}, "offline"))
+
+
+def test_rate_shared_and_persisted(tmp_path, monkeypatch):
+    service, cache = make_service(tmp_path, monkeypatch, rates={'THB': Decimal('0.1234')})
+    cache._refresh_thread.join()
+
+    # // Druga instancja widzi ten sam kurs bez własnego zapytania
+    other = CurrencyService(rate_cache=cache)
+    assert other.thb_to_pln_rate == Decimal('0.1234')
+    assert other.convert_to_pln(1000) == 123.4
+
+    # // Nowy proces (nowy RateCache) wczytuje kurs z dysku
+    reloaded = RateCache(str(tmp_path / "rates.json"))
+    assert reloaded.get('THB') == Decimal('0.1234')
+    assert not reloaded.is_stale()
+
+
+def test_convert_many_matches_single_conversion(tmp_path, monkeypatch):
+    rates = {'THB': Decimal('0.1179'), 'EUR': Decimal('4.3'), 'USD': Decimal('4.0')}
+    service, cache = make_service(tmp_path, monkeypatch, rates=rates)
+    cache._refresh_thread.join()
+
+    # // Ta sama reguła zaokrąglania co convert_to_pln dla każdej kwoty (także połówek groszy)
+    amounts = list(range(1, 20001)) + [12345.5, 99999.99]
+    pln = service.convert_many(amounts)
+    assert pln.tolist() == [service.convert_to_pln(amount) for amount in amounts]
+
+    eur = service.convert_many(pd.Series(amounts + [None]), currency='EUR')
+    scaled_rate = service.scaled_rate('EUR')
+    assert eur[:-1].tolist() == [float(service.round_amount(Decimal(str(amount)), scaled_rate)) for amount in amounts]
+    assert np.isnan(eur[-1]) and np.isnan(service.convert_many([0])[0])
+
+
+def test_historical_rates_fill_weekends_and_join(tmp_path):
+    table = HistoricalRateTable(str(tmp_path / "history.json"))
+    # // Piątek i poniedziałek - weekend dostaje kurs z piątku
+    table.add_rates([
+        {'effectiveDate': '2024-03-01', 'mid': 0.1110},
+        {'effectiveDate': '2024-03-04', 'mid': 0.1120},
+    ])
+    assert table.get_rate('2024-03-02') == Decimal('0.111')
+    assert table.get_rate(date(2024, 3, 4)) == Decimal('0.112')
+    # // Dni po ostatniej publikacji dostają ostatni kurs, dni przed początkiem tabeli - brak kursu
+    assert table.get_rate('2024-03-05') == Decimal('0.112')
+    assert table.get_rate('2024-02-29') is None
+
+    df = pd.DataFrame({
+        'price': [10000, 10000, 10000, 10000],
+        'scraped_at': ['2024-03-01 10:00', '2024-03-03 22:00', '2024-03-04 08:00', '2024-03-06 09:00'],
+    })
+    assert table.convert_frame(df, 'scraped_at').tolist() == [1110.0, 1110.0, 1120.0, 1120.0]
+
+    # // Tabela wczytana ponownie z dysku
+    reloaded = HistoricalRateTable(str(tmp_path / "history.json"))
+    assert reloaded.covers(date(2024, 3, 1), date(2024, 3, 4))
+
+
+def test_historical_range_past_last_publication_is_fetched_once(tmp_path, monkeypatch):
+    import requests
+    calls = []
+
+    def fake_get(url, timeout=None):
+        calls.append(url)
+        return SimpleNamespace(status_code=200, json=lambda: {'rates': [{'effectiveDate': '2024-03-01', 'mid': 0.1110}]})
+
+    monkeypatch.setattr(requests, "get", fake_get)
+    table = HistoricalRateTable(str(tmp_path / "history.json"))
+    # // NBP nie opublikował jeszcze kursów na weekend - kolejne wywołania nie pytają o nie ponownie
+    assert table.load_range(date(2024, 3, 1), date(2024, 3, 3)) is None
+    assert table.load_range(date(2024, 3, 1), date(2024, 3, 3)) is None
+    assert len(calls) == 1
+    assert table.get_rate('2024-03-03') == Decimal('0.111')
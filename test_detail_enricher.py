@@ -0,0 +1,61 @@
+import json
+from types import SimpleNamespace
+import detail_enricher
+from detail_enricher import DetailCache, DetailEnricher, parse_detail_html
+from models import PropertyListing, ListingInfo
+from rate_limiter import RateLimiter
+
+DETAIL_HTML = """
+<html><head>
+<meta property="og:image" content="https://cdn.example.invalid/og.jpg">
+<script type="application/ld+json">{"@type": "Residence", "geo": {"latitude": 7.8201, "longitude": 98.3012}}</script>
+<script type="text/javascript">var guruApp = %s;</script>
+</head><body></body></html>
+""" % json.dumps({
+    "listingData": {
+        "amenities": [{"text": "Swimming pool"}, "Gym", "Gym"],
+        "media": {"images": [{"src": "https://cdn.example.invalid/1.jpg"}, {"src": "https://cdn.example.invalid/2.jpg"}]},
+    }
+})
+
+
+def test_parse_detail_html():
+    details = parse_detail_html(DETAIL_HTML)
+    assert details["coordinates"] == (7.8201, 98.3012)
+    assert details["amenities"] == ["Swimming pool", "Gym"]
+    assert details["image_urls"] == ["https://cdn.example.invalid/1.jpg", "https://cdn.example.invalid/2.jpg"]
+
+
+def test_detail_cache_invalidated_by_price(tmp_path):
+    cache = DetailCache(str(tmp_path / "details.json"))
+    cache.put(123, 25000, {"coordinates": [7.8, 98.3]})
+    cache.save()
+
+    reloaded = DetailCache(str(tmp_path / "details.json"))
+    assert reloaded.get(123, 25000)["coordinates"] == [7.8, 98.3]
+    assert reloaded.get(123, 23000) is None
+
+
+def test_enrich_closes_thread_sessions(tmp_path, monkeypatch):
+    sessions = []
+
+    class FakeSession:
+        def __init__(self):
+            self.headers, self.cookies, self.closed = {}, {}, False
+            sessions.append(self)
+
+        def get(self, url, **kwargs):
+            return SimpleNamespace(status_code=200, content=DETAIL_HTML.encode(), text=DETAIL_HTML)
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(detail_enricher.requests, "Session", FakeSession)
+    scraper = SimpleNamespace(headers={}, session=SimpleNamespace(cookies={}), impersonate="chrome110")
+    enricher = DetailEnricher(scraper, max_workers=2, cache=DetailCache(str(tmp_path / "details.json")))
+    enricher.rate_limiter = RateLimiter(1000, burst=100, name="detail-test")
+    listings = [PropertyListing(price=1000, listing_info=ListingInfo(id=str(i), url=f"https://example.invalid/{i}"))
+                for i in range(6)]
+
+    assert enricher.enrich(listings) == 6
+    assert sessions and all(session.closed for session in sessions)
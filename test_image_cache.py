@@ -0,0 +1,63 @@
+import io
+import threading
+import time
+from PIL import Image
+from image_cache import FAILED_RETRY_SECONDS, ThumbnailCache
+
+
+def make_image(size=(1600, 1200)) -> bytes:
+    output = io.BytesIO()
+    Image.new('RGB', size, (200, 80, 40)).save(output, format='PNG')
+    return output.getvalue()
+
+
+def test_thumbnail_resized_and_lru_evicted(tmp_path):
+    cache = ThumbnailCache(str(tmp_path), max_bytes=10_000)
+    thumbnail = cache.make_thumbnail(make_image())
+    with Image.open(io.BytesIO(thumbnail)) as image:
+        assert image.size == (400, 300)
+
+    # // Limit pozwala na kilka miniatur - najstarsze są usuwane
+    for i in range(20):
+        cache._store(f"key{i}", thumbnail)
+    assert cache._total_bytes <= 10_000
+    assert "key19" in cache._entries and "key0" not in cache._entries
+
+    # // Indeks odtwarza się z plików na dysku
+    reloaded = ThumbnailCache(str(tmp_path), max_bytes=10_000)
+    assert set(reloaded._entries) == set(cache._entries)
+
+
+def test_prefetch_async_queues_first_missing_urls_once(tmp_path, monkeypatch):
+    cache = ThumbnailCache(str(tmp_path))
+    release = threading.Event()
+    fetched = []
+
+    def fake_fetch(url):
+        release.wait()
+        fetched.append(url)
+        cache._store(cache.key(url), b"jpeg")
+
+    monkeypatch.setattr(cache, "fetch", fake_fetch)
+    urls = [f"https://example.invalid/{i}.jpg" for i in range(10)]
+    # // Wraca od razu, zanim cokolwiek zostanie pobrane; powtórny przebieg nie dubluje zleceń
+    assert cache.prefetch_async(urls, limit=4) == 4
+    assert cache.prefetch_async(urls, limit=4) == 0 and cache.cached_path(urls[0]) is None
+
+    release.set()
+    cache._executor.shutdown(wait=True)
+    assert sorted(fetched) == sorted(urls[:4])
+    assert cache.cached_path(urls[0]) == cache.path(urls[0])
+
+
+def test_failed_thumbnail_is_retried_after_ttl(tmp_path, monkeypatch):
+    cache = ThumbnailCache(str(tmp_path))
+    monkeypatch.setattr(cache, "fetch", lambda url: None)
+    url = "https://example.invalid/broken.jpg"
+
+    cache._failed[cache.key(url)] = time.monotonic()
+    assert cache.prefetch_async([url]) == 0
+    # // Po FAILED_RETRY_SECONDS błąd jest zapominany i obrazek trafia znowu do kolejki
+    cache._failed[cache.key(url)] -= FAILED_RETRY_SECONDS
+    assert cache.prefetch_async([url]) == 1
+    cache._executor.shutdown(wait=True)
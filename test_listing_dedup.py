@@ -0,0 +1,17 @@
+from models import PropertyListing, ListingInfo
+from listing_dedup import ListingDeduplicator
+
+
+def test_repeat_sightings_are_merged():
+    dedup = ListingDeduplicator()
+    first = PropertyListing(name="Condo", price=20000, listing_info=ListingInfo(id=1))
+    other = PropertyListing(name="Villa", price=50000, listing_info=ListingInfo(id=2))
+    repeat = PropertyListing(name="Condo", price=18000, listing_info=ListingInfo(id=1))
+
+    assert dedup.add_many([first, other], seen_at=100.0) == [first, other]
+    assert dedup.add(repeat, seen_at=200.0) is first
+
+    assert len(dedup) == 2 and dedup.duplicates == 1
+    assert first.price == 18000
+    assert (first.listing_info.first_seen, first.listing_info.last_seen) == (100.0, 200.0)
+    assert first.listing_info.seen_count == 2
@@ -0,0 +1,35 @@
+from models import PropertyListing, ListingInfo, Location, PropertyInfo
+from listing_render import POPUP_SEPARATOR, render_card, render_popup
+
+
+def listing(listing_id, price=20000):
+    return PropertyListing(name=f"Condo {listing_id}", price=price, price_pln=2358.0,
+                           listing_info=ListingInfo(id=listing_id, url=f"https://example.invalid/{listing_id}"),
+                           location=Location(area="Rawai", district="Mueang Phuket",
+                                             distances={"Patong Beach": 12.34}),
+                           property_info=PropertyInfo(bedrooms=2, bathrooms=1, floor_area="45 sqm"))
+
+
+def test_cards_are_reused_until_listing_or_reference_points_change():
+    condo = listing("render-1")
+    card = render_card(condo, "thumb.jpg", ("Phuket", ()))
+    assert "฿20,000/month" in card and "12.3 km to Patong Beach" in card
+    assert render_card(listing("render-1"), "thumb.jpg", ("Phuket", ())) is card
+
+    assert render_card(listing("render-1", price=18000), "thumb.jpg", ("Phuket", ())) is not card
+    condo.location.distances = {"Patong Beach": 1.0}
+    moved = render_card(condo, "thumb.jpg", ("Phuket", (("Patong Beach", (7.9, 98.3)),)))
+    assert "1.0 km to Patong Beach" in moved
+
+    # // Ta sama wersja punktów sesji, ale odległości policzone do innych punktów (np. snapshot)
+    saved = listing("render-1")
+    saved.location.distances = {"Old City": 5.0}
+    assert "5.0 km to Old City" in render_card(saved, "thumb.jpg", ("Phuket", ()))
+
+
+def test_popup_joins_cards_with_separators():
+    popup = render_popup("Rawai", [listing(f"popup-{i}") for i in range(3)], ("Phuket", ()))
+    assert "<h4>Rawai - 3 properties</h4>" in popup
+    assert popup.count('class="property-card"') == 3
+    assert popup.count(POPUP_SEPARATOR) == 2
+    assert popup.endswith("</div></div>")
@@ -0,0 +1,57 @@
+import json
+from models import PropertyListing, Location, PropertyInfo, ListingInfo, AgentInfo
+from listing_snapshot import save_snapshot, load_snapshot, iter_snapshot, write_snapshot, SNAPSHOT_FORMAT
+
+
+def make_listings(count):
+    return [
+        PropertyListing(
+            name=f"Condo {i}",
+            price=20000 + i,
+            price_pln=2200.55,
+            location=Location(area="Kathu", coordinates=(7.9, 98.3), distances={"Patong Beach": 1.5}),
+            property_info=PropertyInfo(bedrooms=2, floor_area_sqm=45.0, amenities=["Pool", "Gym"]),
+            listing_info=ListingInfo(id=str(i), first_seen=100.0, seen_count=1),
+            agent_info=AgentInfo(name="Agent", is_verified=True),
+        )
+        for i in range(count)
+    ]
+
+
+def test_round_trip_arrow_and_jsonl(tmp_path):
+    listings = make_listings(25)
+    for name in ("listings.arrow", "listings.jsonl"):
+        path = str(tmp_path / name)
+        assert save_snapshot(listings, path)[0]
+        restored, error = load_snapshot(path)
+        assert error is None
+        assert restored == listings
+
+
+def test_streaming_write_and_read_in_batches(tmp_path):
+    path = str(tmp_path / "listings.arrow")
+    assert write_snapshot(iter(make_listings(25)), path, batch_size=10) == 25
+    assert [len(batch) for batch in iter_snapshot(path)] == [10, 10, 5]
+
+
+def test_numeric_ids_are_stored_as_text(tmp_path):
+    path = str(tmp_path / "listings.arrow")
+    save_snapshot([PropertyListing(listing_info=ListingInfo(id=123), agent_info=AgentInfo(id=7))], path)
+    restored, _ = load_snapshot(path)
+    assert restored[0].listing_info.id == "123" and restored[0].agent_info.id == "7"
+
+
+def test_missing_fields_get_defaults_and_newer_versions_are_rejected(tmp_path):
+    path = tmp_path / "old.jsonl"
+    header = {"format": SNAPSHOT_FORMAT, "version": 1}
+    record = {"name": "Old", "price": 1000, "location": {"area": "Kathu"}, "listing_info": {"id": "1"}}
+    path.write_text(json.dumps(header) + "\n" + json.dumps(record) + "\n")
+
+    restored, error = load_snapshot(str(path))
+    assert error is None
+    assert restored[0].name == "Old" and restored[0].location.distances == {}
+    assert restored[0].listing_info.seen_count == 0 and restored[0].property_info.amenities == []
+
+    path.write_text(json.dumps({"format": SNAPSHOT_FORMAT, "version": 99}) + "\n")
+    restored, error = load_snapshot(str(path))
+    assert restored == [] and "newer" in error
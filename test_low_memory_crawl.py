@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+import textwrap
+from benchmarks.fixtures import build_result_page
+from dd_property_scraper import DDPropertyScraper
+from listing_snapshot import load_snapshot
+import metrics
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# // Różnica przyrostu szczytowego RSS między 500 a 50 stronami (10 000 i 1000 ogłoszeń).
+# // Z ogłoszeniami w pamięci to ~25 MB, w trybie niskiej pamięci ~5 MB (tylko zbiór ID).
+MAX_EXTRA_RSS_GROWTH_MB = 12
+
+CRAWL_SCRIPT = textwrap.dedent("""
+    import contextlib, io, os, re, resource, sys, tempfile
+    sys.path.insert(0, {root!r})
+    import metrics
+    metrics.throttle_sleep = lambda seconds, reason: None
+    from benchmarks.fixtures import build_result_page
+    from dd_property_scraper import DDPropertyScraper
+
+    def page_number(url):
+        match = re.search(r"/property-for-rent/([0-9]+)", url)
+        return int(match.group(1)) if match else 1
+
+    scraper = DDPropertyScraper.parser()
+    scraper.fetch_page_html = lambda url: build_result_page(20, total_pages={pages}, page=page_number(url))
+    url = "https://www.ddproperty.com/en/property-for-rent?search=true"
+    tmp_dir = tempfile.mkdtemp()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper.crawl_to_snapshot(url, os.path.join(tmp_dir, "warmup.arrow"), max_pages=2)
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        count, error = scraper.crawl_to_snapshot(url, os.path.join(tmp_dir, "crawl.arrow"))
+    growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    # // ru_maxrss jest w KB na Linuksie, a w bajtach na macOS
+    growth_bytes = growth if sys.platform == "darwin" else growth * 1024
+    print(count, error, growth_bytes / 2 ** 20)
+""")
+
+
+def page_number(url):
+    tail = url.split("?")[0].rsplit("/", 1)[-1]
+    return int(tail) if tail.isdigit() else 1
+
+
+def test_crawl_to_snapshot_spills_unique_listings(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "throttle_sleep", lambda seconds, reason: None)
+    scraper = DDPropertyScraper.parser()
+    monkeypatch.setattr(scraper, "fetch_page_html",
+                        lambda url: build_result_page(10, total_pages=3, page=page_number(url)))
+    pages = []
+
+    count, error = scraper.crawl_to_snapshot("https://www.ddproperty.com/en/property-for-rent?search=true",
+                                             str(tmp_path / "crawl.arrow"),
+                                             on_page=lambda page, total, new: pages.append((page, total, len(new))))
+
+    assert (count, error) == (30, None)
+    assert pages == [(1, 3, 10), (2, 3, 10), (3, 3, 10)]
+    listings, error = load_snapshot(str(tmp_path / "crawl.arrow"))
+    assert error is None and len({listing.listing_info.id for listing in listings}) == 30
+
+
+def crawl_rss_growth_mb(pages):
+    # // Każdy pomiar w osobnym procesie - szczytowy RSS nie maleje w trakcie życia procesu
+    result = subprocess.run(
+        [sys.executable, "-c", CRAWL_SCRIPT.format(root=ROOT, pages=pages)],
+        capture_output=True, text=True, timeout=300, check=True
+    )
+    count, error, growth_mb = result.stdout.split()
+    assert (int(count), error) == (pages * 20, "None")
+    return float(growth_mb)
+
+
+def test_peak_rss_does_not_grow_with_crawl_length():
+    # // Porównanie względne zamiast progu bezwzględnego - stały narzut (pyarrow, bufory) się znosi
+    assert crawl_rss_growth_mb(500) - crawl_rss_growth_mb(50) < MAX_EXTRA_RSS_GROWTH_MB
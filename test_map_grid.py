@@ -0,0 +1,34 @@
+from models import PropertyListing, Location
+from map_grid import grid_geojson
+
+
+def listing(price, coordinates):
+    return PropertyListing(price=price, location=Location(coordinates=coordinates))
+
+
+def test_listings_are_aggregated_per_cell_with_median_price():
+    listings = [
+        listing(10000, (7.8951, 98.2961)),
+        listing(30000, (7.8952, 98.2962)),
+        listing(20000, (7.8953, 98.2963)),
+        listing(40000, (7.8954, 98.2964)),
+        listing(None, (7.8955, 98.2965)),
+        listing(50000, (7.7751, 98.3251)),
+        listing(60000, None),
+    ]
+    grid = grid_geojson(listings, cell_size=0.01)
+
+    cells = {feature["properties"]["count"]: feature for feature in grid["features"]}
+    assert sorted(cells) == [1, 5]
+    assert cells[5]["properties"]["median_price"] == 25000
+    assert cells[1]["properties"]["median_price"] == 50000
+    west, south = cells[5]["geometry"]["coordinates"][0][0]
+    assert (round(south, 2), round(west, 2)) == (7.89, 98.29)
+
+
+def test_grid_size_does_not_grow_with_listings_at_the_same_places():
+    places = [(7.8951, 98.2961), (7.7751, 98.3251), (7.9051, 98.3051)]
+    small = grid_geojson([listing(20000, places[i % 3]) for i in range(30)])
+    large = grid_geojson([listing(20000, places[i % 3]) for i in range(30000)])
+    assert len(small["features"]) == len(large["features"]) == 3
+    assert grid_geojson([]) == {"type": "FeatureCollection", "features": []}
@@ -0,0 +1,26 @@
+import json
+from metrics import MetricsRegistry
+
+
+def test_counter_and_histogram_export():
+    registry = MetricsRegistry()
+    requests_total = registry.counter("requests_total", "Requests")
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+    requests_total.inc(kind="search", status=200)
+    requests_total.inc(kind="search", status=200)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5.0)
+
+    assert requests_total.value(kind="search", status=200) == 2
+    assert latency.count() == 3
+
+    text = registry.to_prometheus()
+    assert 'requests_total{kind="search",status="200"} 2' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+
+    data = json.loads(registry.to_json())
+    assert data["latency_seconds"]["values"][0]["counts"] == [1, 1, 1]
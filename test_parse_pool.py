@@ -0,0 +1,43 @@
+import metrics
+import parse_pool
+from benchmarks.fixtures import build_result_page
+from dd_property_scraper import DDPropertyScraper
+from parse_pool import ParsePool, parse_page_records, records_to_listings
+
+
+def test_records_round_trip_to_the_same_listings():
+    html = build_result_page(20, total_pages=3)
+    expected, _ = DDPropertyScraper.parser().parse_listings_html(html)
+
+    records = parse_page_records(html)
+    assert (records.count, records.total_pages) == (20, 3)
+    assert records_to_listings(records) == expected
+
+
+def test_scrape_all_pages_parses_in_worker_processes(monkeypatch):
+    pages = {page: build_result_page(10, total_pages=3, page=page) for page in (1, 2, 3)}
+    scraper = DDPropertyScraper.parser()
+    monkeypatch.setattr(scraper, "fetch_page_html", lambda url: pages[int(url.rsplit("/", 1)[-1].split("?")[0])])
+    monkeypatch.setattr(metrics, "throttle_sleep", lambda seconds, reason: None)
+
+    pool = ParsePool(max_workers=2)
+    try:
+        seen_pages = []
+        listings = scraper.scrape_all_pages(
+            "https://www.ddproperty.com/en/property-for-rent/1?search=true",
+            on_page=lambda page, total, new: seen_pages.append((page, total, len(new))),
+            parse_pool=pool
+        )
+    finally:
+        pool.shutdown()
+
+    assert seen_pages == [(1, 3, 10), (2, 3, 10), (3, 3, 10)]
+    assert len(listings) == 30
+
+
+def test_parse_workers_follow_crawls_and_available_cores(monkeypatch):
+    monkeypatch.setattr(parse_pool, "available_cpus", lambda: 64)
+    assert parse_pool.parse_workers_for(2) == 2
+    assert parse_pool.parse_workers_for(16) == parse_pool.MAX_PARSE_WORKERS
+    monkeypatch.setattr(parse_pool, "available_cpus", lambda: 1)
+    assert parse_pool.parse_workers_for(2) == 1
@@ -0,0 +1,51 @@
+from models import PropertyListing, ListingInfo, Location, PropertyInfo
+from price_history import PriceHistoryStore
+
+DAY = 24 * 60 * 60
+
+
+def listing(listing_id, price, area="Rawai", bedrooms=2):
+    return PropertyListing(name=f"Condo {listing_id}", price=price, listing_info=ListingInfo(id=listing_id),
+                           location=Location(area=area, district="Mueang Phuket"),
+                           property_info=PropertyInfo(bedrooms=bedrooms))
+
+
+def test_only_price_changes_are_recorded(tmp_path):
+    store = PriceHistoryStore(str(tmp_path / "history.sqlite3"))
+    assert store.record([listing("1", 20000), listing("2", 30000)], seen_at=1 * DAY) == 2
+    assert store.record([listing("1", 20000), listing("2", 30000)], seen_at=2 * DAY) == 0
+    assert store.record([listing("1", 18000), listing("2", 30000)], seen_at=3 * DAY) == 1
+
+    assert store.history("1") == [(1 * DAY, 20000), (3 * DAY, 18000)]
+    assert store.history("1", start=2 * DAY) == [(3 * DAY, 18000)]
+
+    # // Ostatnie ceny są odczytywane z bazy po ponownym otwarciu
+    reopened = PriceHistoryStore(str(tmp_path / "history.sqlite3"))
+    assert reopened.record([listing("1", 18000)], seen_at=4 * DAY) == 0
+
+
+def test_stores_sharing_a_file_do_not_duplicate_changes(tmp_path):
+    # // Dashboard i harmonogram (osobne procesy) zapisują do tej samej bazy
+    dashboard = PriceHistoryStore(str(tmp_path / "history.sqlite3"))
+    scheduler = PriceHistoryStore(str(tmp_path / "history.sqlite3"))
+    dashboard.record([listing("1", 20000)], seen_at=1 * DAY)
+    assert scheduler.record([listing("1", 18000)], seen_at=2 * DAY) == 1
+    assert dashboard.record([listing("1", 18000)], seen_at=3 * DAY) == 0
+
+    assert dashboard.history("1") == [(1 * DAY, 20000), (2 * DAY, 18000)]
+    assert [(drop.old_price, drop.new_price) for drop in dashboard.price_drops(since=0)] == [(20000, 18000)]
+
+
+def test_price_drops_by_range_area_and_bedrooms(tmp_path):
+    store = PriceHistoryStore(str(tmp_path / "history.sqlite3"))
+    store.record([listing("1", 20000), listing("2", 30000), listing("3", 25000, area="Patong"),
+                  listing("4", 40000, bedrooms=3)], seen_at=1 * DAY)
+    store.record([listing("1", 19000)], seen_at=2 * DAY)
+    store.record([listing("2", 28000), listing("3", 24000, area="Patong"), listing("4", 35000, bedrooms=3),
+                  listing("1", 21000)], seen_at=9 * DAY)
+
+    drops = store.price_drops(since=3 * DAY, area="rawai", bedrooms=2)
+    assert [(drop.listing_id, drop.old_price, drop.new_price) for drop in drops] == [("2", 30000, 28000)]
+    assert {drop.listing_id for drop in store.price_drops(since=0)} == {"1", "2", "3", "4"}
+    assert [drop.listing_id for drop in store.price_drops(since=0, until=3 * DAY)] == ["1"]
+    assert round(drops[0].change_pct, 2) == -6.67
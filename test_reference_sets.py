@@ -0,0 +1,51 @@
+from haversine import haversine
+from location_service import LocationService
+from reference_sets import DEFAULT_SET_NAME, ReferenceSetStore
+from shared_cache import SharedCache
+
+RAWAI = (7.7796, 98.3250)
+KATA = (7.8206, 98.2988)
+WORK = {"Office": (7.8900, 98.3980), "Gym": (7.8467, 98.3394)}
+
+
+def test_saved_set_is_shared_but_selection_stays_in_session(tmp_path):
+    state_file = str(tmp_path / "reference_sets.json")
+    service = LocationService(location_cache=SharedCache(10), reference_sets=ReferenceSetStore(state_file))
+    service.reference_points = dict(WORK)
+    assert service.save_reference_set("Work")[0]
+    assert not service.save_reference_set(DEFAULT_SET_NAME)[0]
+
+    service.set_city("Bangkok")
+    assert service.reference_points == LocationService.DEFAULT_REFERENCE_POINTS["Bangkok"]
+    service.set_city("Phuket")
+    assert service.active_set == "Work" and service.reference_points == WORK
+
+    # // Inna sesja (lub nowy proces) widzi zapisany zestaw, ale startuje od punktów domyślnych
+    other = LocationService(location_cache=SharedCache(10), reference_sets=ReferenceSetStore(state_file))
+    assert other.active_set == DEFAULT_SET_NAME
+    assert other.reference_set_names() == [DEFAULT_SET_NAME, "Work"]
+    assert other.use_reference_set("Work") and other.reference_points == WORK
+
+    assert other.delete_reference_set("Work")
+    assert other.active_set == DEFAULT_SET_NAME
+    assert ReferenceSetStore(state_file).set_names("Phuket") == []
+
+
+def test_distances_to_known_centroids_come_from_table(tmp_path):
+    store = ReferenceSetStore(str(tmp_path / "reference_sets.json"), save_interval=3600)
+    store.add_centroid("Rawai, Muang Phuket", RAWAI)
+    service = LocationService(location_cache=SharedCache(10), reference_sets=store)
+    service.reference_points = dict(WORK)
+
+    table = store.distance_table(WORK)
+    assert table.lookup(RAWAI) is not None and table.lookup(KATA) is None
+    # // Centroid dopisany później trafia do istniejących tablic; plik jest zapisywany porcjami
+    store.add_centroid("Kata, Muang Phuket", KATA)
+    assert table.lookup(KATA) is not None
+    assert not (tmp_path / "reference_sets.json").exists()
+    store.flush()
+    assert len(ReferenceSetStore(store.state_file).distance_table(WORK)) == 2
+
+    for coords in (RAWAI, KATA, (7.95, 98.28)):
+        expected = {name: round(haversine(coords, point), 2) for name, point in WORK.items()}
+        assert service.calculate_distances(coords) == expected
@@ -0,0 +1,68 @@
+from urllib.parse import parse_qs, urlparse
+from models import PropertyListing, ListingInfo
+from search_sharding import ShardedSearch, build_search_url, split_params
+
+
+def test_price_band_is_halved_and_open_band_gets_an_upper_bound():
+    assert split_params({"min_price": 10000, "max_price": 30000}) == [
+        {"min_price": 10000, "max_price": 20000},
+        {"min_price": 20000, "max_price": 30000},
+    ]
+    assert split_params({"bedrooms": "2"}) == [
+        {"bedrooms": "2", "max_price": 50000},
+        {"bedrooms": "2", "min_price": 50000},
+    ]
+
+
+def test_narrow_band_is_split_by_type_then_bedrooms():
+    narrow = {"min_price": 10000, "max_price": 10500}
+    by_type = split_params({**narrow, "property_types": ["CONDO", "VIL"]})
+    assert [shard["property_types"] for shard in by_type] == [["CONDO"], ["VIL"]]
+
+    by_beds = split_params({**narrow, "property_types": ["CONDO"], "bedrooms": ["1", "2"]})
+    assert [shard["bedrooms"] for shard in by_beds] == [["1"], ["2"]]
+
+    assert split_params({**narrow, "property_types": ["CONDO"], "bedrooms": "1"}) == []
+
+    # // Bez filtrów typu i sypialni nie dzielimy po wyliczonych wartościach (inne typy by wypadły)
+    assert split_params(narrow) == []
+    assert [shard["bedrooms"] for shard in split_params({**narrow, "bedrooms": ["1", "2"]})] == [["1"], ["2"]]
+
+
+def test_search_url_lists_single_and_multiple_filter_values():
+    query = parse_qs(urlparse(build_search_url({"bedrooms": "5+", "property_types": ["CONDO", "APT"]})).query)
+    assert query["beds[]"] == ["5+"]
+    assert query["property_type_code[]"] == ["CONDO", "APT"]
+    assert query["region_code"] == ["TH83"]
+
+
+def listing(i):
+    return PropertyListing(name=f"Condo {i}", listing_info=ListingInfo(id=str(i)))
+
+
+def shard_pages(requested):
+    # // Wyszukiwania bez górnej granicy ceny poniżej 100000 mają 30 stron, pozostałe - 2 strony
+    # // z nakładającymi się ogłoszeniami
+    def pages_for(base_url):
+        query = parse_qs(urlparse(base_url).query)
+        requested.append(query)
+        low = int(query.get("minprice", ["0"])[0]) // 1000
+        total_pages = 30 if "maxprice" not in query and low < 100 else 2
+        return [[listing(low + page), listing(low + page + 1)] for page in range(1, total_pages + 1)]
+
+    return pages_for
+
+
+def test_deep_shards_are_split_and_results_deduplicated(fake_scraper):
+    requested = []
+    pages = []
+    search = ShardedSearch({}, max_shard_pages=10, max_workers=2, scraper_factory=fake_scraper(shard_pages(requested)))
+    listings = search.run(on_page=lambda done, planned, new: pages.append((done, planned)))
+
+    # // 0+ dzielone na 0-50000 i 50000+, a 50000+ na 50000-100000 i 100000+
+    assert len(requested) == 5
+    assert search.shards_crawled == 3
+    ids = [item.listing_info.id for item in listings]
+    assert len(ids) == len(set(ids))
+    assert {"1", "2", "3", "51", "52", "53"} <= set(ids)
+    assert pages[-1][0] == search.pages_done
@@ -0,0 +1,37 @@
+from session_pool import SessionPool
+
+
+def make_pool(tmp_path):
+    return SessionPool(cookie_file=str(tmp_path / "cookies.json"))
+
+
+def test_cookies_persisted_and_reused(tmp_path):
+    pool = make_pool(tmp_path)
+    session, warm = pool.acquire()
+    assert not warm
+    # // Wydanie sesji nie uruchamia rozgrzewania (ruchu do DDProperty)
+    assert pool._refresh_thread is None
+
+    session.cookies.set("PHPSESSID", "abc", domain=".ddproperty.com")
+    pool.release(session, warmed=True)
+
+    # // Ta sama pula wydaje rozgrzaną sesję z kolejki
+    again, warm = pool.acquire()
+    assert warm and again is session
+
+    # // Nowy proces: świeże ciasteczka z dysku wystarczą, bez wizyty na stronie głównej
+    restored, warm = make_pool(tmp_path).acquire()
+    assert warm
+    assert restored.cookies.get("PHPSESSID") == "abc"
+
+
+def test_expired_idle_session_is_closed(tmp_path):
+    pool = make_pool(tmp_path)
+    session, _ = pool.acquire()
+    closed = []
+    session.close = lambda: closed.append(session)
+    pool._idle.append((session, 0.0))
+
+    fresh, _ = pool.acquire()
+    assert fresh is not session
+    assert closed == [session]
@@ -0,0 +1,67 @@
+import threading
+import time
+from models import PropertyListing, PropertyInfo
+from shared_cache import SharedCache, estimate_listings_bytes
+
+
+def test_least_recently_used_entries_are_evicted_over_size_limit():
+    cache = SharedCache(max_size=10)
+    cache.put("a", "A", size=4)
+    cache.put("b", "B", size=4)
+    assert cache.get("a") == "A"  # // "a" staje się ostatnio używanym
+    cache.put("c", "C", size=4)
+
+    assert "b" not in cache
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.total_size == 8
+
+    cache.put("huge", "H", size=11)
+    assert "huge" not in cache and len(cache) == 2
+
+
+def test_concurrent_requests_for_one_key_compute_once():
+    cache = SharedCache(max_size=100)
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return ["listing"]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_create("search", factory)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_empty_results_are_not_cached():
+    cache = SharedCache(max_size=100)
+    assert cache.get_or_create("search", lambda: []) == []
+    assert "search" not in cache
+
+
+def test_listing_size_estimate_scales_with_count():
+    listings = [PropertyListing(name=f"Condo {i}", property_info=PropertyInfo(amenities=["Pool"]))
+                for i in range(200)]
+    small = estimate_listings_bytes(listings[:20])
+    large = estimate_listings_bytes(listings)
+    assert small > 0 and 8 * small < large < 12 * small
+
+
+def test_entries_expire_after_ttl():
+    now = [0.0]
+    cache = SharedCache(max_size=100, ttl=60, clock=lambda: now[0])
+    cache.put("search", ["old"], size=4)
+    now[0] = 59
+    assert cache.get_or_create("search", lambda: ["new"]) == ["old"]
+
+    # // Po czasie ważności to samo wyszukiwanie jest wyliczane od nowa
+    now[0] = 61
+    assert "search" not in cache and cache.total_size == 0
+    assert cache.get_or_create("search", lambda: ["new"]) == ["new"]
@@ -0,0 +1,30 @@
+from models import PropertyListing, PropertyInfo, Location
+from sort_index import ListingSortIndex
+
+
+def make_listing(name, price, sqm=None, distance=None):
+    return PropertyListing(
+        name=name,
+        price=price,
+        price_per_sqm=round(price / sqm, 2) if price and sqm else None,
+        property_info=PropertyInfo(floor_area_sqm=sqm),
+        location=Location(distances={"Patong": distance} if distance is not None else {}),
+    )
+
+
+def test_sort_options_put_missing_values_last():
+    listings = [
+        make_listing("a", 30000, 60, 4.0),
+        make_listing("b", None, 40, 1.5),
+        make_listing("c", 15000, None, None),
+        make_listing("d", 20000, 25, 9.0),
+    ]
+    index = ListingSortIndex(listings)
+
+    names = lambda option: [listing.name for listing in index.sorted(option)]
+    assert names("default") == ["a", "b", "c", "d"]
+    assert names("price_low_high") == ["c", "d", "a", "b"]
+    assert names("price_high_low") == ["a", "d", "c", "b"]
+    assert names("size_large_small") == ["a", "b", "d", "c"]
+    assert names("price_per_sqm_low_high") == ["a", "d", "b", "c"]
+    assert names("distance_near_far") == ["b", "a", "d", "c"]
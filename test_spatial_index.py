@@ -0,0 +1,38 @@
+import random
+from haversine import haversine
+from location_service import LocationService
+from models import Location, PropertyListing
+from reference_sets import ReferenceSetStore
+from shared_cache import SharedCache
+from spatial_index import SpatialIndex
+
+
+def test_radius_and_nearest_match_brute_force():
+    # // Losowe punkty wokół Phuket porównane z pełnym przeglądem
+    rng = random.Random(7)
+    points = [(i, (7.7 + rng.random() * 0.5, 98.2 + rng.random() * 0.3)) for i in range(2000)]
+    index = SpatialIndex().build(points)
+    patong = (7.9039, 98.2970)
+
+    expected = {key for key, coords in points if haversine(patong, coords) <= 3}
+    assert {key for key, _ in index.radius_query(patong, 3)} == expected
+
+    brute = sorted(points, key=lambda item: haversine(patong, item[1]))[:5]
+    assert [key for key, _ in index.nearest(patong, 5)] == [key for key, _ in brute]
+
+
+def test_nearest_far_away_point_returns_all():
+    index = SpatialIndex().build([("a", (7.9, 98.3)), ("b", (13.7, 100.5)), ("c", None)])
+    assert [key for key, _ in index.nearest((51.1, 17.0), 5)] == ["b", "a"]
+
+
+def test_location_service_rebuilds_index_when_listings_version_changes(tmp_path):
+    service = LocationService(location_cache=SharedCache(10),
+                              reference_sets=ReferenceSetStore(str(tmp_path / "reference_sets.json")))
+    near = [PropertyListing(name="near", location=Location(coordinates=(7.90, 98.30)))]
+    far = PropertyListing(name="far", location=Location(coordinates=(13.7, 100.5)))
+    assert service.filter_by_distance(near, 5, version="a") == near
+
+    # // Ta sama lista i długość, zmieniona zawartość - nowy klucz wersji wymusza przebudowę
+    near[0] = far
+    assert service.filter_by_distance(near, 5, version="b") == []
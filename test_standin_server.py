@@ -0,0 +1,39 @@
+import metrics
+from benchmarks.standin_server import StandInServer
+from dd_property_scraper import DDPropertyScraper
+from rate_limiter import RateLimiter
+from session_pool import SessionPool
+
+
+def make_scraper(tmp_path, server):
+    scraper = DDPropertyScraper(session_pool=SessionPool(cookie_file=str(tmp_path / "cookies.json")))
+    scraper.base_url = server.url
+    scraper.rate_limiter = RateLimiter(1000, burst=100, name="standin")
+    return scraper
+
+
+def test_scraper_crawls_all_stand_in_pages(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "throttle_sleep", lambda seconds, reason: None)
+    with StandInServer(total_pages=4, listings_per_page=5) as server:
+        with make_scraper(tmp_path, server) as scraper:
+            listings = scraper.scrape_all_pages(server.search_url())
+
+        assert len(listings) == 20
+        assert server.stats()["pages_served"] == 4
+        assert server.stats()["responses"] == {200: 5}  # // 4 strony wyników + strona główna
+
+
+def test_injected_errors_reach_the_scraper(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "throttle_sleep", lambda seconds, reason: None)
+    with StandInServer(total_pages=4, listings_per_page=5) as server:
+        with make_scraper(tmp_path, server) as scraper:
+            assert scraper.fetch_page_html(server.search_url()) is not None
+            server.fail_next(2, status=429)
+            assert scraper.fetch_page_html(server.search_url()) is None
+            assert scraper.fetch_page_html(server.search_url()) is None
+
+            server.error_rate = 1.0
+            server.error_statuses = (503,)
+            assert scraper.fetch_page_html(server.search_url()) is None
+
+        assert server.stats()["responses"] == {200: 2, 429: 2, 503: 1}